@@ -0,0 +1,109 @@
+"""
+测试用例库基准测试
+1. 写入：单个事务批量写入 与 每个用例单独提交 的吞吐量
+2. 查询："最近N个文档中某模块的高优先级用例"，使用索引 与 强制全表扫描(NOT INDEXED) 的计数耗时，
+   以及通过query()把这些用例完整加载为TestCase的耗时
+3. 对比：从用例库惰性查询 与 重新解析各文档导出的Excel文件 得到同一批用例的耗时
+
+用法:
+    python benchmarks/bench_case_store.py [--documents 50] [--cases-per-document 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from openpyxl import load_workbook
+
+from src.core.case_store import TestCaseStore
+from src.exporters import excel_exporter
+from src.exporters.excel_exporter import ExcelExporter
+from bench_excel_export import make_cases
+
+MODULE = "营销活动模块3"
+PRIORITY = "高"
+# 逐个提交的写入方式太慢，只抽样写入这么多用例后按比例换算
+NAIVE_SAMPLE = 2000
+
+
+def naive_insert(store: TestCaseStore, test_cases):
+    """旧思路：每个用例单独开启事务并提交"""
+    for test_case in test_cases:
+        store.add_document(f"naive-{test_case.id}", [test_case])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试用例库基准测试")
+    parser.add_argument("--documents", type=int, default=50, help="文档数量")
+    parser.add_argument("--cases-per-document", type=int, default=2000, help="每个文档的用例数量")
+    args = parser.parse_args()
+
+    per_document = list(make_cases(args.cases_per_document))
+    total = args.documents * args.cases_per_document
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        excel_exporter.OUTPUT_DIR = work_dir
+        store = TestCaseStore(os.path.join(work_dir, "cases.sqlite3"))
+
+        start = time.perf_counter()
+        for index in range(args.documents):
+            store.add_document(f"prd-{index:03d}.md", per_document)
+        bulk = time.perf_counter() - start
+
+        naive_store = TestCaseStore(os.path.join(work_dir, "naive.sqlite3"))
+        start = time.perf_counter()
+        naive_insert(naive_store, per_document[:NAIVE_SAMPLE])
+        naive = (time.perf_counter() - start) * total / NAIVE_SAMPLE
+        naive_store.close()
+
+        print(f"insert {total} cases: bulk {bulk:.2f}s ({total / bulk:,.0f}/s), "
+              f"per-case commit ~{naive:.2f}s (extrapolated from {NAIVE_SAMPLE})")
+
+        def count(hint: str):
+            return store._conn.execute(
+                f"SELECT COUNT(*) FROM cases {hint} WHERE module = ? AND priority = ? AND "
+                "document_id IN (SELECT id FROM documents ORDER BY updated_at DESC LIMIT ?)",
+                (MODULE, PRIORITY, args.documents)
+            ).fetchone()[0]
+
+        def load():
+            return sum(1 for _ in store.query(module=MODULE, priority=PRIORITY,
+                                              latest_documents=args.documents))
+
+        variants = (
+            ("count, indexed", lambda: count("")),
+            ("count, full scan", lambda: count("NOT INDEXED")),
+            ("query() + load", load),
+        )
+        for name, func in variants:
+            start = time.perf_counter()
+            found = func()
+            print(f"{name:<22} {found:>6} cases {time.perf_counter() - start:>8.3f}s")
+
+        # 现状：只能重新解析每个文档导出的Excel文件再筛选
+        exporter = ExcelExporter()
+        paths = [exporter.export_stream(per_document, f"prd-{index:03d}")
+                 for index in range(min(args.documents, 5))]
+        start = time.perf_counter()
+        found = 0
+        for path in paths:
+            workbook = load_workbook(path, read_only=True)
+            for row in workbook.active.iter_rows(min_row=2, values_only=True):
+                if row[1] == MODULE and row[3] == PRIORITY:
+                    found += 1
+            workbook.close()
+        reparse = (time.perf_counter() - start) * args.documents / len(paths)
+        print(f"{'reparse Excel files':<22} {found * args.documents // len(paths):>6} cases "
+              f"{reparse:>8.3f}s (extrapolated from {len(paths)} files)")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
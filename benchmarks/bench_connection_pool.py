@@ -0,0 +1,116 @@
+"""
+连接池基准测试
+对比“每次请求新建ClientSession”与LLMEngine共享连接池两种方式的单请求延迟
+
+用法:
+    python benchmarks/bench_connection_pool.py [--requests 200]
+
+在本地启动一个模拟Ollama /api/generate 接口的桩服务，顺序发送请求并统计延迟。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+# 将项目根目录和src目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from core.llm_engine import LLMEngine
+
+
+async def _handle_generate(request: web.Request) -> web.Response:
+    """模拟Ollama的非流式生成接口"""
+    await request.json()
+    return web.json_response({"response": '{"test_cases": []}', "done": True})
+
+
+async def start_stub_server() -> (web.AppRunner, str):
+    """
+    启动本地桩服务
+
+    Returns:
+        (web.AppRunner, str): 服务运行器和服务基础URL
+    """
+    app = web.Application()
+    app.router.add_post("/api/generate", _handle_generate)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def bench_new_session(api_base: str, count: int) -> list:
+    """每次请求都新建ClientSession（旧实现）"""
+    latencies = []
+    data = {"model": "stub", "prompt": "ping", "stream": False}
+    for _ in range(count):
+        start = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{api_base}/api/generate", json=data) as response:
+                await response.json()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def bench_pooled_engine(api_base: str, count: int) -> list:
+    """通过LLMEngine共享的连接池发送请求"""
+    latencies = []
+    # 屏蔽引擎的调试输出，避免终端打印影响计时
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            # 与新建会话的方式请求同一个接口
+            engine.chat_api = False
+            for _ in range(count):
+                start = time.perf_counter()
+                await engine.generate_response("ping", "system")
+                latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    """打印延迟统计"""
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{name:<20} mean={statistics.mean(latencies) * 1000:7.3f}ms "
+          f"p50={statistics.median(latencies) * 1000:7.3f}ms "
+          f"p95={p95 * 1000:7.3f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LLMEngine连接池基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每种方式发送的请求数")
+    args = parser.parse_args()
+
+    runner, api_base = await start_stub_server()
+    try:
+        # 预热，排除首次导入和事件循环初始化的影响
+        await bench_new_session(api_base, 5)
+
+        new_session = await bench_new_session(api_base, args.requests)
+        pooled = await bench_pooled_engine(api_base, args.requests)
+
+        print(f"\n{args.requests} sequential requests against {api_base}")
+        report("new session/request", new_session)
+        report("pooled engine", pooled)
+        speedup = statistics.mean(new_session) / statistics.mean(pooled)
+        print(f"speedup: {speedup:.2f}x")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
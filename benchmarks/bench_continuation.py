@@ -0,0 +1,156 @@
+"""
+截断续写基准测试
+在本地启动一个模拟Ollama /api/chat 接口的桩服务，按输出令牌数模拟解码耗时，
+输出超过num_predict时在令牌上限处截断并返回done_reason=length；对比以下三种处理方式
+得到的有效用例数、请求数和总耗时：
+    salvage   关闭续写，只保留截断前完整的测试用例
+    continue  续写被截断的响应，从最后一个完整用例之后继续生成
+    retry     检测到截断后把num_predict加倍，从头重新生成
+
+用法:
+    python benchmarks/bench_continuation.py [--token-ms 2] [--cases 30] [--max-tokens 2500]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from aiohttp import web
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.core.llm_engine import LLMEngine
+from src.utils.json_repair import extract_test_case_dicts
+from src.utils.text_utils import estimate_tokens
+
+# 构造用例文本的词汇，每个用例随机组合
+WORDS = ["单品特价", "满减门槛", "整单折扣", "赠品库存", "加价购", "会员价", "门店范围", "优先级",
+         "叠加规则", "互斥校验", "购物车", "收银界面", "订单提交", "退款分摊", "活动标签", "换购商品"]
+
+
+def fake_case(number: int) -> dict:
+    """构造第number个测试用例"""
+    rng = random.Random(number)
+
+    def phrase() -> str:
+        return "、".join(rng.sample(WORDS, 4))
+
+    return {
+        "module": "营销活动",
+        "title": f"用例{number}：{phrase()}",
+        "priority": "中",
+        "preconditions": [f"已配置{phrase()}"],
+        "steps": [
+            {"step_number": 1, "description": f"准备{phrase()}的数据", "expected_result": f"{phrase()}正确"},
+            {"step_number": 2, "description": f"执行{phrase()}的操作", "expected_result": f"{phrase()}生效"}
+        ]
+    }
+
+
+class StubModel:
+    """
+    模拟的Ollama服务
+    每次生成固定数量的测试用例；续写请求从提示词中列出的已生成用例数之后继续生成
+    """
+
+    def __init__(self, token_ms: float, cases: int):
+        self.token_ms = token_ms
+        self.cases = cases
+        self.requests = 0
+        self.output_tokens = 0
+
+    def respond(self, prompt: str) -> str:
+        done = re.search(r"在第(\d+)个测试用例之后被截断", prompt)
+        first = int(done.group(1)) + 1 if done else 1
+        cases = [fake_case(number) for number in range(first, self.cases + 1)]
+        return json.dumps({"test_cases": cases}, ensure_ascii=False, indent=2)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        prompt = "\n\n".join(message["content"] for message in data["messages"])
+        self.requests += 1
+        response = self.respond(prompt)
+        limit = data["options"]["num_predict"]
+        done_reason = "stop"
+        # 按令牌上限截断输出
+        if estimate_tokens(response) > limit:
+            done_reason = "length"
+            low, high = 0, len(response)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate_tokens(response[:middle]) <= limit:
+                    low = middle
+                else:
+                    high = middle - 1
+            response = response[:low]
+        tokens = estimate_tokens(response)
+        self.output_tokens += tokens
+        await asyncio.sleep(tokens * self.token_ms / 1000)
+        return web.json_response({"message": {"role": "assistant", "content": response},
+                                  "done": True, "done_reason": done_reason})
+
+
+async def run_mode(api_base: str, model: StubModel, mode: str, max_tokens: int) -> dict:
+    """以指定方式生成一次，返回耗时、请求数、输出令牌数和有效用例数"""
+    model.requests = model.output_tokens = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            engine.fallback_models = []
+            engine.continuation_enabled = mode == "continue"
+            start = time.perf_counter()
+            response = await engine.generate_response("生成测试用例", "系统提示词", max_tokens=max_tokens)
+            if mode == "retry":
+                budget = max_tokens
+                while getattr(response, "done_reason", None) == "length":
+                    budget *= 2
+                    response = await engine.generate_response("生成测试用例", "系统提示词", max_tokens=budget)
+            elapsed = time.perf_counter() - start
+    cases, _ = extract_test_case_dicts(response)
+    return {"elapsed": elapsed, "requests": model.requests, "tokens": model.output_tokens,
+            "cases": len({case["title"] for case in cases})}
+
+
+async def main_async(args):
+    model = StubModel(args.token_ms, args.cases)
+    app = web.Application()
+    app.router.add_post("/api/chat", model.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    api_base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        full = estimate_tokens(model.respond(""))
+        print(f"token latency {args.token_ms} ms, {args.cases} cases (~{full} tokens), "
+              f"num_predict {args.max_tokens}")
+        print(f"{'mode':<10} {'wall s':>7} {'requests':>9} {'out tokens':>11} {'cases':>6}")
+        for mode in ("salvage", "continue", "retry"):
+            result = await run_mode(api_base, model, mode, args.max_tokens)
+            print(f"{mode:<10} {result['elapsed']:>7.2f} {result['requests']:>9} "
+                  f"{result['tokens']:>11} {result['cases']:>6}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="截断续写基准测试")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="每个输出令牌的模拟解码耗时(毫秒)")
+    parser.add_argument("--cases", type=int, default=30, help="模型完整输出的测试用例数")
+    parser.add_argument("--max-tokens", type=int, default=2500, help="每次请求的num_predict")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+近似重复检测基准测试
+1. 对N个合成用例（其中一部分是改写了个别字词和标点的近似重复）运行MinHash LSH去重的耗时
+2. 在抽样的用例上与逐对计算精确Jaccard相似度的朴素做法对比耗时，并按二次复杂度换算到N个用例，
+   同时以朴素做法的结果为准统计LSH去重的召回率和误删数
+
+用法:
+    python benchmarks/bench_dedup.py [--cases 100000] [--duplicates 0.1] [--sample 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.config import DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD
+from src.core.test_generator import TestCase, TestStep
+from src.utils.dedup import case_text, deduplicate
+
+OBJECTS = ["订单", "优惠券", "购物车", "会员积分", "支付", "退款", "库存", "物流", "发票", "评价",
+           "收货地址", "秒杀活动", "满减活动", "商品详情", "搜索", "消息通知", "账户余额", "登录", "注册", "客服"]
+ACTIONS = ["创建", "修改", "删除", "查询", "提交", "取消", "审核", "导出", "同步", "校验",
+           "领取", "核销", "冻结", "恢复", "分享"]
+CONDITIONS = ["网络中断时", "并发请求时", "超过上限时", "未登录时", "数据为空时", "权限不足时",
+              "跨天结算时", "重复提交时", "输入非法字符时", "服务超时时"]
+RESULTS = ["提示操作成功", "返回错误码并提示原因", "数据保持一致", "记录操作日志", "页面正确刷新",
+           "金额计算正确", "状态更新为已完成", "不产生重复数据"]
+TWEAKS = ["，", "。", " ", "该", "正确", "页面"]
+
+
+def make_case(rng: random.Random, index: int) -> TestCase:
+    """生成一个内容随机的用例"""
+    target, action, condition = rng.choice(OBJECTS), rng.choice(ACTIONS), rng.choice(CONDITIONS)
+    steps = []
+    for number in range(1, rng.randint(3, 5)):
+        steps.append(TestStep(
+            step_number=number,
+            description=f"{rng.choice(CONDITIONS)}{rng.choice(ACTIONS)}{rng.choice(OBJECTS)}，"
+                        f"编号{rng.randint(1, 99999)}",
+            expected_result=rng.choice(RESULTS)
+        ))
+    return TestCase(id=f"20250101-{index:06d}", module=f"{target}模块",
+                    title=f"{condition}{action}{target}", preconditions=["系统正常运行"],
+                    steps=steps, priority=rng.choice(["高", "中", "低"]))
+
+
+def rephrase(rng: random.Random, test_case: TestCase, index: int) -> TestCase:
+    """改写一个用例中的个别字词和标点，模拟LLM重复输出的近似用例"""
+    duplicate = test_case.copy(deep=True)
+    duplicate.id = f"20250101-{index:06d}"
+    step = rng.choice(duplicate.steps)
+    position = rng.randrange(len(step.description) + 1)
+    step.description = step.description[:position] + rng.choice(TWEAKS) + step.description[position:]
+    duplicate.title += rng.choice(["", "。", "（补充）"])
+    return duplicate
+
+
+def make_dataset(count: int, duplicate_ratio: float, seed: int = 7):
+    """生成count个用例，其中约duplicate_ratio比例是前面某个用例的改写"""
+    rng = random.Random(seed)
+    test_cases = []
+    for index in range(count):
+        if test_cases and rng.random() < duplicate_ratio:
+            test_cases.append(rephrase(rng, rng.choice(test_cases), index))
+        else:
+            test_cases.append(make_case(rng, index))
+    return test_cases
+
+
+def shingles(text: str) -> set:
+    """与dedup模块相同的字符分片（末尾补零）"""
+    padded = text + "\0" * (DEDUP_SHINGLE_SIZE - 1)
+    return {padded[i:i + DEDUP_SHINGLE_SIZE] for i in range(len(text))}
+
+
+def naive_duplicates(test_cases) -> set:
+    """朴素做法：逐对计算精确Jaccard相似度，返回与前面某个保留用例重复的用例下标"""
+    sets = [shingles(case_text(test_case)) for test_case in test_cases]
+    kept = []
+    removed = set()
+    for index, current in enumerate(sets):
+        for other in kept:
+            union = len(current | sets[other])
+            if union and len(current & sets[other]) / union >= DEDUP_THRESHOLD:
+                removed.add(index)
+                break
+        else:
+            kept.append(index)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重复检测基准测试")
+    parser.add_argument("--cases", type=int, default=100000, help="测试用例数量")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="近似重复用例的比例")
+    parser.add_argument("--sample", type=int, default=2000, help="与朴素做法对比的抽样用例数")
+    args = parser.parse_args()
+
+    test_cases = make_dataset(args.cases, args.duplicates)
+    start = time.perf_counter()
+    kept, removed = deduplicate([test_case.copy() for test_case in test_cases])
+    elapsed = time.perf_counter() - start
+    print(f"{args.cases} cases: MinHash LSH removed {removed} in {elapsed:.2f}s "
+          f"({args.cases / elapsed:,.0f} cases/s)")
+
+    sample = make_dataset(args.sample, args.duplicates)
+    start = time.perf_counter()
+    expected = naive_duplicates(sample)
+    naive = time.perf_counter() - start
+    print(f"naive pairwise on {args.sample}: {naive:.2f}s, "
+          f"~{naive * (args.cases / args.sample) ** 2:.0f}s extrapolated to {args.cases} cases")
+
+    kept_ids = {test_case.id for test_case in deduplicate(sample)[0]}
+    found = {index for index, test_case in enumerate(sample) if test_case.id not in kept_ids}
+    print(f"sample: {len(expected)} duplicates by exact Jaccard >= {DEDUP_THRESHOLD}, "
+          f"LSH recall {len(found & expected) / max(len(expected), 1):.1%}, "
+          f"{len(found - expected)} removed below the threshold")
+
+
+if __name__ == "__main__":
+    main()
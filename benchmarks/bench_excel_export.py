@@ -0,0 +1,141 @@
+"""
+Excel导出基准测试
+对比旧的pandas DataFrame + 逐单元格设置样式的导出方式与只写模式流式导出方式的耗时和峰值内存
+
+用法:
+    python benchmarks/bench_excel_export.py [--sizes 1000 10000 100000] [--skip-legacy-above 100000]
+
+峰值内存使用tracemalloc统计Python分配的内存，与计时分开运行，避免影响耗时结果
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+import pandas as pd
+from openpyxl.styles import Border, Side, Alignment, PatternFill, Font
+
+from src.config import EXCEL_TEMPLATE_HEADERS
+from src.core.test_generator import TestCase, TestStep
+from src.exporters import excel_exporter
+from src.exporters.excel_exporter import ExcelExporter, flatten_test_case
+
+
+def make_cases(count: int):
+    """按需生成合成测试用例，不在内存中保留整个列表"""
+    priorities = ["高", "中", "低"]
+    for index in range(count):
+        yield TestCase(
+            id=f"20250101-{index + 1:06d}",
+            module=f"营销活动模块{index % 20}",
+            title=f"活动叠加规则校验-{index}",
+            preconditions=["系统正常运行", "已配置满减活动"],
+            steps=[
+                TestStep(step_number=step, description=f"执行第{step}步操作，输入金额{index}",
+                         expected_result="系统正确计算优惠金额")
+                for step in range(1, 4)
+            ],
+            priority=priorities[index % 3]
+        )
+
+
+def legacy_export(test_cases, output_path: str) -> str:
+    """旧实现：构建DataFrame，用pd.ExcelWriter写出后再逐个单元格设置样式"""
+    data = [dict(zip(EXCEL_TEMPLATE_HEADERS, flatten_test_case(test_case))) for test_case in test_cases]
+    df = pd.DataFrame(data).reindex(columns=EXCEL_TEMPLATE_HEADERS)
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Test Cases')
+        worksheet = writer.sheets['Test Cases']
+        border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                        top=Side(style='thin'), bottom=Side(style='thin'))
+        header_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
+        header_font = Font(bold=True)
+        header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        cell_alignment = Alignment(vertical='top', wrap_text=True)
+        for col_letter, width in excel_exporter.COLUMN_WIDTHS.items():
+            worksheet.column_dimensions[col_letter].width = width
+        for col_num in range(1, len(df.columns) + 1):
+            cell = worksheet.cell(row=1, column=col_num)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.border = border
+            cell.alignment = header_alignment
+        for row_num in range(2, len(df) + 2):
+            worksheet.row_dimensions[row_num].height = 60
+            for col_num in range(1, len(df.columns) + 1):
+                cell = worksheet.cell(row=row_num, column=col_num)
+                cell.border = border
+                cell.alignment = cell_alignment
+                if col_num == 4:
+                    color = excel_exporter.PRIORITY_COLORS.get(cell.value)
+                    if color:
+                        cell.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+    return output_path
+
+
+def run(func, count: int, trace: bool) -> (float, float):
+    """
+    运行一次导出
+
+    Returns:
+        (float, float): 耗时(秒)和峰值内存(MB，未跟踪时为0)
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - start
+    peak = 0.0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel导出基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="测试用例数量")
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="用例数超过该值时跳过旧实现（旧实现在大规模下非常慢）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # 导出器写入OUTPUT_DIR，基准测试改为写入临时目录
+        excel_exporter.OUTPUT_DIR = output_dir
+        exporter = ExcelExporter()
+        legacy_path = os.path.join(output_dir, "legacy.xlsx")
+
+        def legacy(count):
+            # 旧实现需要完整的用例列表
+            legacy_export(list(make_cases(count)), legacy_path)
+
+        def streaming(count):
+            exporter.export_stream(make_cases(count), "streaming.xlsx")
+
+        print(f"{'cases':>8} {'legacy s':>9} {'peak MB':>8} {'stream s':>9} {'peak MB':>8} {'speedup':>8} "
+              f"{'legacy KB':>10} {'stream KB':>10}")
+        for count in args.sizes:
+            run_legacy = args.skip_legacy_above is None or count <= args.skip_legacy_above
+            legacy_time = legacy_peak = float("nan")
+            legacy_size = float("nan")
+            if run_legacy:
+                legacy_time, _ = run(legacy, count, trace=False)
+                _, legacy_peak = run(legacy, count, trace=True)
+                legacy_size = os.path.getsize(legacy_path) / 1024
+            stream_time, _ = run(streaming, count, trace=False)
+            _, stream_peak = run(streaming, count, trace=True)
+            stream_size = os.path.getsize(os.path.join(output_dir, "streaming.xlsx")) / 1024
+            print(f"{count:>8} {legacy_time:>9.2f} {legacy_peak:>8.1f} {stream_time:>9.2f} {stream_peak:>8.1f} "
+                  f"{legacy_time / stream_time:>7.1f}x {legacy_size:>10.0f} {stream_size:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Excel合并导出基准测试
+在已有工作簿上对比整体重写(export_stream)与合并导出(export_merge)的耗时：
+内容完全不变、1%的用例变化（一半修改、一半新增）两种情况；
+计时前先检查合并追加的行是否带有正确的优先级样式
+
+用法:
+    python benchmarks/bench_excel_merge.py [--cases 20000] [--changed 0.01]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from openpyxl import load_workbook
+
+from src.exporters import excel_exporter
+from src.exporters.excel_exporter import ExcelExporter, PRIORITY_COLORS, PRIORITY_COLUMN
+from bench_excel_export import make_cases
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def check_priority_styles(exporter: ExcelExporter):
+    """
+    回归检查：工作簿中只用过一种优先级样式时，合并追加的其他优先级行也要带上对应的填充色和边框
+    """
+    base = [test_case for test_case in make_cases(9) if test_case.priority == "高"]
+    exporter.export_stream(base, "styles")
+    path = exporter.export_merge(list(make_cases(6)), "styles")
+    sheet = load_workbook(path).active
+    for row in range(2, sheet.max_row + 1):
+        cell = sheet.cell(row, PRIORITY_COLUMN + 1)
+        color = PRIORITY_COLORS[cell.value]
+        assert cell.fill.fgColor.rgb.endswith(color), f"{cell.coordinate} fill {cell.fill.fgColor.rgb} != {color}"
+        assert cell.border.left.style == "thin", f"{cell.coordinate} has no border"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel合并导出基准测试")
+    parser.add_argument("--cases", type=int, default=20000, help="已有工作簿中的测试用例数量")
+    parser.add_argument("--changed", type=float, default=0.01, help="变化的用例比例")
+    args = parser.parse_args()
+
+    base = list(make_cases(args.cases))
+    changed = max(2, int(args.cases * args.changed))
+    modified = changed // 2
+    updated = [test_case.copy(deep=True) for test_case in base]
+    for test_case in updated[:modified]:
+        test_case.title += "（修订）"
+    # make_cases按编号顺序生成，取超出原有数量的部分作为新增用例
+    updated.extend(list(make_cases(args.cases + changed - modified))[args.cases:])
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # 导出器写入OUTPUT_DIR，基准测试改为写入临时目录
+        excel_exporter.OUTPUT_DIR = output_dir
+        exporter = ExcelExporter()
+        check_priority_styles(exporter)
+        exporter.export_stream(base, "bench")
+        # 第一次合并补写内容哈希列，之后的合并才是常规的增量情况
+        exporter.export_merge(base, "bench")
+
+        results = {
+            "rewrite": timed(lambda: exporter.export_stream(updated, "rewrite")),
+            "merge (no change)": timed(lambda: exporter.export_merge(base, "bench")),
+            f"merge ({changed} changed)": timed(lambda: exporter.export_merge(updated, "bench")),
+        }
+
+    print(f"\n{args.cases} test cases")
+    print(f"{'variant':<22} {'seconds':>8}")
+    for name, elapsed in results.items():
+        print(f"{name:<22} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
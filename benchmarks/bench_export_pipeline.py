@@ -0,0 +1,89 @@
+"""
+导出流水线基准测试
+对比在事件循环中依次调用Excel和XMind导出器与ExportPipeline在线程池/进程池中并行导出的
+总耗时，以及导出期间事件循环的最大停顿（模拟并发进行中的LLM请求无法被调度的时间）
+
+用法:
+    python benchmarks/bench_export_pipeline.py [--cases 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.exporters import excel_exporter, xmind_exporter
+from src.exporters.pipeline import ExportPipeline, default_exporters
+from bench_excel_export import make_cases
+
+
+async def measure_stall(work) -> (float, float):
+    """
+    运行导出任务，同时每10ms唤醒一次的心跳协程记录事件循环的最大停顿
+
+    Returns:
+        (float, float): 总耗时(秒)和事件循环最大停顿(毫秒)
+    """
+    done = False
+    max_stall = 0.0
+
+    async def heartbeat():
+        nonlocal max_stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            max_stall = max(max_stall, now - last - 0.01)
+            last = now
+
+    ticker = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)  # 让心跳协程先记录起始时间
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker
+    return elapsed, max_stall * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="导出流水线基准测试")
+    parser.add_argument("--cases", type=int, default=20000, help="测试用例数量")
+    args = parser.parse_args()
+
+    test_cases = list(make_cases(args.cases))
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # 导出器写入OUTPUT_DIR，基准测试改为写入临时目录（进程池在此之后才创建，子进程会继承）
+        excel_exporter.OUTPUT_DIR = output_dir
+        xmind_exporter.OUTPUT_DIR = output_dir
+        exporters = default_exporters()
+
+        async def sequential():
+            for export in exporters.values():
+                export(test_cases, "sequential")
+
+        async def pipelined(pipeline: ExportPipeline):
+            await pipeline.run(test_cases, "pipeline")
+
+        print(f"{'variant':<12} {'seconds':>8} {'max stall ms':>13}")
+        results = {"sequential": await measure_stall(sequential)}
+        for executor in ("thread", "process"):
+            with_pipeline = ExportPipeline(exporters, executor=executor)
+            try:
+                results[executor] = await measure_stall(lambda: pipelined(with_pipeline))
+            finally:
+                with_pipeline.close()
+        for name, (elapsed, stall) in results.items():
+            print(f"{name:<12} {elapsed:>8.2f} {stall:>13.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
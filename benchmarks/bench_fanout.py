@@ -0,0 +1,171 @@
+"""
+分片生成基准测试
+在本地启动一个模拟Ollama /api/chat 接口的桩服务，按输出令牌数模拟解码耗时，
+输出超过num_predict时在令牌上限处截断；对比不分片（一次生成全部用例）与按测试类型、
+按测试点分片并发生成的总耗时、得到的有效用例数和覆盖的测试类型
+
+用法:
+    python benchmarks/bench_fanout.py [--token-ms 2] [--parallel 4] [--fanout-max-tokens 2500]
+
+桩服务同时解码的请求数由--parallel限制（对应Ollama的OLLAMA_NUM_PARALLEL），
+超出的请求排队等待
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from aiohttp import web
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.config import FANOUT_MAX_TOKENS, MAX_TOKENS, TEST_CATEGORIES
+from src.core.llm_engine import LLMEngine
+from src.core.test_generator import TestGenerator
+from src.utils.text_utils import estimate_tokens
+
+# 模拟的需求分析结果中的测试点数
+TEST_POINTS = 14
+# 不分片时模型按系统提示词要求生成的用例数
+FULL_SUITE_CASES = 60
+
+
+# 构造用例文本的词汇，每个用例随机组合，保证不会被近似重复检测去掉
+WORDS = ["单品特价", "满减门槛", "整单折扣", "赠品库存", "加价购", "会员价", "门店范围", "优先级",
+         "叠加规则", "互斥校验", "购物车", "收银界面", "订单提交", "退款分摊", "活动标签", "换购商品",
+         "时段重叠", "提示弹窗", "导出列表", "条码扫描", "组合促销", "优惠金额", "创建时间", "审核状态"]
+
+
+def fake_case(category: str, number: int, point: str) -> dict:
+    """构造一个内容互不相同的测试用例"""
+    rng = random.Random(f"{category}-{number}-{point}")
+
+    def phrase() -> str:
+        return "、".join(rng.sample(WORDS, 4))
+
+    return {
+        "module": "营销活动",
+        "title": f"{category}：{point}{phrase()}",
+        "priority": "中",
+        "preconditions": [f"已配置{phrase()}", "收银台已登录"],
+        "steps": [
+            {"step_number": 1, "description": f"准备{phrase()}的数据", "expected_result": f"{phrase()}正确"},
+            {"step_number": 2, "description": f"执行{phrase()}的操作", "expected_result": f"{phrase()}生效"}
+        ]
+    }
+
+
+class StubModel:
+    """
+    模拟的Ollama服务
+    需求分析请求返回固定的测试点；生成请求按系统提示词中的分片说明决定生成哪些类型、多少个用例
+    """
+
+    def __init__(self, token_ms: float, parallel: int):
+        self.token_ms = token_ms
+        self.semaphore = asyncio.Semaphore(parallel)
+        self.truncated = 0
+
+    def respond(self, prompt: str) -> str:
+        if "测试需求分析师" in prompt:
+            points = [f"测试点{index}" for index in range(1, TEST_POINTS + 1)]
+            return json.dumps({"analysis": {"test_points": points, "business_rules": ["规则1"],
+                                            "edge_cases": ["边界条件1"]}}, ensure_ascii=False)
+        focus = re.search(r"本次只为以下内容生成测试用例：(.*)", prompt)
+        count = re.search(r"本次生成(\d+)个左右", prompt)
+        if focus is None:
+            # 不分片：按顺序轮流生成各个类型
+            categories = list(TEST_CATEGORIES)
+            cases = [fake_case(categories[index % len(categories)], index, f"测试点{index % TEST_POINTS + 1}")
+                     for index in range(FULL_SUITE_CASES)]
+        else:
+            category = next((name for name in TEST_CATEGORIES if name in focus.group(1)), None)
+            points = re.findall(r"测试点\d+", prompt) if category is None else []
+            cases = [fake_case(category or list(TEST_CATEGORIES)[index % len(TEST_CATEGORIES)], index,
+                               points[index % len(points)] if points else f"测试点{index + 1}")
+                     for index in range(int(count.group(1)))]
+        return json.dumps({"test_cases": cases}, ensure_ascii=False, indent=2)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        prompt = "\n\n".join(message["content"] for message in data["messages"])
+        response = self.respond(prompt)
+        limit = data["options"]["num_predict"]
+        # 按令牌上限截断输出
+        if estimate_tokens(response) > limit:
+            self.truncated += 1
+            low, high = 0, len(response)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate_tokens(response[:middle]) <= limit:
+                    low = middle
+                else:
+                    high = middle - 1
+            response = response[:low]
+        async with self.semaphore:
+            await asyncio.sleep(estimate_tokens(response) * self.token_ms / 1000)
+        return web.json_response({"message": {"role": "assistant", "content": response}, "done": True})
+
+
+async def run_mode(api_base: str, model: StubModel, fanout: str, fanout_max_tokens: int) -> dict:
+    """以指定的分片模式生成一次，返回耗时、用例数和覆盖的类型数"""
+    model.truncated = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            engine.fallback_models = []
+            generator = TestGenerator(engine, mode="single", compaction=False, fanout=fanout,
+                                      fanout_max_tokens=fanout_max_tokens)
+            start = time.perf_counter()
+            test_cases = await generator.generate_test_cases("需求文档")
+            elapsed = time.perf_counter() - start
+    titles = [test_case.title for test_case in test_cases]
+    categories = {title.split("：")[0] for title in titles if "：" in title}
+    return {"elapsed": elapsed, "cases": len(test_cases), "categories": len(categories),
+            "truncated": model.truncated}
+
+
+async def main_async(args):
+    model = StubModel(args.token_ms, args.parallel)
+    app = web.Application()
+    app.router.add_post("/api/chat", model.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    api_base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        print(f"token latency {args.token_ms} ms, server parallelism {args.parallel}, "
+              f"MAX_TOKENS {MAX_TOKENS}, FANOUT_MAX_TOKENS {args.fanout_max_tokens or FANOUT_MAX_TOKENS}")
+        print(f"{'fanout':<12} {'wall s':>7} {'cases':>6} {'ms/case':>8} {'categories':>11} {'truncated':>10}")
+        for fanout in ("off", "category", "test_point"):
+            result = await run_mode(api_base, model, fanout, args.fanout_max_tokens)
+            print(f"{fanout:<12} {result['elapsed']:>7.2f} {result['cases']:>6} "
+                  f"{result['elapsed'] * 1000 / max(result['cases'], 1):>8.0f} "
+                  f"{result['categories']:>11} {result['truncated']:>10}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片生成基准测试")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="每个输出令牌的模拟解码耗时(毫秒)")
+    parser.add_argument("--parallel", type=int, default=4, help="桩服务同时解码的请求数")
+    parser.add_argument("--fanout-max-tokens", type=int, default=None,
+                        help="每个分片的最大令牌数，默认使用FANOUT_MAX_TOKENS")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
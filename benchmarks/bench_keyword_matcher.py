@@ -0,0 +1,90 @@
+"""
+需求类型检测基准测试
+对比旧实现（整个文档转小写后每个关键词调用一次str.count，main()中再完整扫描一次打印得分）
+与预编译的Aho-Corasick关键词匹配器（一次扫描得到全部得分）的耗时，并校验两者的得分一致；
+再从文档中截取片段作为额外关键词，对比关键词数量增加后两者耗时的变化
+
+用法:
+    python benchmarks/bench_keyword_matcher.py [--file docs/requirements.txt] [--documents 200] [--extra 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.config import REQUIREMENT_TYPE_KEYWORDS
+from src.utils.keyword_matcher import KeywordMatcher, requirement_type_matcher
+
+
+def legacy_scores(requirements: str, type_keywords: dict = REQUIREMENT_TYPE_KEYWORDS) -> dict:
+    """旧实现：每个关键词对整个小写文档调用一次str.count"""
+    req_lower = requirements.lower()
+    return {req_type: sum(req_lower.count(keyword) for keyword in keywords)
+            for req_type, keywords in type_keywords.items()}
+
+
+def extended_keywords(requirements: str, extra: int) -> dict:
+    """在默认关键词之外，为每种类型从文档中随机截取extra个2~4字的片段作为关键词"""
+    rng = random.Random(3)
+    text = "".join(requirements.split())
+    keywords = {}
+    for req_type, weights in REQUIREMENT_TYPE_KEYWORDS.items():
+        keywords[req_type] = dict(weights)
+        for _ in range(extra):
+            start = rng.randrange(len(text) - 4)
+            keywords[req_type][text[start:start + rng.randint(2, 4)].lower()] = 1
+    return keywords
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="需求类型检测基准测试")
+    parser.add_argument("--file", default=os.path.join(ROOT_DIR, "docs", "requirements.txt"),
+                        help="需求文档")
+    parser.add_argument("--documents", type=int, default=200, help="模拟批量处理的文档数量")
+    parser.add_argument("--extra", type=int, default=50, help="每种类型额外添加的关键词数量")
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        requirements = f.read()
+    matcher = requirement_type_matcher()
+    assert matcher.scores(requirements) == legacy_scores(requirements)
+    assert matcher.scan_file(args.file) == legacy_scores(requirements)
+
+    print(f"{len(requirements)} chars, {requirements.count(chr(10)) + 1} lines, {args.documents} documents")
+    results = {
+        # 旧的main()检测一次类型后又完整扫描一次打印得分
+        "str.count x2": timed(lambda: (legacy_scores(requirements), legacy_scores(requirements)),
+                              args.documents),
+        "str.count x1": timed(lambda: legacy_scores(requirements), args.documents),
+        "matcher build": timed(lambda: KeywordMatcher(REQUIREMENT_TYPE_KEYWORDS), args.documents),
+        "matcher scan": timed(lambda: matcher.scores(requirements), args.documents),
+        "matcher scan_file": timed(lambda: matcher.scan_file(args.file), args.documents),
+    }
+    keywords = extended_keywords(requirements, args.extra)
+    extended = KeywordMatcher(keywords)
+    assert extended.scores(requirements) == legacy_scores(requirements, keywords)
+    count = sum(len(weights) for weights in keywords.values())
+    results[f"str.count, {count} kw"] = timed(lambda: legacy_scores(requirements, keywords), args.documents)
+    results[f"matcher, {count} kw"] = timed(lambda: extended.scores(requirements), args.documents)
+
+    print(f"{'variant':<20} {'total s':>8} {'per doc ms':>11}")
+    for name, elapsed in results.items():
+        print(f"{name:<20} {elapsed:>8.3f} {elapsed * 1000 / args.documents:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+响应解析吞吐量基准测试
+在数MB的合成LLM响应上对比旧的正则提取方式与线性扫描提取/修复方式
+
+用法:
+    python benchmarks/bench_parse.py [--sizes 1 4 16] [--repeat 3]
+
+每种规模会生成三类响应：
+    clean      - <think>推理块 + 格式正确的JSON
+    trailing   - JSON中带有尾随逗号
+    truncated  - JSON在最后一个测试用例中间被截断
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.json_repair import extract_test_case_dicts
+
+
+def make_case(index: int) -> dict:
+    """生成一个合成测试用例"""
+    return {
+        "module": "营销活动模块",
+        "title": f"活动叠加规则校验-{index} {{边界}} \"满减\"",
+        "priority": "高",
+        "preconditions": ["系统正常运行", "已配置满减活动"],
+        "steps": [
+            {"step_number": step, "description": f"执行第{step}步操作，输入[金额]", "expected_result": "系统正确计算优惠金额"}
+            for step in range(1, 4)
+        ]
+    }
+
+
+def make_response(megabytes: float, variant: str) -> (str, int):
+    """
+    生成指定大小的合成响应：一半为<think>推理内容，一半为测试用例JSON
+
+    Returns:
+        (str, int): 响应文本和其中完整测试用例的数量
+    """
+    target = int(megabytes * 1024 * 1024)
+    think = "<think>" + ("需要考虑满减{叠加}与互斥规则。" * (target // 2 // 40)) + "</think>\n"
+    case_size = len(json.dumps(make_case(0), ensure_ascii=False))
+    count = max(1, (target // 2) // case_size)
+    cases = [make_case(i) for i in range(count)]
+    body = json.dumps({"test_cases": cases}, ensure_ascii=False, indent=2)
+    if variant == "trailing":
+        body = body.replace('"\n        }', '",\n        }')
+    elif variant == "truncated":
+        body = body[:len(body) - case_size // 2]
+        count -= 1
+    return think + "```json\n" + body + "\n```", count
+
+
+def legacy_extract(response: str) -> list:
+    """旧实现：正则移除<think>、贪婪匹配JSON、正则移除尾随逗号"""
+    response = re.sub(r'<think>[\s\S]*?</think>', '', response)
+    json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        json_match = re.search(r'\{[\s\S]*\}', response)
+        if not json_match:
+            return []
+        json_str = json_match.group(0)
+    json_str = re.sub(r',\s*([}\]])', r'\1', json_str)
+    try:
+        return json.loads(json_str).get("test_cases", [])
+    except json.JSONDecodeError:
+        return []
+
+
+def measure(func, response: str, repeat: int) -> (float, int):
+    """多次运行取最快的一次"""
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(response)
+        best = min(best, time.perf_counter() - start)
+    return best, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应解析吞吐量基准测试")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="响应大小(MB)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'variant':<10} {'expected':>8} "
+          f"{'legacy MB/s':>12} {'cases':>6} {'scanner MB/s':>13} {'cases':>6}")
+    for size in args.sizes:
+        for variant in ("clean", "trailing", "truncated"):
+            response, expected = make_response(size, variant)
+            mb = len(response.encode("utf-8")) / (1024 * 1024)
+            legacy_time, legacy_cases = measure(legacy_extract, response, args.repeat)
+            scanner_time, scanner_cases = measure(
+                lambda text: extract_test_case_dicts(text)[0], response, args.repeat)
+            print(f"{size:>5}M {variant:<10} {expected:>8} "
+                  f"{mb / legacy_time:>12.1f} {legacy_cases:>6} "
+                  f"{mb / scanner_time:>13.1f} {scanner_cases:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+生成流程基准测试
+在本地启动一个模拟Ollama /api/chat 接口的桩服务，按提示词令牌数模拟预填充耗时、按输出令牌数
+模拟解码耗时，另加每个请求的固定开销；对比两步生成（先分析需求，再基于分析结果生成）与单次生成（一次请求同时输出
+分析结果和测试用例）在整篇文档和按章节拆分两种模式下的请求数、令牌数、总耗时和覆盖率
+
+用法:
+    python benchmarks/bench_pipeline.py [--file docs/requirements.txt] [--request-ms 300] [--token-ms 2] [--prefill-ms 0.3]
+
+桩服务把需求文本中的编号标题作为测试点，为每个测试点生成--cases-per-point个用例；
+两步生成时只能看到分析结果中的测试点，单次生成时直接看到需求文本，两种流程看到的测试点相同，
+覆盖率的差异只来自截断和续写。覆盖率为最终用例覆盖的测试点占文档全部测试点的比例
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from aiohttp import web
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.core.chunker import _parse_heading
+from src.core.llm_engine import LLMEngine
+from src.core.prompt_compactor import compact_requirements
+from src.core.test_generator import TestGenerator
+from src.utils.json_repair import extract_json_object
+from src.utils.text_utils import estimate_tokens
+
+
+# 同一测试点下各用例的场景，内容差异足够大，不会被近似去重合并
+SCENARIOS = [
+    ("正常配置下的结算结果", "配置单个活动并扫描满足门槛的商品", "优惠金额与规则说明一致"),
+    ("活动时段边界", "在活动开始和结束的临界时刻提交订单", "时段外的订单不享受优惠"),
+    ("金额门槛边界", "订单金额分别为门槛减一分、等于门槛和超过门槛", "只有达到门槛的订单命中活动"),
+    ("互斥活动同时命中", "同时配置互斥的两个活动后结算", "只按优先级应用其中一个活动"),
+]
+
+
+def heading_points(text: str) -> list:
+    """需求文本中的编号标题，作为测试点；章节文本开头的标题路径只取最后一级"""
+    points = []
+    for line in text.splitlines():
+        point = re.sub(r"\s*\(\d+/\d+\)$", "", line.strip().split(" > ")[-1])
+        if _parse_heading(point, False) and point not in points:
+            points.append(point)
+    return points
+
+
+def fake_case(point: str, number: int) -> dict:
+    """为测试点构造一个测试用例，标题中带有测试点以便统计覆盖率"""
+    scenario, action, expected = SCENARIOS[number % len(SCENARIOS)]
+    return {
+        "module": "营销活动",
+        "title": f"【{point}】{scenario}",
+        "priority": "中",
+        "preconditions": ["已配置满减、折扣和赠品活动", "收银台已登录"],
+        "steps": [
+            {"step_number": 1, "description": f"按{point}准备活动和商品数据", "expected_result": "数据准备完成"},
+            {"step_number": 2, "description": action, "expected_result": expected}
+        ]
+    }
+
+
+def fake_analysis(points: list) -> dict:
+    """构造需求分析结果"""
+    return {
+        "test_points": points,
+        "business_rules": [f"{point}需要满足规则说明中的叠加和互斥约束" for point in points],
+        "edge_cases": [f"{point}在活动时段边界和金额门槛边界上的处理" for point in points]
+    }
+
+
+class StubModel:
+    """
+    模拟的Ollama服务
+    同一时刻最多解码parallel个请求，其余请求排队
+    """
+
+    def __init__(self, request_ms: float, token_ms: float, prefill_ms: float, parallel: int,
+                 cases_per_point: int):
+        self.request_ms = request_ms
+        self.token_ms = token_ms
+        self.prefill_ms = prefill_ms
+        self.semaphore = asyncio.Semaphore(parallel)
+        self.cases_per_point = cases_per_point
+        self.requests = self.prompt_tokens = self.output_tokens = 0
+
+    def respond(self, system_prompt: str, prompt: str, schema: dict = None) -> str:
+        if "测试需求分析师" in system_prompt:
+            return json.dumps({"analysis": fake_analysis(heading_points(prompt))}, ensure_ascii=False)
+        done = re.search(r"在第(\d+)个测试用例之后被截断", prompt)
+        if "写入analysis字段" in prompt:
+            points = heading_points(prompt)
+            # 续写请求按提示只输出剩余的测试用例；带format时由Schema决定，必填的analysis必须重新输出
+            with_analysis = "analysis" in schema.get("properties", {}) if schema else not done
+            result = {"analysis": fake_analysis(points)} if with_analysis else {}
+        else:
+            analysis = extract_json_object(prompt) or {}
+            points = analysis.get("analysis", analysis).get("test_points", [])
+            result = {}
+        cases = [fake_case(point, number) for point in points for number in range(self.cases_per_point)]
+        result["test_cases"] = cases[int(done.group(1)) if done else 0:]
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        system_prompt, prompt = (message["content"] for message in data["messages"])
+        response = self.respond(system_prompt, prompt, data.get("format"))
+        limit = data["options"]["num_predict"]
+        done_reason = "stop"
+        # 按令牌上限截断输出
+        if estimate_tokens(response) > limit:
+            done_reason = "length"
+            low, high = 0, len(response)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate_tokens(response[:middle]) <= limit:
+                    low = middle
+                else:
+                    high = middle - 1
+            response = response[:low]
+        prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+        output_tokens = estimate_tokens(response)
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.output_tokens += output_tokens
+        async with self.semaphore:
+            await asyncio.sleep((self.request_ms + prompt_tokens * self.prefill_ms + output_tokens * self.token_ms) / 1000)
+        return web.json_response({"message": {"role": "assistant", "content": response},
+                                  "done": True, "done_reason": done_reason})
+
+
+async def run_pipeline(api_base: str, model: StubModel, pipeline: str, mode: str, requirements: str) -> dict:
+    """以指定流程和模式生成一次，返回请求数、令牌数、耗时、用例数和覆盖率"""
+    model.requests = model.prompt_tokens = model.output_tokens = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            engine.fallback_models = []
+            generator = TestGenerator(engine, mode=mode, compaction=True, fanout="off", pipeline=pipeline)
+            start = time.perf_counter()
+            test_cases = await generator.generate_test_cases(requirements)
+            elapsed = time.perf_counter() - start
+            continuations = engine.continuation_requests
+    points = heading_points(compact_requirements(requirements).text)
+    covered = {point for point in points for test_case in test_cases if f"【{point}】" in test_case.title}
+    return {"elapsed": elapsed, "requests": model.requests, "continuations": continuations,
+            "prompt": model.prompt_tokens, "output": model.output_tokens, "cases": len(test_cases),
+            "coverage": len(covered) / len(points) if points else 0.0}
+
+
+async def main_async(args):
+    with open(args.file, "r", encoding="utf-8") as f:
+        requirements = f.read()
+    model = StubModel(args.request_ms, args.token_ms, args.prefill_ms, args.parallel, args.cases_per_point)
+    app = web.Application()
+    app.router.add_post("/api/chat", model.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    api_base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        print(f"request overhead {args.request_ms} ms, decode {args.token_ms} ms/token, prefill {args.prefill_ms} ms/token, "
+              f"server parallelism {args.parallel}, {args.cases_per_point} cases per test point")
+        print(f"{'mode':<8} {'pipeline':<9} {'wall s':>7} {'requests':>9} {'continued':>10} "
+              f"{'prompt tok':>11} {'output tok':>11} {'cases':>6} {'coverage':>9}")
+        for mode in ("single", "chunked"):
+            for pipeline in ("two_step", "fast"):
+                result = await run_pipeline(api_base, model, pipeline, mode, requirements)
+                print(f"{mode:<8} {pipeline:<9} {result['elapsed']:>7.2f} {result['requests']:>9} "
+                      f"{result['continuations']:>10} {result['prompt']:>11} {result['output']:>11} "
+                      f"{result['cases']:>6} {result['coverage']:>9.0%}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成流程基准测试")
+    parser.add_argument("--file", default=os.path.join(ROOT_DIR, "docs", "requirements.txt"), help="需求文档")
+    parser.add_argument("--request-ms", type=float, default=300.0, help="每个请求的固定开销，如排队和调度(毫秒)")
+    parser.add_argument("--token-ms", type=float, default=2.0, help="每个输出令牌的模拟解码耗时(毫秒)")
+    parser.add_argument("--prefill-ms", type=float, default=0.3, help="每个提示词令牌的模拟预填充耗时(毫秒)")
+    parser.add_argument("--parallel", type=int, default=4, help="桩服务同时解码的请求数")
+    parser.add_argument("--cases-per-point", type=int, default=2, help="每个测试点生成的用例数")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
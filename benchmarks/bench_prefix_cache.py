@@ -0,0 +1,170 @@
+"""
+提示词前缀缓存基准测试
+在本地启动一个模拟Ollama /api/chat 接口的桩服务：每个并发槽位保留上一次请求的KV缓存，
+新请求分配到与缓存公共前缀最长的空闲槽位，只预填充公共前缀之后的令牌，并像Ollama一样
+在prompt_eval_count中返回实际预填充的令牌数
+
+对一个需求文档按测试类型分片生成（一次需求分析加每种测试类型一个分片），对比：
+    cold     每次请求都完整预填充（模型被卸载或缓存被其他请求挤掉）
+    legacy   分片说明放在系统提示词末尾，分片之间只共享系统提示词中分片说明之前的部分
+    shared   分片说明放在用户提示词末尾，分片之间共享完整的系统提示词和分析结果
+
+用法:
+    python benchmarks/bench_prefix_cache.py [--file docs/requirements.txt] [--prefill-ms 0.5] [--parallel 4]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import List
+
+from aiohttp import web
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.core.llm_engine import LLMEngine
+from src.core.test_generator import GenerationSlice, TestGenerator
+from src.utils.text_utils import estimate_tokens
+
+# 模拟的需求分析结果中的测试点数
+TEST_POINTS = 14
+
+
+class LegacyLayoutGenerator(TestGenerator):
+    """按旧的提示词布局拆分分片：分片说明位于系统提示词末尾，用户提示词只有分析结果"""
+
+    def _fanout_slices(self, analysis: str, requirement_type: str = None) -> List[GenerationSlice]:
+        slices = super()._fanout_slices(analysis, requirement_type)
+        return [
+            GenerationSlice(name=generation_slice.name, prompt=str(analysis),
+                            system_prompt=generation_slice.system_prompt
+                            + generation_slice.prompt[len(str(analysis)):])
+            for generation_slice in slices
+        ]
+
+
+class StubModel:
+    """
+    模拟的Ollama服务
+    预填充耗时与未命中缓存的令牌数成正比，生成固定的少量测试用例
+    """
+
+    def __init__(self, prefill_ms: float, parallel: int):
+        self.prefill_ms = prefill_ms
+        self.slots: List[str] = [""] * parallel
+        self.free = asyncio.Condition()
+        self.busy = [False] * parallel
+        self.cache_enabled = True
+        self.calls = []
+
+    def respond(self, system_prompt: str) -> str:
+        if "测试需求分析师" in system_prompt:
+            points = [f"测试点{index}：{'促销规则' * 8}" for index in range(1, TEST_POINTS + 1)]
+            return json.dumps({"analysis": {"test_points": points, "business_rules": ["规则1"],
+                                            "edge_cases": ["边界条件1"]}}, ensure_ascii=False)
+        cases = [{"title": f"用例{index}", "priority": "中", "preconditions": [],
+                  "steps": [{"step_number": 1, "description": "操作", "expected_result": "结果"}]}
+                 for index in range(3)]
+        return json.dumps({"test_cases": cases}, ensure_ascii=False)
+
+    async def acquire(self, rendered: str) -> int:
+        """等待空闲槽位，选择与缓存公共前缀最长的一个"""
+        async with self.free:
+            await self.free.wait_for(lambda: not all(self.busy))
+            candidates = [index for index, busy in enumerate(self.busy) if not busy]
+            slot = max(candidates, key=lambda index: len(os.path.commonprefix([self.slots[index], rendered])))
+            self.busy[slot] = True
+            return slot
+
+    async def release(self, slot: int):
+        async with self.free:
+            self.busy[slot] = False
+            self.free.notify()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        messages = data["messages"]
+        # 与聊天模板一样，系统消息在前，用户消息在后
+        rendered = "".join(f"<|{message['role']}|>{message['content']}" for message in messages)
+        slot = await self.acquire(rendered)
+        try:
+            cached = os.path.commonprefix([self.slots[slot], rendered]) if self.cache_enabled else ""
+            prefill = estimate_tokens(rendered) - estimate_tokens(cached)
+            await asyncio.sleep(prefill * self.prefill_ms / 1000)
+            self.slots[slot] = rendered
+        finally:
+            await self.release(slot)
+        self.calls.append((estimate_tokens(rendered), prefill))
+        return web.json_response({
+            "message": {"role": "assistant", "content": self.respond(messages[0]["content"])},
+            "done": True, "done_reason": "stop",
+            "prompt_eval_count": prefill, "prompt_eval_duration": int(prefill * self.prefill_ms * 1e6)
+        })
+
+
+async def run_layout(api_base: str, model: StubModel, layout: str, requirements: str) -> dict:
+    """以指定布局分片生成一次，返回请求数、提示词令牌数、预填充令牌数（总数和分片平均）和耗时"""
+    model.slots = [""] * len(model.slots)
+    model.cache_enabled = layout != "cold"
+    model.calls = []
+    generator_class = LegacyLayoutGenerator if layout == "legacy" else TestGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            engine.fallback_models = []
+            generator = generator_class(engine, mode="single", compaction=True, fanout="category")
+            start = time.perf_counter()
+            await generator.generate_test_cases(requirements)
+            elapsed = time.perf_counter() - start
+            prefill_seconds = engine.prefill_seconds
+    # 第一个请求是需求分析，其余为分片
+    slices = model.calls[1:]
+    return {"calls": len(model.calls), "prompt": sum(call[0] for call in model.calls),
+            "prefill": sum(call[1] for call in model.calls), "prefill_seconds": prefill_seconds,
+            "slice_prompt": sum(call[0] for call in slices) / len(slices),
+            "slice_prefill": sum(call[1] for call in slices) / len(slices), "elapsed": elapsed}
+
+
+async def main_async(args):
+    with open(args.file, "r", encoding="utf-8") as f:
+        requirements = f.read()
+    model = StubModel(args.prefill_ms, args.parallel)
+    app = web.Application()
+    app.router.add_post("/api/chat", model.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    api_base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        print(f"prefill {args.prefill_ms} ms/token, server parallelism {args.parallel}")
+        print(f"{'layout':<8} {'calls':>6} {'prompt tok':>11} {'prefill tok':>12} {'prefill s':>10} "
+              f"{'slice prompt':>13} {'slice prefill':>14} {'wall s':>7}")
+        for layout in ("cold", "legacy", "shared"):
+            result = await run_layout(api_base, model, layout, requirements)
+            print(f"{layout:<8} {result['calls']:>6} {result['prompt']:>11} {result['prefill']:>12} "
+                  f"{result['prefill_seconds']:>10.2f} {result['slice_prompt']:>13.0f} "
+                  f"{result['slice_prefill']:>14.0f} {result['elapsed']:>7.2f}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示词前缀缓存基准测试")
+    parser.add_argument("--file", default=os.path.join(ROOT_DIR, "docs", "requirements.txt"), help="需求文档")
+    parser.add_argument("--prefill-ms", type=float, default=0.5, help="每个提示词令牌的模拟预填充耗时(毫秒)")
+    parser.add_argument("--parallel", type=int, default=4, help="桩服务的并发槽位数")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+提示词压缩基准测试
+统计需求文档压缩前后的令牌估算、字符数和行数，逐步累加各个压缩阶段以显示每一步节省的令牌，
+并对比按章节拆分时的章节数和令牌总数，以及压缩本身的耗时
+
+用法:
+    python benchmarks/bench_prompt_compaction.py [--file docs/requirements.txt ...] [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.config import CHUNK_MAX_TOKENS
+from src.core.chunker import pack_sections, split_sections
+from src.core.prompt_compactor import (
+    compact_requirements, drop_sections, normalize_lines, rebuild_tables, remove_boilerplate
+)
+from src.utils.text_utils import estimate_tokens
+
+
+def stage_tokens(text: str) -> list:
+    """逐步应用各个压缩阶段，返回每个阶段之后的(阶段名, 令牌估算, 行数)"""
+    lines = normalize_lines(text)
+    stages = [("original", estimate_tokens(text), text.count("\n") + 1),
+              ("whitespace", estimate_tokens("\n".join(lines)), len(lines))]
+    for name, stage in (("sections", drop_sections), ("boilerplate", remove_boilerplate),
+                        ("tables", rebuild_tables)):
+        lines = stage(lines)[0]
+        stages.append((name, estimate_tokens("\n".join(lines)), len(lines)))
+    return stages
+
+
+def chunk_stats(text: str) -> tuple:
+    """按章节拆分并合并为块后的(块数, 令牌总数)"""
+    chunks = pack_sections(split_sections(text, CHUNK_MAX_TOKENS), CHUNK_MAX_TOKENS)
+    return len(chunks), sum(chunk.tokens for chunk in chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提示词压缩基准测试")
+    parser.add_argument("--file", nargs="+", default=[os.path.join(ROOT_DIR, "docs", "requirements.txt")],
+                        help="需求文档")
+    parser.add_argument("--repeat", type=int, default=50, help="测量压缩耗时的重复次数")
+    args = parser.parse_args()
+
+    for path in args.file:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        result = compact_requirements(text)
+        print(f"\n{os.path.basename(path)}: {len(text)} -> {len(result.text)} chars, "
+              f"{result.tokens_before} -> {result.tokens_after} tokens (-{result.saved_ratio:.1%})")
+        print(f"dropped sections: {', '.join(result.dropped_sections) or '-'}; "
+              f"boilerplate lines: {result.boilerplate_lines}; tables rebuilt: {result.tables}")
+
+        print(f"{'stage':<12} {'tokens':>7} {'saved':>6} {'lines':>6}")
+        previous = None
+        for name, tokens, lines in stage_tokens(text):
+            saved = "" if previous is None else str(previous - tokens)
+            print(f"{name:<12} {tokens:>7} {saved:>6} {lines:>6}")
+            previous = tokens
+
+        before, after = chunk_stats(text), chunk_stats(result.text)
+        print(f"chunks at CHUNK_MAX_TOKENS={CHUNK_MAX_TOKENS}: {before[0]} -> {after[0]}, "
+              f"chunk tokens {before[1]} -> {after[1]}")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            compact_requirements(text)
+        print(f"compaction time: {(time.perf_counter() - start) * 1000 / args.repeat:.2f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
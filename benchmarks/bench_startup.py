@@ -0,0 +1,98 @@
+"""
+启动耗时基准测试
+在全新的子进程中用 python -X importtime 统计各种启动场景的模块导入总耗时，并测量进程的总运行时间，
+导入耗时超过预算、或只导入模块时就加载了.env文件时以非零状态码退出，可以放在脚本或CI中检查启动性能是否退化
+
+用法:
+    python benchmarks/bench_startup.py [--repeat 5] [--budget-scale 1.0]
+
+每个场景取多次运行的中位数；预算是在单核开发机上测得的耗时留出余量后的值，
+机器较慢时可以用--budget-scale整体放宽
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 场景名称、命令行参数、导入耗时预算(毫秒)
+SCENARIOS = [
+    ("cli --help", ["src/main.py", "--help"], 60),
+    ("import config", ["-c", "import src.config"], 25),
+    ("read config", ["-c", "from src.config import MODEL"], 80),
+    ("test generator", ["-c", "from src.core.test_generator import TestGenerator"], 250),
+    ("import engine", ["-c", "import src.core.llm_engine"], 240),
+    ("llm engine", ["-c", "from src.core.llm_engine import LLMEngine; LLMEngine()"], 250),
+    ("xmind exporter", ["-c", "from src.exporters.pipeline import default_exporters; "
+                              "default_exporters(formats=['xmind'])"], 280),
+    ("excel exporter", ["-c", "from src.exporters.pipeline import default_exporters; "
+                              "default_exporters(formats=['excel'])"], 600),
+]
+# 只导入模块、不读取配置的场景，不应导入dotenv（.env文件在第一次读取配置时才加载）
+IMPORT_ONLY = {"import config", "test generator", "import engine"}
+
+
+def import_time(args) -> (float, float, list):
+    """
+    运行一次场景
+
+    Returns:
+        (float, float, list, bool): 顶层模块导入耗时之和(毫秒)、进程总耗时(毫秒)、最慢的几个顶层模块、
+            是否导入了dotenv
+    """
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT_DIR,
+                               capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+    modules = []
+    loaded_dotenv = False
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        loaded_dotenv = loaded_dotenv or name.strip() == "dotenv"
+        # 只统计顶层导入，嵌套导入已包含在其累计耗时中
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in modules), elapsed, sorted(modules, reverse=True)[:3], loaded_dotenv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景的运行次数")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="预算的放宽倍数")
+    args = parser.parse_args()
+
+    over_budget = []
+    loaded_env = []
+    print(f"{'scenario':<16} {'import ms':>10} {'budget':>7} {'wall ms':>8}  slowest imports")
+    for name, command, budget in SCENARIOS:
+        runs = [import_time(command) for _ in range(args.repeat)]
+        imports = statistics.median(run[0] for run in runs)
+        wall = statistics.median(run[1] for run in runs)
+        slowest = ", ".join(f"{module} {ms:.0f}" for ms, module in runs[-1][2])
+        budget *= args.budget_scale
+        flag = "" if imports <= budget else "  OVER BUDGET"
+        if name in IMPORT_ONLY and any(run[3] for run in runs):
+            flag += "  LOADED .env"
+            loaded_env.append(name)
+        print(f"{name:<16} {imports:>10.1f} {budget:>7.0f} {wall:>8.1f}  {slowest}{flag}")
+        if imports > budget:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"Import time over budget: {', '.join(over_budget)}")
+    if loaded_env:
+        print(f"Import-time .env loading: {', '.join(loaded_env)}")
+    if over_budget or loaded_env:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
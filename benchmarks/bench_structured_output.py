@@ -0,0 +1,169 @@
+"""
+结构化输出基准测试
+在本地启动一个模拟Ollama /api/chat 接口的桩服务，对比只靠提示词要求JSON格式与
+通过format参数发送JSON Schema两种方式下，生成响应的解析方式分布、解析失败率和解析耗时
+
+用法:
+    python benchmarks/bench_structured_output.py [--documents 50] [--repeat 20]
+
+请求不带format时，桩服务按固定比例模拟本地模型常见的输出问题：
+    clean          格式正确的JSON                        35%
+    fenced         前后有说明文字，JSON位于```json代码块中   20%
+    think          <think>推理块 + JSON                   15%
+    trailing       JSON中带有尾随逗号                      10%
+    prose_braces   JSON之前的说明文字中含有花括号            5%
+    missing_comma  用例对象之间缺少逗号                      5%
+    refusal        只有说明文字，没有JSON                   10%
+请求带format时桩服务只输出符合Schema的JSON，与Ollama按Schema约束解码的结果一致；
+失败率的基线取决于上述比例，基准测试主要验证约束输出都走快速路径以及解析耗时的差异
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from aiohttp import web
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.core.llm_engine import LLMEngine
+from src.core.test_generator import TestGenerator
+from src.utils.json_repair import extract_test_case_dicts
+
+VARIANTS = [("clean", 35), ("fenced", 20), ("think", 15), ("trailing", 10),
+            ("prose_braces", 5), ("missing_comma", 5), ("refusal", 10)]
+# 每个响应中的测试用例数
+CASES_PER_RESPONSE = 20
+
+
+def fake_cases(rng: random.Random) -> list:
+    """构造一组测试用例"""
+    return [{
+        "module": "营销活动",
+        "title": f"满减活动叠加规则校验{rng.randint(1, 10 ** 6)}",
+        "priority": rng.choice(["高", "中", "低"]),
+        "preconditions": ["已配置满减活动", "收银台已登录"],
+        "steps": [
+            {"step_number": step, "description": f"执行第{step}步操作，输入订单金额",
+             "expected_result": "系统正确计算优惠金额"}
+            for step in range(1, 4)
+        ]
+    } for _ in range(CASES_PER_RESPONSE)]
+
+
+def noisy_response(rng: random.Random, variant: str) -> str:
+    """按指定的问题类型构造不受约束时的模型输出"""
+    body = json.dumps({"test_cases": fake_cases(rng)}, ensure_ascii=False, indent=2)
+    if variant == "fenced":
+        return f"好的，以下是根据需求生成的测试用例：\n```json\n{body}\n```\n以上用例覆盖了主要场景。"
+    if variant == "think":
+        return f"<think>需要覆盖满减、折扣和赠品的叠加规则。</think>\n{body}"
+    if variant == "trailing":
+        return body.replace('"\n        }', '",\n        }')
+    if variant == "prose_braces":
+        return f"输出格式为{{\"test_cases\": [...]}}，共{CASES_PER_RESPONSE}个用例：\n{body}"
+    if variant == "missing_comma":
+        return body.replace("},\n    {", "}\n    {")
+    if variant == "refusal":
+        return "抱歉，需求描述不够完整，请补充满减活动的具体规则后再生成测试用例。"
+    return body
+
+
+class StubModel:
+    """
+    模拟的Ollama服务
+    需求分析请求返回固定的分析结果；生成请求带format时输出符合Schema的JSON，否则按比例输出各类问题
+    """
+
+    def __init__(self):
+        self.variants = Counter()
+        self.responses = []
+
+    def respond(self, data: dict) -> str:
+        system_prompt, prompt = (message["content"] for message in data["messages"])
+        if "测试需求分析师" in system_prompt:
+            return json.dumps({"analysis": {"test_points": [prompt], "business_rules": ["规则1"],
+                                            "edge_cases": ["边界条件1"]}}, ensure_ascii=False)
+        rng = random.Random(prompt)
+        if "format" in data:
+            response = json.dumps({"test_cases": fake_cases(rng)}, ensure_ascii=False)
+        else:
+            variant = rng.choices([name for name, _ in VARIANTS], [weight for _, weight in VARIANTS])[0]
+            self.variants[variant] += 1
+            response = noisy_response(rng, variant)
+        self.responses.append(response)
+        return response
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        return web.json_response({"message": {"role": "assistant", "content": self.respond(data)},
+                                  "done": True, "done_reason": "stop"})
+
+
+async def run_mode(api_base: str, model: StubModel, structured: bool, documents: int) -> TestGenerator:
+    """以指定方式依次生成多个文档，返回生成器（其中记录了各解析方式的响应数）"""
+    model.variants.clear()
+    model.responses = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with LLMEngine(use_cache=False) as engine:
+            engine.use_remote_api = False
+            engine.api_base = api_base
+            engine.fallback_models = []
+            generator = TestGenerator(engine, mode="single", compaction=False, fanout="off",
+                                      structured_output=structured)
+            for index in range(documents):
+                await generator.generate_test_cases(f"需求文档{index}：满减活动与折扣活动的叠加规则")
+    return generator
+
+
+def parse_time(responses: list, structured: bool, repeat: int) -> float:
+    """解析全部响应的平均耗时(毫秒/响应)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for response in responses:
+            extract_test_case_dicts(response, structured)
+    return (time.perf_counter() - start) * 1000 / repeat / len(responses)
+
+
+async def main_async(args):
+    model = StubModel()
+    app = web.Application()
+    app.router.add_post("/api/chat", model.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    api_base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        print(f"{args.documents} documents, {CASES_PER_RESPONSE} cases per response")
+        print(f"{'mode':<12} {'failure rate':>13} {'parse ms':>9}  parse methods")
+        for name, structured in (("prompt-only", False), ("structured", True)):
+            generator = await run_mode(api_base, model, structured, args.documents)
+            milliseconds = parse_time(model.responses, structured, args.repeat)
+            print(f"{name:<12} {generator.parse_failure_rate():>13.1%} {milliseconds:>9.3f}  "
+                  f"{dict(generator.parse_methods)}")
+            if model.variants:
+                print(f"{'':<12} unconstrained output: {dict(model.variants)}")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结构化输出基准测试")
+    parser.add_argument("--documents", type=int, default=50, help="生成的文档数，每个文档一个生成响应")
+    parser.add_argument("--repeat", type=int, default=20, help="测量解析耗时的重复次数")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
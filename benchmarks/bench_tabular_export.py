@@ -0,0 +1,90 @@
+"""
+表格导出基准测试
+对比JSONL、CSV、Parquet与Excel导出的耗时、峰值内存和输出大小，
+以及在已有导出结果后追加1000个用例的耗时（Excel只能整体重写）
+
+用法:
+    python benchmarks/bench_tabular_export.py [--cases 50000]
+
+未安装pyarrow（或pyarrow无法导入）时跳过Parquet
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.exporters import excel_exporter, tabular_exporter
+from src.exporters.excel_exporter import ExcelExporter
+from src.exporters.tabular_exporter import TABULAR_EXPORTERS, read_test_cases
+from bench_excel_export import make_cases
+
+APPEND_CASES = 1000
+
+
+def disk_size(path: str) -> float:
+    """文件或目录的总大小(KB)"""
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1024
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names) / 1024
+
+
+def timed(func, trace: bool = False) -> (float, float, object):
+    """运行一次函数，返回耗时(秒)、峰值内存(MB，未跟踪时为0)和返回值"""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = 0.0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表格导出基准测试")
+    parser.add_argument("--cases", type=int, default=50000, help="测试用例数量")
+    args = parser.parse_args()
+
+    try:
+        import pyarrow.parquet  # noqa: F401
+        formats = list(TABULAR_EXPORTERS)
+    except Exception as e:
+        print(f"Skipping parquet: {str(e)}")
+        formats = [name for name in TABULAR_EXPORTERS if name != "parquet"]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # 导出器写入OUTPUT_DIR，基准测试改为写入临时目录
+        excel_exporter.OUTPUT_DIR = output_dir
+        tabular_exporter.OUTPUT_DIR = output_dir
+
+        print(f"{'format':<8} {'seconds':>8} {'peak MB':>8} {'size KB':>9} {'append s':>9} {'read s':>7}")
+        excel = ExcelExporter()
+        elapsed, _, path = timed(lambda: excel.export_stream(make_cases(args.cases), "bench"))
+        _, peak, _ = timed(lambda: excel.export_stream(make_cases(args.cases), "bench"), trace=True)
+        # Excel无法追加，只能带上新增的用例整体重写
+        append, _, _ = timed(lambda: excel.export_stream(make_cases(args.cases + APPEND_CASES), "bench"))
+        print(f"{'excel':<8} {elapsed:>8.2f} {peak:>8.1f} {disk_size(path):>9.0f} {append:>9.2f} {'-':>7}")
+
+        for name in formats:
+            exporter = TABULAR_EXPORTERS[name]()
+            elapsed, _, path = timed(lambda: exporter.export(make_cases(args.cases), "bench"))
+            _, peak, _ = timed(lambda: exporter.export(make_cases(args.cases), "bench"), trace=True)
+            append, _, _ = timed(lambda: exporter.export(make_cases(APPEND_CASES), "bench", append=True))
+            read, _, count = timed(lambda: sum(1 for _ in read_test_cases(path)))
+            assert count == args.cases + APPEND_CASES
+            print(f"{name:<8} {elapsed:>8.2f} {peak:>8.1f} {disk_size(path):>9.0f} {append:>9.2f} {read:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
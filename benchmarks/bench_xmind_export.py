@@ -0,0 +1,74 @@
+"""
+XMind导出基准测试
+对比在内存中构建完整思维导图再写出缩进JSON的export()与流式写入.xmind压缩包的export_xmind()
+的耗时、峰值内存和输出文件大小
+
+用法:
+    python benchmarks/bench_xmind_export.py [--cases 50000]
+
+峰值内存使用tracemalloc统计Python分配的内存，与计时分开运行，避免影响耗时结果
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# 将项目根目录添加到Python路径
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+
+from src.exporters import xmind_exporter
+from src.exporters.xmind_exporter import XMindExporter
+from bench_excel_export import make_cases
+
+
+def run(func, count: int, trace: bool) -> (float, float, str):
+    """
+    运行一次导出
+
+    Returns:
+        (float, float, str): 耗时(秒)、峰值内存(MB，未跟踪时为0)和输出文件路径
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    path = func(count)
+    elapsed = time.perf_counter() - start
+    peak = 0.0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return elapsed, peak, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XMind导出基准测试")
+    parser.add_argument("--cases", type=int, nargs="+", default=[50000], help="测试用例数量")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        # 导出器写入OUTPUT_DIR，基准测试改为写入临时目录
+        xmind_exporter.OUTPUT_DIR = output_dir
+        exporter = XMindExporter()
+        variants = {
+            # export()需要完整的用例列表
+            "json (indent=2)": lambda count: exporter.export(list(make_cases(count)), "legacy.json"),
+            "xmind (pretty)": lambda count: exporter.export_xmind(make_cases(count), "pretty", compact=False),
+            "xmind (compact)": lambda count: exporter.export_xmind(make_cases(count), "compact", compact=True),
+        }
+
+        print(f"{'cases':>7} {'variant':<17} {'seconds':>8} {'peak MB':>8} {'size KB':>9}")
+        for count in args.cases:
+            for name, func in variants.items():
+                elapsed, _, path = run(func, count, trace=False)
+                _, peak, _ = run(func, count, trace=True)
+                size = os.path.getsize(path) / 1024
+                print(f"{count:>7} {name:<17} {elapsed:>8.2f} {peak:>8.1f} {size:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,20 @@
 """
 全局配置文件
 包含所有系统级别的配置参数，如API密钥、模型参数、输出配置等
-"""
-
-import os
-from dotenv import load_dotenv
 
-# 加载环境变量配置
-load_dotenv()
+不依赖环境变量的配置直接定义为模块常量；依赖环境变量的配置由惰性解析的settings对象提供，
+第一次读取其中任一配置项时才加载.env文件，每个配置项在首次读取时解析一次并缓存。
+导入本模块不会读取文件、打印或创建目录
 
-# API 配置
-# 从环境变量中获取API密钥，确保安全性
-API_KEY = os.getenv("OPENAI_API_KEY") or os.getenv("API_KEY")  # 支持多种API密钥
+其他模块在使用处读取settings.MODEL，不在导入时绑定依赖环境变量的配置；
+模块级的__getattr__仍然把 from config import MODEL 转发到settings，但这样导入会立即加载.env文件
+"""
 
-# 检查API密钥格式并处理
-if API_KEY:
-    # 确保API密钥格式正确
-    print(f"已加载API密钥: {API_KEY[:15]}...")
-else:
-    # 如果环境变量中没有找到API密钥，使用默认值进行测试
-    API_KEY = "api-sk-67d140832e0cc3-45510241"  # 默认测试密钥
-    print(f"未找到API密钥环境变量，使用默认测试密钥")
+from functools import cached_property
+import os
 
-# 模型配置
-# 使用环境变量决定接入远程API还是本地模型
-USE_REMOTE_API = os.getenv("USE_REMOTE_API", "true").lower() in ["true", "1", "yes", "y", "t"]
+# 布尔型环境变量视为真的取值
+TRUE_VALUES = ["true", "1", "yes", "y", "t"]
 
 # 远程API默认配置
 DEFAULT_REMOTE_MODEL = "gpt-3.5-turbo"  # 默认使用的远程模型
@@ -34,24 +24,18 @@ DEFAULT_REMOTE_API_BASE = "https://api.openai.com"  # 默认API基础URL
 DEFAULT_LOCAL_MODEL = "deepseek-r1:7b"  # 本地默认模型
 DEFAULT_LOCAL_API_BASE = "http://localhost:11434"  # Ollama默认端口
 
-# 根据使用远程还是本地模型选择默认值
-if USE_REMOTE_API:
-    DEFAULT_MODEL = DEFAULT_REMOTE_MODEL
-    DEFAULT_API_BASE = DEFAULT_REMOTE_API_BASE
-else:
-    DEFAULT_MODEL = DEFAULT_LOCAL_MODEL
-    DEFAULT_API_BASE = DEFAULT_LOCAL_API_BASE
-
-# 优先使用环境变量指定的值，否则使用默认值
-MODEL = os.getenv("MODEL", DEFAULT_MODEL)
-API_BASE = os.getenv("API_BASE", DEFAULT_API_BASE)
-
-# 如果需要可以尝试的备选模型列表（按优先级排序）
-FALLBACK_MODELS = ["deepseek-r1:7b", "llama2:7b", "mistral:7b", "deepseek-coder:6.7b", "mistral:latest", "llama2"]
+# 未找到API密钥环境变量时使用的默认测试密钥
+DEFAULT_API_KEY = "api-sk-67d140832e0cc3-45510241"
 
 # 重试配置
 MAX_RETRIES = 3  # 最大重试次数
-RETRY_DELAY = 1  # 重试间隔(秒)
+RETRY_DELAY = 1  # 重试间隔(秒)，作为指数退避的基础时间
+RETRY_MAX_DELAY = 30  # 单次退避的最长等待时间(秒)
+
+# 熔断器配置
+# 同一端点连续失败达到阈值后，在冷却时间内直接拒绝请求
+CIRCUIT_BREAKER_THRESHOLD = 5  # 打开熔断器所需的连续失败次数
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30  # 熔断器打开后的冷却时间(秒)
 
 # 测试用例生成配置
 # 定义测试用例优先级列表（中文）
@@ -65,7 +49,7 @@ PRIORITY_MAPPING = {
     "low": "低",
     # 中文到英文（内部使用）
     "高": "高",
-    "中": "中", 
+    "中": "中",
     "低": "低"
 }
 
@@ -76,6 +60,39 @@ LEGACY_PRIORITY_MAPPING = {
     "Low": "低"
 }
 
+# 需求类型检测配置
+# 每种需求类型的关键词及其权重，文档中关键词每出现一次（不区分大小写）该类型得分加上对应权重，
+# 得分最高的类型作为需求类型；类型按定义顺序排列，得分相同时取靠前的类型
+REQUIREMENT_TYPE_KEYWORDS = {
+    "login": {"登录": 1, "login": 1, "认证": 1, "authentication": 1, "用户名": 1, "密码": 1},
+    "register": {"注册": 1, "register": 1, "sign up": 1, "用户注册": 1},
+    "user_management": {"用户管理": 1, "user management": 1, "user profile": 1, "用户信息": 1},
+    "task_management": {"任务管理": 1, "task management": 1, "任务列表": 1, "任务创建": 1, "task list": 1},
+    "dashboard": {"仪表盘": 1, "dashboard": 1, "数据统计": 1, "报表": 1},
+    "report": {"报告": 1, "report": 1, "reporting": 1, "数据报表": 1},
+    "api": {"api": 1, "接口": 1, "interface": 1, "服务调用": 1},
+    "module": {"模块": 1, "module": 1, "组件": 1},
+    "system": {"系统": 1, "system": 1, "平台": 1},
+    "performance": {"性能": 1, "performance": 1, "负载": 1, "load": 1},
+    "security": {"安全": 1, "security": 1, "权限": 1, "permission": 1},
+    "authorization": {"授权": 1, "authorization": 1, "授权码": 1, "authorization code": 1,
+                      "密码授权": 1, "账号授权": 1, "敏感操作": 1}
+}
+
+# 测试用例类型及其说明，系统提示词要求覆盖全部类型；按类型分片生成时每种类型一个请求
+TEST_CATEGORIES = {
+    "功能测试": "验证所有核心功能是否按照需求正常工作",
+    "边界测试": "测试边界值和极限条件",
+    "异常测试": "验证系统对异常输入和环境的处理能力",
+    "性能测试": "验证系统性能指标",
+    "安全测试": "验证系统安全性能",
+    "用户体验测试": "验证系统的易用性",
+    "集成测试": "验证不同组件之间的交互"
+}
+
+# 分片生成时所有分片合计要求生成的测试用例数，平均分配到各个分片
+FANOUT_TOTAL_CASES = 60
+
 # Excel导出配置
 # 定义Excel表格的列标题
 EXCEL_TEMPLATE_HEADERS = [
@@ -98,7 +115,368 @@ TEMPERATURE = 0.1  # 降低温度使输出更加确定性
 REQUEST_TIMEOUT = 60
 
 # 文件路径配置
-# 定义输出目录，用于存放生成的Excel和XMind文件
+# 定义输出目录，用于存放生成的Excel和XMind文件，由各导出器在写入文件时创建
 OUTPUT_DIR = "output"
-# 确保输出目录存在
-os.makedirs(OUTPUT_DIR, exist_ok=True) 
\ No newline at end of file
+
+# 提示词压缩配置
+# 发送给LLM之前删除的章节标题（不区分大小写，匹配去掉编号后的完整标题）
+COMPACTION_DROP_SECTIONS = [
+    "目录", "文档修订记录", "修订记录", "修订历史", "变更记录", "文档评审记录", "评审记录", "版本计划",
+    "table of contents", "contents", "revision history", "change log", "changelog"
+]
+COMPACTION_TABLE_CELL_MAX_CHARS = 24  # 不超过该长度的短行才可能是逐格换行的表格单元格
+COMPACTION_TABLE_MIN_CELLS = 6  # 连续的单元格行达到该数量才按表格重建
+COMPACTION_BOILERPLATE_MIN_LINES = 5  # 重复版式残留片段的最少行数
+COMPACTION_BOILERPLATE_MIN_CHARS = 20  # 重复版式残留片段的最少字符数
+COMPACTION_BOILERPLATE_REPEATS = 3  # 由版式行组成的片段重复出现达到该次数时全部删除
+# 含有中文但属于版式残留的行（完全匹配），如代码块语言菜单中的选项；不含中文的行本身就视为版式行
+COMPACTION_BOILERPLATE_LINES = ["自动换行", "复制代码"]
+
+
+class Settings:
+    """
+    惰性解析的配置类
+    每个依赖环境变量的配置项都是一个缓存属性，第一次读取任一配置项时加载.env文件
+    """
+
+    def __init__(self):
+        self._env_loaded = False
+
+    def getenv(self, name: str, default: str = None) -> str:
+        """
+        读取环境变量，第一次调用时先加载.env文件（已存在的环境变量不会被覆盖）
+
+        Args:
+            name (str): 环境变量名
+            default (str, optional): 未设置时的默认值
+
+        Returns:
+            str: 环境变量的值
+        """
+        if not self._env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            self._env_loaded = True
+        return os.getenv(name, default)
+
+    def flag(self, name: str, default: str) -> bool:
+        """读取布尔型环境变量"""
+        return self.getenv(name, default).lower() in TRUE_VALUES
+
+    def names(self, name: str, default: str) -> list:
+        """读取逗号分隔的环境变量，去掉空白和空项"""
+        return [item.strip() for item in self.getenv(name, default).split(",") if item.strip()]
+
+    # API 配置
+    @cached_property
+    def API_KEY(self) -> str:
+        """从环境变量中获取API密钥（支持OPENAI_API_KEY和API_KEY），都没有时使用默认测试密钥"""
+        return self.getenv("OPENAI_API_KEY") or self.getenv("API_KEY") or DEFAULT_API_KEY
+
+    # 模型配置
+    @cached_property
+    def USE_REMOTE_API(self) -> bool:
+        """使用环境变量决定接入远程API还是本地模型"""
+        return self.flag("USE_REMOTE_API", "true")
+
+    @cached_property
+    def DEFAULT_MODEL(self) -> str:
+        """根据使用远程还是本地模型选择的默认模型"""
+        return DEFAULT_REMOTE_MODEL if self.USE_REMOTE_API else DEFAULT_LOCAL_MODEL
+
+    @cached_property
+    def DEFAULT_API_BASE(self) -> str:
+        """根据使用远程还是本地模型选择的默认API地址"""
+        return DEFAULT_REMOTE_API_BASE if self.USE_REMOTE_API else DEFAULT_LOCAL_API_BASE
+
+    @cached_property
+    def MODEL(self) -> str:
+        """优先使用环境变量指定的模型，否则使用默认值"""
+        return self.getenv("MODEL", self.DEFAULT_MODEL)
+
+    @cached_property
+    def API_BASE(self) -> str:
+        """优先使用环境变量指定的API地址，否则使用默认值"""
+        return self.getenv("API_BASE", self.DEFAULT_API_BASE)
+
+    @cached_property
+    def FALLBACK_MODELS(self) -> list:
+        """备选模型列表（按优先级排序），可通过环境变量FALLBACK_MODELS以逗号分隔的形式覆盖"""
+        return self.names("FALLBACK_MODELS",
+                          "deepseek-r1:7b,llama2:7b,mistral:7b,deepseek-coder:6.7b,mistral:latest,llama2")
+
+    # 本地模型请求配置
+    # Ollama对同一个已加载的模型复用与上一次请求相同前缀的KV缓存，系统提示词作为单独的消息放在最前面，
+    # 并让模型在批量任务期间保持加载，共享的系统提示词只需预填充一次
+    @cached_property
+    def OLLAMA_CHAT_API(self) -> bool:
+        """是否使用/api/chat以system和user消息发送请求；关闭时使用/api/generate，系统提示词拼接在用户提示词之前"""
+        return self.flag("OLLAMA_CHAT_API", "true")
+
+    @cached_property
+    def OLLAMA_KEEP_ALIVE(self):
+        """请求结束后模型保持加载的时间，如"30m"；整数表示秒数，-1表示一直保持加载"""
+        value = self.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        return int(value) if value.lstrip("-").isdigit() else value
+
+    # 结构化输出配置
+    # 生成测试用例时把由TestCase/TestStep模型导出的JSON Schema发送给模型，由解码器约束输出格式
+    @cached_property
+    def STRUCTURED_OUTPUT(self) -> bool:
+        """是否在本地模型请求中使用format参数约束测试用例的JSON格式"""
+        return self.flag("STRUCTURED_OUTPUT", "true")
+
+    # 对冲请求配置
+    # 启用后，首选请求在HEDGE_DELAY秒内未返回时，向备选模型或备用端点发送相同的请求，
+    # 采用最先返回且校验通过的响应，并取消其余请求
+    @cached_property
+    def HEDGE_ENABLED(self) -> bool:
+        """是否启用对冲请求"""
+        return self.flag("HEDGE_ENABLED", "false")
+
+    @cached_property
+    def HEDGE_DELAY(self) -> float:
+        """发送对冲请求前的等待时间(秒)，0表示同时发送"""
+        return float(self.getenv("HEDGE_DELAY", "15"))
+
+    @cached_property
+    def HEDGE_MODELS(self) -> list:
+        """对冲使用的模型，逗号分隔；为空时使用FALLBACK_MODELS中第一个与首选模型不同的模型"""
+        return self.names("HEDGE_MODELS", "")
+
+    @cached_property
+    def HEDGE_API_BASE(self) -> str:
+        """备用端点，为空时不向其他端点对冲"""
+        return self.getenv("HEDGE_API_BASE", "")
+
+    # 截断续写配置
+    # 响应达到num_predict上限被截断时，保留已完整生成的测试用例，请求模型从最后一个完整用例之后继续生成
+    @cached_property
+    def CONTINUATION_ENABLED(self) -> bool:
+        """是否续写被截断的测试用例响应"""
+        return self.flag("CONTINUATION_ENABLED", "true")
+
+    @cached_property
+    def CONTINUATION_MAX_ROUNDS(self) -> int:
+        """每个响应最多续写的次数"""
+        return int(self.getenv("CONTINUATION_MAX_ROUNDS", "3"))
+
+    # 需求类型检测配置
+    @cached_property
+    def REQUIREMENT_TYPE_KEYWORDS_FILE(self) -> str:
+        """自定义关键词的JSON文件路径，格式与REQUIREMENT_TYPE_KEYWORDS相同（也可以用关键词列表表示权重均为1），
+        设置后替换默认关键词"""
+        return self.getenv("REQUIREMENT_TYPE_KEYWORDS_FILE", "")
+
+    # 提示词压缩配置
+    @cached_property
+    def PROMPT_COMPACTION_ENABLED(self) -> bool:
+        """发送给LLM之前是否压缩需求文档：合并空白、重建逐格换行的表格、删除修订记录和目录、删除重复的版式残留"""
+        return self.flag("PROMPT_COMPACTION_ENABLED", "true")
+
+    # Excel导出配置
+    @cached_property
+    def EXCEL_MERGE_EXPORT(self) -> bool:
+        """是否以合并模式导出Excel：已有工作簿只更新变化的行、追加新用例、标记已删除的用例，
+        未变化的行和评审人员的手工修改保持不变"""
+        return self.flag("EXCEL_MERGE_EXPORT", "false")
+
+    # 导出流水线配置
+    # 各导出器在线程池(thread)或进程池(process)中并行运行，不阻塞事件循环；
+    # 进程池可以绕过GIL真正并行，但导出器不能使用任务日志
+    @cached_property
+    def EXPORT_EXECUTOR(self) -> str:
+        """导出器运行的执行器类型(thread/process)"""
+        return self.getenv("EXPORT_EXECUTOR", "thread")
+
+    @cached_property
+    def EXPORT_MAX_WORKERS(self) -> int:
+        """工作线程/进程数上限"""
+        return int(self.getenv("EXPORT_MAX_WORKERS", "4"))
+
+    @cached_property
+    def EXPORT_FORMATS(self) -> list:
+        """默认导出的格式，逗号分隔：excel、xmind、jsonl、csv、parquet"""
+        return self.names("EXPORT_FORMATS", "excel,xmind")
+
+    # 表格导出配置(JSONL/CSV/Parquet)
+    @cached_property
+    def TABULAR_CHUNK_SIZE(self) -> int:
+        """每累积多少个测试用例写出一次（Parquet中对应一个行组）"""
+        return int(self.getenv("TABULAR_CHUNK_SIZE", "5000"))
+
+    # XMind导出配置
+    @cached_property
+    def XMIND_COMPACT_JSON(self) -> bool:
+        """.xmind文件中的content.json是否使用不带缩进的紧凑格式（文件更小、写入更快）"""
+        return self.flag("XMIND_COMPACT_JSON", "true")
+
+    # 生成模式配置
+    @cached_property
+    def GENERATION_MODE(self) -> str:
+        """
+        single: 整篇文档一次分析、一次生成
+        chunked: 按章节拆分文档，各章节并行分析和生成后合并
+        auto: 文档估算令牌数超过CHUNK_MAX_TOKENS时使用chunked，否则使用single
+        """
+        return self.getenv("GENERATION_MODE", "auto")
+
+    @cached_property
+    def GENERATION_PIPELINE(self) -> str:
+        """
+        two_step: 先请求需求分析，再基于分析结果请求生成测试用例
+        fast: 把需求文档直接发给模型，一次请求同时输出分析结果和测试用例（不使用分片生成）
+        """
+        return self.getenv("GENERATION_PIPELINE", "two_step")
+
+    @cached_property
+    def CHUNK_MAX_TOKENS(self) -> int:
+        """单个章节块的令牌上限"""
+        return int(self.getenv("CHUNK_MAX_TOKENS", "1500"))
+
+    @cached_property
+    def CHUNK_CONCURRENCY(self) -> int:
+        """同时处理的章节数上限"""
+        return int(self.getenv("CHUNK_CONCURRENCY", "4"))
+
+    # 分片生成配置
+    # 把一次要求覆盖全部测试类型的生成请求拆成多个并发的小请求，每个请求的输出上限更小，
+    # 总耗时取决于最慢的分片而不是整个用例集的串行解码
+    @cached_property
+    def GENERATION_FANOUT(self) -> str:
+        """
+        off: 每个文档（或章节）一次生成全部测试用例
+        category: 按TEST_CATEGORIES中的测试类型分片，每种类型一个请求
+        test_point: 按需求分析结果中的测试点分片，无法解析测试点时退回category
+        """
+        return self.getenv("GENERATION_FANOUT", "off")
+
+    @cached_property
+    def FANOUT_MAX_TOKENS(self) -> int:
+        """每个分片请求的最大生成令牌数"""
+        return int(self.getenv("FANOUT_MAX_TOKENS", "2500"))
+
+    @cached_property
+    def FANOUT_CONCURRENCY(self) -> int:
+        """同一个生成器同时发出的分片请求数上限（chunked模式下由所有章节共享）"""
+        return int(self.getenv("FANOUT_CONCURRENCY", "7"))
+
+    @cached_property
+    def FANOUT_TEST_POINT_SLICES(self) -> int:
+        """test_point模式下测试点分成的组数"""
+        return int(self.getenv("FANOUT_TEST_POINT_SLICES", "7"))
+
+    # 批量生成配置
+    @cached_property
+    def BATCH_CONCURRENCY(self) -> int:
+        """批量处理多个需求文档时同时生成的文档数上限（每个文档内部的章节并发仍受CHUNK_CONCURRENCY限制）"""
+        return int(self.getenv("BATCH_CONCURRENCY", "2"))
+
+    @cached_property
+    def JOURNAL_PATH(self) -> str:
+        """批量任务日志路径，记录每个文档和章节的处理进度，中断后重新运行时跳过已完成的工作"""
+        return self.getenv("JOURNAL_PATH", os.path.join(".cache", "journal.sqlite3"))
+
+    # 近似重复用例检测配置
+    # 对模块、标题、步骤和预期结果做字符分片MinHash，估计的Jaccard相似度达到阈值的用例视为重复
+    @cached_property
+    def DEDUP_ENABLED(self) -> bool:
+        """是否去除近似重复的用例，默认关闭：被判为重复的用例会从结果中去掉"""
+        return self.flag("DEDUP_ENABLED", "false")
+
+    @cached_property
+    def DEDUP_THRESHOLD(self) -> float:
+        """判定为重复的相似度阈值(0~1)"""
+        return float(self.getenv("DEDUP_THRESHOLD", "0.8"))
+
+    @cached_property
+    def DEDUP_STRATEGY(self) -> str:
+        """重复用例的处理方式：drop直接丢弃；merge将前置条件、较高的优先级和较完整的步骤合并到保留的用例"""
+        return self.getenv("DEDUP_STRATEGY", "drop")
+
+    @cached_property
+    def DEDUP_SHINGLE_SIZE(self) -> int:
+        """字符分片长度"""
+        return int(self.getenv("DEDUP_SHINGLE_SIZE", "3"))
+
+    @cached_property
+    def DEDUP_NUM_PERM(self) -> int:
+        """MinHash签名长度"""
+        return int(self.getenv("DEDUP_NUM_PERM", "80"))
+
+    @cached_property
+    def DEDUP_BANDS(self) -> int:
+        """LSH分段数，必须整除DEDUP_NUM_PERM"""
+        return int(self.getenv("DEDUP_BANDS", "16"))
+
+    # 日志配置
+    @cached_property
+    def LOG_TEST_CASES(self) -> bool:
+        """是否逐个打印解析出的测试用例（调试用），默认每个响应只打印汇总和解析方式计数"""
+        return self.flag("LOG_TEST_CASES", "false")
+
+    # 测试用例库配置
+    @cached_property
+    def CASE_STORE_PATH(self) -> str:
+        """设置后生成的测试用例会按来源文档写入该SQLite数据库，便于跨文档查询；为空时不写入"""
+        return self.getenv("CASE_STORE_PATH", "")
+
+    # HTTP连接池配置
+    # LLM引擎在整个生命周期内复用同一个连接池，避免每次请求重新建立TCP/TLS连接
+    @cached_property
+    def HTTP_POOL_LIMIT(self) -> int:
+        """连接池总连接数上限"""
+        return int(self.getenv("HTTP_POOL_LIMIT", "100"))
+
+    @cached_property
+    def HTTP_POOL_LIMIT_PER_HOST(self) -> int:
+        """单个主机的连接数上限"""
+        return int(self.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+
+    @cached_property
+    def HTTP_KEEPALIVE_TIMEOUT(self) -> float:
+        """空闲连接保活时间(秒)"""
+        return float(self.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+
+    @cached_property
+    def HTTP_DNS_CACHE_TTL(self) -> int:
+        """DNS解析结果缓存时间(秒)"""
+        return int(self.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+    @cached_property
+    def HTTP_VERIFY_SSL(self) -> bool:
+        """是否校验远程API的SSL证书（默认不校验，与原有行为保持一致）"""
+        return self.flag("HTTP_VERIFY_SSL", "false")
+
+    # LLM响应缓存配置
+    # 相同的模型、API地址、提示词、温度和最大令牌数会直接返回磁盘上缓存的响应
+    @cached_property
+    def LLM_CACHE_ENABLED(self) -> bool:
+        """是否启用响应缓存"""
+        return self.flag("LLM_CACHE_ENABLED", "true")
+
+    @cached_property
+    def LLM_CACHE_DIR(self) -> str:
+        """缓存目录"""
+        return self.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+
+    @cached_property
+    def LLM_CACHE_MAX_BYTES(self) -> int:
+        """缓存总大小上限(字节)"""
+        return int(self.getenv("LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    @cached_property
+    def LLM_CACHE_MAX_AGE(self) -> float:
+        """缓存条目最长存活时间(秒)"""
+        return float(self.getenv("LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+
+# 全局配置对象
+settings = Settings()
+
+
+def __getattr__(name: str):
+    """将 from config import XXX 中依赖环境变量的配置项转发到settings，首次读取时才解析"""
+    if not name.startswith("_") and isinstance(getattr(Settings, name, None), cached_property):
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,280 @@
+"""
+测试用例库模块
+基于SQLite持久化保存各需求文档生成的测试用例，按模块、优先级、来源文档和内容哈希建立索引，
+可以跨文档查询用例，查询结果以惰性迭代器返回，可直接交给各导出器导出
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.core.records import case_content_hash, to_record
+from src.core.test_generator import TestCase, TestStep
+
+# 查询时每批读取的用例数，也是步骤批量查询中IN参数的个数上限
+QUERY_BATCH_SIZE = 500
+
+# 查询条件可以是单个值，也可以是值的列表
+FilterValue = Union[str, Sequence[str], None]
+
+
+class TestCaseStore:
+    """
+    测试用例库类
+    每个来源文档对应一条文档记录，同名文档再次写入时替换其全部用例；
+    写入在单个事务中批量完成，查询使用独立的只读连接，迭代期间看到的是一致的快照
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化测试用例库
+
+        Args:
+            path (str): 数据库文件路径
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # isolation_level=None 表示自动提交，批量写入时显式开启事务
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS documents (
+                   id INTEGER PRIMARY KEY,
+                   name TEXT NOT NULL UNIQUE,
+                   requirement_type TEXT,
+                   document_key TEXT,
+                   updated_at REAL NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS cases (
+                   id INTEGER PRIMARY KEY,
+                   document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+                   case_id TEXT NOT NULL,
+                   module TEXT NOT NULL,
+                   title TEXT NOT NULL,
+                   priority TEXT NOT NULL,
+                   preconditions TEXT NOT NULL,
+                   content_hash TEXT NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS steps (
+                   case_row INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+                   position INTEGER NOT NULL,
+                   step_number INTEGER NOT NULL,
+                   description TEXT NOT NULL,
+                   expected_result TEXT NOT NULL,
+                   PRIMARY KEY (case_row, position)
+               ) WITHOUT ROWID;
+               CREATE INDEX IF NOT EXISTS idx_cases_module ON cases(module, priority);
+               CREATE INDEX IF NOT EXISTS idx_cases_priority ON cases(priority);
+               CREATE INDEX IF NOT EXISTS idx_cases_document ON cases(document_id);
+               CREATE INDEX IF NOT EXISTS idx_cases_content_hash ON cases(content_hash);
+               CREATE INDEX IF NOT EXISTS idx_cases_case_id ON cases(case_id);"""
+        )
+
+    def add_document(self, name: str, test_cases: Iterable[TestCase], requirement_type: str = None,
+                     document_key: str = None) -> int:
+        """
+        在一个事务中写入文档的全部测试用例，同名文档已存在时替换其用例
+
+        Args:
+            name (str): 来源文档名称
+            test_cases (Iterable[TestCase]): 测试用例（TestCase或CaseRecord）
+            requirement_type (str, optional): 需求类型
+            document_key (str, optional): 任务日志中的文档键
+
+        Returns:
+            int: 写入的用例数
+        """
+        case_rows = []
+        step_rows = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO documents (name, requirement_type, document_key, updated_at) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                    "requirement_type = excluded.requirement_type, "
+                    "document_key = excluded.document_key, updated_at = excluded.updated_at",
+                    (name, requirement_type, document_key, time.time())
+                )
+                document_id = self._conn.execute(
+                    "SELECT id FROM documents WHERE name = ?", (name,)
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM cases WHERE document_id = ?", (document_id,))
+
+                # 持有写锁期间直接分配行号，用例和步骤都可以用executemany批量写入
+                next_row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cases").fetchone()[0]
+                for test_case in test_cases:
+                    record = to_record(test_case)
+                    next_row += 1
+                    case_rows.append((
+                        next_row, document_id, record.id, record.module, record.title, record.priority,
+                        json.dumps(record.preconditions, ensure_ascii=False), case_content_hash(record)
+                    ))
+                    step_rows.extend(
+                        (next_row, position, step.step_number, step.description, step.expected_result)
+                        for position, step in enumerate(record.steps)
+                    )
+                self._conn.executemany(
+                    "INSERT INTO cases (id, document_id, case_id, module, title, priority, "
+                    "preconditions, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    case_rows
+                )
+                self._conn.executemany(
+                    "INSERT INTO steps (case_row, position, step_number, description, expected_result) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    step_rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(case_rows)
+
+    def delete_document(self, name: str) -> bool:
+        """
+        删除文档及其全部用例
+
+        Args:
+            name (str): 来源文档名称
+
+        Returns:
+            bool: 文档是否存在
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM documents WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def query(self, module: FilterValue = None, priority: FilterValue = None,
+              documents: FilterValue = None, latest_documents: int = None,
+              content_hash: FilterValue = None, case_id: FilterValue = None,
+              limit: int = None) -> Iterator[TestCase]:
+        """
+        按条件查询测试用例，结果按写入顺序惰性返回
+
+        Args:
+            module (str | List[str], optional): 所属模块
+            priority (str | List[str], optional): 优先级
+            documents (str | List[str], optional): 来源文档名称
+            latest_documents (int, optional): 只查询最近写入的N个文档
+            content_hash (str | List[str], optional): 用例内容哈希
+            case_id (str | List[str], optional): 用例编号
+            limit (int, optional): 返回的用例数上限
+
+        Returns:
+            Iterator[TestCase]: 测试用例迭代器，开始迭代时才执行查询
+        """
+        where, params = self._where(module=module, priority=priority, documents=documents,
+                                    latest_documents=latest_documents, content_hash=content_hash,
+                                    case_id=case_id)
+        return self._iter_cases(where, params, limit)
+
+    def count(self, module: FilterValue = None, priority: FilterValue = None,
+              documents: FilterValue = None, latest_documents: int = None,
+              content_hash: FilterValue = None, case_id: FilterValue = None) -> int:
+        """
+        统计满足条件的测试用例数，参数与query()相同
+
+        Returns:
+            int: 用例数
+        """
+        where, params = self._where(module=module, priority=priority, documents=documents,
+                                    latest_documents=latest_documents, content_hash=content_hash,
+                                    case_id=case_id)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM cases c{where}", params).fetchone()[0]
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """
+        列出用例库中的所有文档
+
+        Returns:
+            List[Dict[str, Any]]: 按写入时间倒序排列的文档及其用例数
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.name, d.requirement_type, d.updated_at, COUNT(c.id) FROM documents d "
+                "LEFT JOIN cases c ON c.document_id = d.id GROUP BY d.id ORDER BY d.updated_at DESC"
+            ).fetchall()
+        return [
+            {"name": name, "requirement_type": requirement_type, "updated_at": updated_at, "cases": cases}
+            for name, requirement_type, updated_at, cases in rows
+        ]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _where(**filters: Any) -> (str, List[Any]):
+        """根据查询条件生成WHERE子句和参数"""
+        columns = {"module": "c.module", "priority": "c.priority",
+                   "content_hash": "c.content_hash", "case_id": "c.case_id"}
+        clauses = []
+        params: List[Any] = []
+        for name, column in columns.items():
+            value = filters.get(name)
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        documents = filters.get("documents")
+        if documents is not None:
+            names = [documents] if isinstance(documents, str) else list(documents)
+            clauses.append(f"c.document_id IN (SELECT id FROM documents WHERE name IN "
+                           f"({', '.join('?' * len(names))}))")
+            params.extend(names)
+        if filters.get("latest_documents"):
+            clauses.append("c.document_id IN (SELECT id FROM documents ORDER BY updated_at DESC LIMIT ?)")
+            params.append(int(filters["latest_documents"]))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _iter_cases(self, where: str, params: List[Any], limit: Optional[int]) -> Iterator[TestCase]:
+        """使用独立的只读连接分批读取用例及其步骤，每批只查询一次步骤表"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        try:
+            # 整个迭代过程在同一个读事务中进行，期间的写入不会影响结果
+            conn.execute("BEGIN")
+            sql = (f"SELECT c.id, c.case_id, c.module, c.title, c.priority, c.preconditions "
+                   f"FROM cases c{where} ORDER BY c.id")
+            if limit:
+                sql += " LIMIT ?"
+                params = params + [int(limit)]
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(QUERY_BATCH_SIZE)
+                if not rows:
+                    break
+                steps: Dict[int, List[TestStep]] = {}
+                for case_row, step_number, description, expected_result in conn.execute(
+                    f"SELECT case_row, step_number, description, expected_result FROM steps "
+                    f"WHERE case_row IN ({', '.join('?' * len(rows))}) ORDER BY case_row, position",
+                    [row[0] for row in rows]
+                ):
+                    steps.setdefault(case_row, []).append(TestStep(
+                        step_number=step_number, description=description, expected_result=expected_result
+                    ))
+                for case_row, case_id, module, title, priority, preconditions in rows:
+                    yield TestCase(
+                        id=case_id,
+                        module=module,
+                        title=title,
+                        priority=priority,
+                        preconditions=json.loads(preconditions),
+                        steps=steps.get(case_row, [])
+                    )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
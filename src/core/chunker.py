@@ -0,0 +1,194 @@
+"""
+需求文档分块模块
+按照文档的编号标题（如"1.1 文档修订记录"）或Markdown标题结构，
+将大型需求文档拆分为不超过令牌上限的章节，便于并行分析和生成测试用例
+"""
+
+from typing import List
+from pydantic import BaseModel
+from src.utils.text_utils import estimate_tokens
+import re
+
+# 编号标题，如"1.文档概述"、"1.1 文档修订记录"、"2.3.1  活动维度定义"、"1、原活动计算逻辑"
+NUMBERED_HEADING_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)(?:[\.、]\s*|\s+)(\S.{0,40})$')
+# Markdown标题，如"## 业务规则"
+MARKDOWN_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(\S.*)$')
+# 标题文本中出现这些标点时，更可能是正文中的列表项而不是标题
+_SENTENCE_PUNCTUATION = set('，。；：、,;:！？!?')
+
+
+class RequirementSection(BaseModel):
+    """
+    需求章节数据模型
+    定义拆分后单个章节的结构
+    """
+    index: int           # 章节在文档中的顺序，从0开始
+    title: str           # 章节标题（含上级标题路径）
+    text: str            # 章节内容（包含标题行）
+    tokens: int          # 估算的令牌数
+
+
+def _parse_heading(line: str, markdown: bool):
+    """
+    判断一行文本是否为标题
+
+    Args:
+        line (str): 去除首尾空白后的行
+        markdown (bool): 是否按Markdown标题识别
+
+    Returns:
+        tuple | None: 标题编号元组（Markdown标题为层级占位）和标题文本，不是标题时返回None
+    """
+    if markdown:
+        match = MARKDOWN_HEADING_PATTERN.match(line)
+        if not match:
+            return None
+        return (0,) * len(match.group(1)), match.group(2).strip()
+
+    match = NUMBERED_HEADING_PATTERN.match(line)
+    if not match:
+        return None
+    if any(char in _SENTENCE_PUNCTUATION for char in match.group(2)):
+        return None
+    return tuple(int(part) for part in match.group(1).split('.')), line
+
+
+def _is_next_heading(previous, number) -> bool:
+    """
+    判断编号是否能接续上一个标题：上一个标题的第一个子标题，或任意上级的下一个兄弟标题
+    用于排除正文中"1.输入商品清单"这类编号列表项
+
+    Args:
+        previous (tuple | None): 上一个标题的编号
+        number (tuple): 当前候选标题的编号
+
+    Returns:
+        bool: 是否为合法的后续标题
+    """
+    if previous is None:
+        return True
+    if number == previous + (1,):
+        return True
+    for level in range(1, len(previous) + 1):
+        if number == previous[:level - 1] + (previous[level - 1] + 1,):
+            return True
+    return False
+
+
+def _split_oversized(title: str, lines: List[str], max_tokens: int) -> List[List[str]]:
+    """
+    将超过令牌上限的章节按行拆分为多个部分，每个部分都保留章节标题
+
+    Args:
+        title (str): 章节标题
+        lines (List[str]): 章节正文行
+        max_tokens (int): 每个部分的令牌上限
+
+    Returns:
+        List[List[str]]: 拆分后的行列表
+    """
+    budget = max(max_tokens - estimate_tokens(title), 1)
+    parts, current, current_tokens = [], [], 0
+    for line in lines:
+        line_tokens = estimate_tokens(line) + 1
+        if current and current_tokens + line_tokens > budget:
+            parts.append(current)
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sections(text: str, max_tokens: int) -> List[RequirementSection]:
+    """
+    按标题结构将需求文档拆分为章节
+    每个章节的标题带有上级标题路径，超过令牌上限的章节会被继续拆分
+
+    Args:
+        text (str): 需求文档文本
+        max_tokens (int): 单个章节的令牌上限
+
+    Returns:
+        List[RequirementSection]: 按文档顺序排列的章节列表
+    """
+    raw_lines = [line.strip() for line in text.splitlines()]
+    markdown = any(MARKDOWN_HEADING_PATTERN.match(line) for line in raw_lines)
+
+    # 先按标题切分出(标题路径, 正文行)
+    blocks = []
+    heading_path: List[str] = []
+    previous_number = None
+    current_title = ""
+    current_lines: List[str] = []
+    for line in raw_lines:
+        if not line:
+            continue
+        heading = _parse_heading(line, markdown)
+        if heading and (markdown or _is_next_heading(previous_number, heading[0])):
+            number, heading_text = heading
+            previous_number = number
+            if current_title or current_lines:
+                blocks.append((current_title, current_lines))
+            heading_path = heading_path[:len(number) - 1] + [heading_text]
+            current_title = " > ".join(heading_path)
+            current_lines = []
+        else:
+            current_lines.append(line)
+    if current_title or current_lines:
+        blocks.append((current_title, current_lines))
+
+    sections = []
+    for title, lines in blocks:
+        # 只有标题没有正文的章节（如"2.产品概述"）不单独成块
+        if not lines:
+            continue
+        parts = _split_oversized(title, lines, max_tokens)
+        for part_number, part in enumerate(parts, 1):
+            part_title = title if len(parts) == 1 else f"{title} ({part_number}/{len(parts)})"
+            body = "\n".join(([part_title] if part_title else []) + part)
+            sections.append(RequirementSection(
+                index=len(sections),
+                title=part_title,
+                text=body,
+                tokens=estimate_tokens(body)
+            ))
+    return sections
+
+
+def pack_sections(sections: List[RequirementSection], max_tokens: int) -> List[RequirementSection]:
+    """
+    将相邻的小章节合并为不超过令牌上限的块，减少LLM请求次数
+
+    Args:
+        sections (List[RequirementSection]): 按文档顺序排列的章节
+        max_tokens (int): 单个块的令牌上限
+
+    Returns:
+        List[RequirementSection]: 合并后的块列表
+    """
+    packed = []
+    group: List[RequirementSection] = []
+    group_tokens = 0
+
+    def flush():
+        if not group:
+            return
+        text = "\n\n".join(section.text for section in group)
+        title = group[0].title if len(group) == 1 else f"{group[0].title} ~ {group[-1].title}"
+        packed.append(RequirementSection(
+            index=len(packed),
+            title=title,
+            text=text,
+            tokens=estimate_tokens(text)
+        ))
+
+    for section in sections:
+        if group and group_tokens + section.tokens > max_tokens:
+            flush()
+            group, group_tokens = [], 0
+        group.append(section)
+        group_tokens += section.tokens
+    flush()
+    return packed
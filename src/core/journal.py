@@ -0,0 +1,265 @@
+"""
+任务日志模块
+基于SQLite的持久化任务日志，记录每个文档及其章节的处理进度（已分析、已生成、已解析、已导出）
+以及中间结果，长时间运行的批量任务中断后重新运行时可以跳过已完成的工作，从中断处继续
+"""
+
+from typing import Optional, Dict, Any, List
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.core.records import to_records
+
+
+class JobJournal:
+    """
+    任务日志类
+    以文档键、章节键和阶段为主键保存每一步的结果，写入立即提交，进程崩溃后已完成的步骤不会丢失
+
+    文档键由文档内容和影响生成结果的参数计算得出，文档内容或参数变化后会被视为新任务。
+    日志数据库使用WAL日志模式，可以被TestGenerator和各导出器共享；
+    所有数据库操作都在锁内执行，导出器可以在线程池中并发调用。
+    """
+
+    # 处理阶段
+    ANALYZED = "analyzed"    # 需求分析结果
+    GENERATED = "generated"  # 模型生成的原始响应
+    PARSED = "parsed"        # 解析后的测试用例(JSON)
+    EXPORTED = "exported"    # 导出文件路径
+
+    # 表示整个文档（而不是某个章节）的章节键
+    DOCUMENT = "document"
+
+    def __init__(self, path: str):
+        """
+        初始化任务日志
+
+        Args:
+            path (str): 日志数据库文件路径
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 当前实例从日志中恢复的步骤数
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+        # isolation_level=None 表示自动提交，每条记录写入后立即持久化
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                   doc_key TEXT PRIMARY KEY,
+                   name TEXT NOT NULL,
+                   state TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   updated_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS steps (
+                   doc_key TEXT NOT NULL,
+                   section TEXT NOT NULL,
+                   stage TEXT NOT NULL,
+                   payload TEXT NOT NULL,
+                   updated_at REAL NOT NULL,
+                   PRIMARY KEY (doc_key, section, stage)
+               )"""
+        )
+
+    @staticmethod
+    def document_key(text: str, **params: Any) -> str:
+        """
+        计算文档键
+
+        Args:
+            text (str): 需求文档文本
+            **params: 影响生成结果的参数（需求类型、生成模式等）
+
+        Returns:
+            str: 文档内容和参数的SHA-256哈希值
+        """
+        payload = json.dumps({"text": text, "params": params}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def section_key(index: int, text: str) -> str:
+        """
+        计算章节键，章节内容变化后不会复用旧结果
+
+        Args:
+            index (int): 章节顺序
+            text (str): 章节文本
+
+        Returns:
+            str: 章节键
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        return f"section-{index}-{digest}"
+
+    def start_document(self, doc_key: str, name: str):
+        """
+        登记文档，已登记的文档保持原有状态
+
+        Args:
+            doc_key (str): 文档键
+            name (str): 文档名称
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO documents (doc_key, name, state, created_at, updated_at) "
+                "VALUES (?, ?, 'started', ?, ?)",
+                (doc_key, name, now, now)
+            )
+
+    def record(self, doc_key: str, section: str, stage: str, payload: str):
+        """
+        记录一个已完成的步骤
+
+        Args:
+            doc_key (str): 文档键
+            section (str): 章节键，整个文档使用JobJournal.DOCUMENT
+            stage (str): 处理阶段
+            payload (str): 该步骤的结果（分析结果、原始响应、用例JSON或导出路径）
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO steps (doc_key, section, stage, payload, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (doc_key, section, stage, payload, now)
+                )
+                # 文档级步骤和导出步骤会更新文档的最新状态
+                if section == self.DOCUMENT or stage == self.EXPORTED:
+                    self._conn.execute(
+                        "UPDATE documents SET state = ?, updated_at = ? WHERE doc_key = ?",
+                        (stage, now, doc_key)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, doc_key: str, section: str, stage: str) -> Optional[str]:
+        """
+        读取已完成步骤的结果
+
+        Args:
+            doc_key (str): 文档键
+            section (str): 章节键
+            stage (str): 处理阶段
+
+        Returns:
+            Optional[str]: 步骤已完成时返回其结果，否则返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM steps WHERE doc_key = ? AND section = ? AND stage = ?",
+                (doc_key, section, stage)
+            ).fetchone()
+            if row is None:
+                return None
+            self.resumed += 1
+        return row[0]
+
+    @staticmethod
+    def fingerprint(test_cases: List[Any]) -> str:
+        """
+        计算一组测试用例的内容指纹，用于判断已导出的文件是否仍是最新的
+        TestCase列表与对应的CaseRecord列表得到相同的指纹
+
+        Args:
+            test_cases (List[Any]): 测试用例列表（TestCase或CaseRecord）
+
+        Returns:
+            str: 测试用例内容的SHA-256哈希值
+        """
+        payload = json.dumps(to_records(test_cases), ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def record_export(self, doc_key: str, exporter: str, path: str, fingerprint: str):
+        """
+        记录文档已导出
+
+        Args:
+            doc_key (str): 文档键
+            exporter (str): 导出器名称（作为章节键记录）
+            path (str): 导出文件路径
+            fingerprint (str): 导出的测试用例内容指纹
+        """
+        payload = json.dumps({"path": path, "fingerprint": fingerprint})
+        self.record(doc_key, exporter, self.EXPORTED, payload)
+
+    def is_exported(self, doc_key: str, exporter: str, path: str, fingerprint: str) -> bool:
+        """
+        判断相同内容是否已导出到同一路径，导出记录存在但文件已被删除时视为未导出
+
+        Args:
+            doc_key (str): 文档键
+            exporter (str): 导出器名称
+            path (str): 导出文件路径
+            fingerprint (str): 待导出的测试用例内容指纹
+
+        Returns:
+            bool: 是否可以跳过导出
+        """
+        payload = self.get(doc_key, exporter, self.EXPORTED)
+        if payload is None:
+            return False
+        exported = json.loads(payload)
+        return (exported["path"] == path and exported["fingerprint"] == fingerprint
+                and os.path.exists(path))
+
+    def document_state(self, doc_key: str) -> Optional[str]:
+        """
+        获取文档的最新状态
+
+        Args:
+            doc_key (str): 文档键
+
+        Returns:
+            Optional[str]: 文档状态，未登记时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM documents WHERE doc_key = ?", (doc_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """
+        列出日志中的所有文档及其状态
+
+        Returns:
+            List[Dict[str, Any]]: 按登记时间排序的文档列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_key, name, state, updated_at FROM documents ORDER BY created_at"
+            ).fetchall()
+        return [
+            {"doc_key": doc_key, "name": name, "state": state, "updated_at": updated_at}
+            for doc_key, name, state, updated_at in rows
+        ]
+
+    def clear(self):
+        """清空日志"""
+        with self._lock:
+            self._conn.execute("DELETE FROM steps")
+            self._conn.execute("DELETE FROM documents")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -3,38 +3,115 @@ LLM引擎模块
 负责与模型交互，支持本地模型和远程API
 """
 
-from typing import Dict, Any
-import aiohttp
+from typing import TYPE_CHECKING, Dict, Any, Optional, AsyncIterator, List, Callable, Tuple
+from collections import Counter
+import asyncio
 import json
 import os
 import ssl
 import sys
 import re
+import time
 
 # 将项目根目录添加到系统路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 # 现在可以导入config
-from config import API_KEY, MODEL, API_BASE, MAX_TOKENS, TEMPERATURE, USE_REMOTE_API
+from src.config import (
+    MAX_TOKENS, TEMPERATURE, REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY, RETRY_MAX_DELAY,
+    CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT, settings
+)
+from src.core.response_cache import ResponseCache
+from src.core.resilience import (
+    LLMRequestError, CircuitOpenError, CircuitBreaker, RequestMetric, HedgeRecord,
+    backoff_delay
+)
+from src.utils.json_repair import extract_json_object, extract_test_case_dicts, is_truncated_json
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+def _client_error() -> type:
+    """
+    aiohttp连接错误的基类
+    aiohttp导入较慢，在创建HTTP会话时才导入，发生连接错误时它必然已经导入
+    """
+    import aiohttp
+    return aiohttp.ClientError
+
+
+# 续写请求的用户提示词，在原提示词之后列出已经生成的用例标题
+CONTINUATION_PROMPT = """{prompt}
+
+上一次回复因长度限制在第{count}个测试用例之后被截断，以下测试用例已经生成：
+{titles}
+
+请不要重复以上测试用例，继续生成剩余的测试用例，只输出{{"test_cases": [...]}}格式的JSON。"""
+
+# 回复在第一个测试用例完成之前（如单次生成模式的分析结果中）被截断时的续写提示词
+CONTINUATION_START_PROMPT = """{prompt}
+
+上一次回复因长度限制在输出测试用例之前被截断。请直接生成测试用例，只输出{{"test_cases": [...]}}格式的JSON。"""
+
+
+class ModelResponse(str):
+    """
+    模型响应文本
+    与str完全相同，额外携带Ollama返回的结束原因（length表示达到num_predict上限被截断）
+    和预填充统计（命中KV缓存的前缀不计入），远程API和缓存中的响应没有这些信息；
+    经过_execute_with_failover的响应还记录实际完成请求的模型
+    """
+    done_reason: Optional[str] = None
+    served_model: str = ""            # 实际完成请求的模型，故障转移或对冲时可能不是首选模型
+    prompt_eval_count: int = 0        # 实际预填充的提示词令牌数
+    prompt_eval_duration: float = 0.0 # 预填充耗时(秒)
+
+    @classmethod
+    def create(cls, text: str, done_reason: Optional[str] = None,
+               prompt_eval_count: int = 0, prompt_eval_duration: float = 0.0) -> "ModelResponse":
+        response = cls(text)
+        response.done_reason = done_reason
+        response.prompt_eval_count = prompt_eval_count
+        response.prompt_eval_duration = prompt_eval_duration
+        return response
+
 
 class LLMEngine:
     """
     LLM引擎类
     处理与模型的所有交互，包括本地模型和远程API
+
+    引擎持有一个长生命周期的HTTP连接池，所有请求复用已建立的连接。
+    推荐以异步上下文管理器的方式使用，以确保连接池被正确关闭：
+
+        async with LLMEngine() as engine:
+            await engine.generate_response(prompt, system_prompt)
     """
     
-    def __init__(self):
+    def __init__(self,
+                 pool_limit: Optional[int] = None,
+                 pool_limit_per_host: Optional[int] = None,
+                 keepalive_timeout: Optional[float] = None,
+                 dns_cache_ttl: Optional[int] = None,
+                 verify_ssl: Optional[bool] = None,
+                 use_cache: Optional[bool] = None,
+                 cache: Optional[ResponseCache] = None):
         """
         初始化LLM引擎
-        设置API配置
-        """
-        print(f"Using model: {MODEL}")
-        print(f"API Base: {API_BASE}")
-        print(f"Using remote API: {USE_REMOTE_API}")
+        设置API配置和HTTP连接池参数
         
-        # 强制使用测试连接脚本中的API密钥
-        self.api_key = "api-sk-67d140832e0cc3-45510241"  # 硬编码API密钥以确保正确格式
-        print(f"实际使用的API密钥: {self.api_key}")
+        Args:
+            pool_limit (int, optional): 连接池总连接数上限，默认使用HTTP_POOL_LIMIT
+            pool_limit_per_host (int, optional): 单个主机的连接数上限，默认使用HTTP_POOL_LIMIT_PER_HOST
+            keepalive_timeout (float, optional): 空闲连接保活时间(秒)，默认使用HTTP_KEEPALIVE_TIMEOUT
+            dns_cache_ttl (int, optional): DNS缓存时间(秒)，默认使用HTTP_DNS_CACHE_TTL
+            verify_ssl (bool, optional): 是否校验SSL证书，默认使用HTTP_VERIFY_SSL
+            use_cache (bool, optional): 是否启用响应缓存，默认使用LLM_CACHE_ENABLED
+            cache (ResponseCache, optional): 自定义的响应缓存实例
+        """
+        # API密钥来自OPENAI_API_KEY或API_KEY环境变量，都没有时使用默认测试密钥
+        self.api_key = settings.API_KEY
         
         self.headers = {
             "Content-Type": "application/json",
@@ -42,66 +119,796 @@ class LLMEngine:
             "Authorization": f"Bearer {self.api_key}"
         }
         
-        print(f"API请求头: {json.dumps(self.headers, ensure_ascii=False)}")
-        print(f"API密钥配置成功")
-                
-        self.model = MODEL
-        self.api_base = API_BASE
-        self.use_remote_api = USE_REMOTE_API
+        self.model = settings.MODEL
+        self.api_base = settings.API_BASE
+        self.use_remote_api = settings.USE_REMOTE_API
+        
+        # 本地模型的请求接口和保持加载时间，以及累计的预填充令牌数和耗时
+        self.chat_api = settings.OLLAMA_CHAT_API
+        self.keep_alive = settings.OLLAMA_KEEP_ALIVE
+        self.prefill_tokens = 0
+        self.prefill_seconds = 0.0
+        
+        # 连接池配置
+        self.pool_limit = pool_limit if pool_limit is not None else settings.HTTP_POOL_LIMIT
+        self.pool_limit_per_host = pool_limit_per_host if pool_limit_per_host is not None else settings.HTTP_POOL_LIMIT_PER_HOST
+        self.keepalive_timeout = keepalive_timeout if keepalive_timeout is not None else settings.HTTP_KEEPALIVE_TIMEOUT
+        self.dns_cache_ttl = dns_cache_ttl if dns_cache_ttl is not None else settings.HTTP_DNS_CACHE_TTL
+        
+        # SSL上下文只创建一次，所有HTTPS连接共享；加载系统证书较慢，与会话一起在首次请求时创建
+        self.verify_ssl = verify_ssl if verify_ssl is not None else settings.HTTP_VERIFY_SSL
+        self.ssl_context: Optional[ssl.SSLContext] = None
+        
+        # 会话在首次请求时创建（必须在事件循环中创建）
+        self._session: Optional["aiohttp.ClientSession"] = None
+        
+        # 响应缓存，未启用时为None
+        if use_cache is None:
+            use_cache = settings.LLM_CACHE_ENABLED
+        if cache is None and use_cache:
+            cache = ResponseCache(settings.LLM_CACHE_DIR, settings.LLM_CACHE_MAX_BYTES, settings.LLM_CACHE_MAX_AGE)
+        self.cache = cache if use_cache else None
+        
+        # 容错配置：超时、重试、备选模型和按端点的熔断器
+        self.request_timeout = REQUEST_TIMEOUT
+        self.max_retries = MAX_RETRIES
+        self.fallback_models = list(settings.FALLBACK_MODELS)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # 每次generate_response的请求指标
+        self.request_metrics: List[RequestMetric] = []
+        
+        # 对冲请求配置及每次对冲的胜出记录
+        self.hedge_enabled = settings.HEDGE_ENABLED
+        self.hedge_delay = settings.HEDGE_DELAY
+        self.hedge_records: List[HedgeRecord] = []
+        
+        # 截断续写配置及累计的续写请求数
+        self.continuation_enabled = settings.CONTINUATION_ENABLED
+        self.continuation_max_rounds = settings.CONTINUATION_MAX_ROUNDS
+        self.continuation_requests = 0
 
-    async def generate_response(self, prompt: str, system_prompt: str) -> str:
+    @staticmethod
+    def _create_ssl_context(verify_ssl: bool) -> ssl.SSLContext:
+        """
+        创建可复用的SSL上下文
+        
+        Args:
+            verify_ssl (bool): 是否校验服务端证书
+            
+        Returns:
+            ssl.SSLContext: SSL上下文
+        """
+        ssl_context = ssl.create_default_context()
+        if not verify_ssl:
+            # 禁用证书验证
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """
+        获取共享的HTTP会话，必要时创建连接池
+        
+        Returns:
+            aiohttp.ClientSession: 复用连接池的HTTP会话
+        """
+        if self._session is None or self._session.closed:
+            import aiohttp
+            if self.ssl_context is None:
+                self.ssl_context = self._create_ssl_context(self.verify_ssl)
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                ssl=self.ssl_context
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """
+        关闭HTTP会话并释放连接池中的所有连接
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+        usage = self.model_usage()
+        if usage:
+            print(f"Requests served by model: {dict(usage)}")
+        if self.hedge_records:
+            print(f"Hedged request winners: {dict(self.hedge_winners())}")
+
+    async def __aenter__(self) -> "LLMEngine":
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def generate_response(self, prompt: str, system_prompt: str,
+                                bypass_cache: bool = False,
+                                validator: Optional[Callable[[str], bool]] = None,
+                                hedge: Optional[bool] = None,
+                                max_tokens: Optional[int] = None,
+                                schema: Optional[Dict[str, Any]] = None) -> str:
         """
         生成响应
         
         Args:
             prompt (str): 用户提示词
             system_prompt (str): 系统提示词
+            bypass_cache (bool): 为True时跳过缓存读取，强制请求模型（结果仍会写入缓存）
+            validator (Callable[[str], bool], optional): 判断响应是否可用的函数，对冲模式下据此选择响应，
+                未通过校验的响应不写入缓存
+            hedge (bool, optional): 是否使用对冲请求，默认使用HEDGE_ENABLED
+            max_tokens (int, optional): 本次生成的最大令牌数，默认使用MAX_TOKENS（远程API由服务端决定）
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema，为空时不约束
             
         Returns:
             str: 生成的响应文本
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(prompt, system_prompt, max_tokens, schema)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print("Using cached LLM response")
+                    return cached
+        
+        if hedge is None:
+            hedge = self.hedge_enabled
         try:
-            if self.use_remote_api:
-                return await self._remote_api_request(prompt, system_prompt)
+            if hedge and len(self._hedge_targets()) > 1:
+                response = await self._hedged_request(prompt, system_prompt, validator, max_tokens, schema)
             else:
-                return await self._local_model_request(prompt, system_prompt)
+                response = await self._execute_with_failover(prompt, system_prompt, max_tokens=max_tokens,
+                                                             schema=schema)
         except Exception as e:
             raise Exception(f"Error generating response from LLM: {str(e)}")
+        
+        if self.continuation_enabled and self._is_truncated(response, schema):
+            response = await self._continue_truncated(prompt, system_prompt, response, max_tokens, schema)
+        
+        if cache_key is not None and self._is_cacheable(response, validator):
+            self.cache.put(cache_key, response)
+        return response
+
+    def _is_cacheable(self, response: str, validator: Optional[Callable[[str], bool]] = None) -> bool:
+        """
+        判断响应能否写入缓存
+        缓存键按首选模型计算，故障转移或对冲得到的其他模型的响应不能作为首选模型的结果重复使用；
+        无法解析的远程响应和未通过校验的响应也不缓存，避免错误结果在之后的运行中被反复使用
+        
+        Args:
+            response (str): 模型响应
+            validator (Callable[[str], bool], optional): 判断响应是否可用的函数
+            
+        Returns:
+            bool: 是否写入缓存
+        """
+        if getattr(response, "served_model", "") != self.model:
+            return False
+        if response.startswith("无法解析API响应"):
+            return False
+        return validator is None or validator(response)
+
+    async def stream_response(self, prompt: str, system_prompt: str,
+                              bypass_cache: bool = False,
+                              schema: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        以流式方式生成响应，逐块返回模型输出的文本
+        
+        本地模型使用Ollama的NDJSON流式接口，在产出第一个片段之前与非流式请求一样重试和故障转移；
+        远程API不支持流式输出，会在完整响应返回后一次性产出。命中缓存时直接产出缓存内容。
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            bypass_cache (bool): 为True时跳过缓存读取
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema，为空时不约束
+            
+        Yields:
+            str: 响应文本片段
+            
+        Raises:
+            LLMRequestError: 本地模型请求失败
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(prompt, system_prompt, schema=schema)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    print("Using cached LLM response")
+                    yield cached
+                    return
+        
+        if self.use_remote_api:
+            yield await self.generate_response(prompt, system_prompt, bypass_cache=True, schema=schema)
+            return
+        
+        chunks = []
+        served_model = self.model
+        async for served_model, chunk in self._stream_with_failover(prompt, system_prompt, schema):
+            chunks.append(chunk)
+            yield chunk
+        
+        # 流式输出完整结束后写入缓存，备选模型的输出不写入首选模型的缓存键
+        if cache_key is not None and chunks and served_model == self.model:
+            self.cache.put(cache_key, ''.join(chunks))
+
+    @staticmethod
+    def _is_truncated(response: str, schema: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        判断测试用例响应是否因长度限制被截断
+        Ollama报告正常结束(stop)时，JSON不完整是模型的格式错误，续写无法修复；
+        没有结束原因时（远程API）只根据JSON结尾是否未闭合判断。
+        响应中还没有test_cases字段（在前面的analysis中被截断）时，只有Schema要求了test_cases
+        才能确定这是测试用例响应，不受约束的此类响应不续写，由调用方按生成失败处理
+        """
+        if getattr(response, "done_reason", None) == "stop" or not is_truncated_json(response):
+            return False
+        return '"test_cases"' in response or "test_cases" in (schema or {}).get("properties", {})
+
+    async def _continue_truncated(self, prompt: str, system_prompt: str, response: str,
+                                  max_tokens: Optional[int] = None,
+                                  schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        续写被截断的测试用例响应
+        保留截断前所有完整的测试用例，请求模型从最后一个完整用例之后继续生成，
+        直到响应正常结束、续写没有产生新用例或达到continuation_max_rounds轮
+        
+        Args:
+            prompt (str): 原始用户提示词
+            system_prompt (str): 系统提示词
+            response (str): 被截断的响应
+            max_tokens (int, optional): 每次续写的最大生成令牌数，默认使用MAX_TOKENS
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema，续写时只保留其中的test_cases字段
+            
+        Returns:
+            str: 拼接了所有完整测试用例的JSON文本，截断前响应中的其他顶层字段（如analysis）原样保留
+        """
+        test_cases, _ = extract_test_case_dicts(response)
+        # 续写只输出剩余的测试用例，Schema中的其他必填字段（如analysis）不能再要求模型重新生成
+        if schema and "test_cases" in schema.get("properties", {}):
+            schema = {**schema, "properties": {"test_cases": schema["properties"]["test_cases"]},
+                      "required": ["test_cases"]}
+        # 修复截断的结尾后取出顶层对象；响应中有test_cases字段时第一个对象才一定是顶层对象
+        salvaged = extract_json_object(response) or {}
+        if '"test_cases"' in response and "test_cases" not in salvaged:
+            salvaged = {}
+        # 拼接结果中任何一部分来自其他模型时，整个结果都视为由该模型完成
+        served_model = getattr(response, "served_model", "")
+        for round_number in range(1, self.continuation_max_rounds + 1):
+            print(f"Response truncated after {len(test_cases)} test cases, "
+                  f"continuing (round {round_number}/{self.continuation_max_rounds})")
+            if test_cases:
+                titles = "\n".join(f"- {test_case.get('title', '')}" for test_case in test_cases)
+                continuation_prompt = CONTINUATION_PROMPT.format(prompt=prompt, count=len(test_cases), titles=titles)
+            else:
+                continuation_prompt = CONTINUATION_START_PROMPT.format(prompt=prompt)
+            self.continuation_requests += 1
+            try:
+                fragment = await self._execute_with_failover(
+                    continuation_prompt, system_prompt, max_tokens=max_tokens, schema=schema
+                )
+            except Exception as e:
+                # 续写失败时保留已有的完整用例
+                print(f"Continuation request failed: {str(e)}")
+                break
+            # 模型可能重复已经生成的用例，按标题去掉
+            seen = {test_case.get("title") for test_case in test_cases}
+            new_cases = [test_case for test_case in extract_test_case_dicts(fragment)[0]
+                         if test_case.get("title") not in seen]
+            test_cases.extend(new_cases)
+            if getattr(fragment, "served_model", "") != self.model:
+                served_model = getattr(fragment, "served_model", "")
+            if not new_cases or not self._is_truncated(fragment, schema):
+                break
+        print(f"Stitched {len(test_cases)} test cases from truncated response")
+        result = {key: value for key, value in salvaged.items() if key != "test_cases"}
+        result["test_cases"] = test_cases
+        stitched = ModelResponse.create(json.dumps(result, ensure_ascii=False))
+        stitched.served_model = served_model
+        return stitched
+
+    def _candidate_models(self) -> List[str]:
+        """
+        获取按优先级排序的候选模型列表
+        远程API的模型由服务端决定，不参与故障转移
+        
+        Returns:
+            List[str]: 首选模型在前、备选模型在后的去重列表
+        """
+        if self.use_remote_api:
+            return [self.model]
+        models = [self.model]
+        for model in self.fallback_models:
+            if model not in models:
+                models.append(model)
+        return models
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        """获取端点对应的熔断器"""
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(
+                CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT
+            )
+        return self._breakers[endpoint]
+
+    async def _send(self, model: str, api_base: str, prompt: str, system_prompt: str,
+                    max_tokens: Optional[int] = None, schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        向指定端点的指定模型发送一次请求，不做任何重试
+        """
+        if self.use_remote_api:
+            return await self._remote_api_request(prompt, system_prompt, api_base, schema)
+        return await self._local_model_request(prompt, system_prompt, model, api_base, max_tokens, schema)
+
+    async def _execute_with_failover(self, prompt: str, system_prompt: str,
+                                     models: Optional[List[str]] = None,
+                                     api_base: Optional[str] = None,
+                                     max_tokens: Optional[int] = None,
+                                     schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        带超时、重试、熔断和模型故障转移的请求执行器
+        
+        - 每次尝试受request_timeout限制
+        - 可重试的错误（超时、连接错误、5xx）按带抖动的指数退避在同一模型上重试
+        - 模型不存在或过载时立即切换到FALLBACK_MODELS中的下一个模型
+        - 端点的熔断器打开时直接失败，不再发送请求
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            models (List[str], optional): 依次尝试的模型，默认为首选模型加FALLBACK_MODELS
+            api_base (str, optional): 请求的端点，默认为self.api_base
+            max_tokens (int, optional): 最大生成令牌数，默认使用MAX_TOKENS
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema
+        
+        Returns:
+            str: 模型响应文本
+            
+        Raises:
+            LLMRequestError: 所有候选模型均失败时抛出最后一次错误
+        """
+        models = models or self._candidate_models()
+        endpoint = api_base or self.api_base
+        breaker = self._breaker(endpoint)
+        started = time.perf_counter()
+        attempts = 0
+        last_error: Optional[Exception] = None
+        
+        for model in models:
+            for retry in range(self.max_retries + 1):
+                if not breaker.allow():
+                    last_error = CircuitOpenError(endpoint)
+                    self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+                    raise last_error
+                
+                attempts += 1
+                try:
+                    response = await asyncio.wait_for(
+                        self._send(model, endpoint, prompt, system_prompt, max_tokens, schema),
+                        timeout=self.request_timeout
+                    )
+                except asyncio.TimeoutError:
+                    last_error = LLMRequestError(f"Request to {model} timed out after {self.request_timeout}s")
+                except _client_error() as e:
+                    last_error = LLMRequestError(f"Connection error: {str(e)}")
+                except LLMRequestError as e:
+                    last_error = e
+                except BaseException:
+                    # 被取消（如对冲请求的其他目标已胜出）或意外错误，不计入端点的成败
+                    breaker.release()
+                    raise
+                else:
+                    breaker.record_success()
+                    self._record_metric(models[0], model, endpoint, attempts, started)
+                    if not isinstance(response, ModelResponse):
+                        response = ModelResponse.create(response)
+                    response.served_model = model
+                    return response
+                
+                print(f"Request to model {model} failed (attempt {retry + 1}): {last_error}")
+                if last_error.model_unavailable and last_error.status == 404:
+                    # 模型不存在不代表端点故障
+                    breaker.release()
+                    break
+                breaker.record_failure()
+                if last_error.model_unavailable:
+                    break
+                if not last_error.retryable:
+                    self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+                    raise last_error
+                if retry < self.max_retries:
+                    await asyncio.sleep(backoff_delay(retry, RETRY_DELAY, RETRY_MAX_DELAY))
+            
+            print(f"Model {model} unavailable, failing over to next model")
+        
+        self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+        raise last_error or LLMRequestError("No candidate models available")
+
+    def _hedge_targets(self) -> List[Tuple[str, str]]:
+        """
+        获取对冲请求的目标列表
+        
+        Returns:
+            List[Tuple[str, str]]: (模型, 端点)列表，首个为首选目标
+        """
+        targets = [(self.model, self.api_base)]
+        if settings.HEDGE_API_BASE and settings.HEDGE_API_BASE != self.api_base:
+            targets.append((self.model, settings.HEDGE_API_BASE))
+        if not self.use_remote_api:
+            hedge_models = settings.HEDGE_MODELS or [
+                model for model in self.fallback_models if model != self.model
+            ][:1]
+            for model in hedge_models:
+                if (model, self.api_base) not in targets:
+                    targets.append((model, self.api_base))
+        return targets
+
+    async def _hedged_request(self, prompt: str, system_prompt: str,
+                              validator: Optional[Callable[[str], bool]] = None,
+                              max_tokens: Optional[int] = None,
+                              schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        对冲请求：先向首选目标发送请求，每经过hedge_delay秒仍没有可用结果，
+        就向下一个目标发送相同请求；某个请求失败或响应未通过校验时立即启动下一个目标。
+        采用最先返回且通过校验的响应，并取消其余仍在进行的请求
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            validator (Callable[[str], bool], optional): 判断响应是否可用，为空时任何成功响应都可用
+            max_tokens (int, optional): 最大生成令牌数，默认使用MAX_TOKENS
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema
+            
+        Returns:
+            str: 胜出的响应文本
+        """
+        targets = self._hedge_targets()
+        started = time.perf_counter()
+        running: Dict[asyncio.Task, int] = {}
+        next_index = 0
+        rejected = 0
+        fallback_response: Optional[str] = None
+        last_error: Optional[Exception] = None
+        
+        def launch():
+            nonlocal next_index
+            model, api_base = targets[next_index]
+            print(f"Hedge request {next_index + 1}/{len(targets)}: {model} @ {api_base}")
+            task = asyncio.ensure_future(
+                self._execute_with_failover(prompt, system_prompt, [model], api_base, max_tokens, schema)
+            )
+            running[task] = next_index
+            next_index += 1
+        
+        def finish(index: int) -> HedgeRecord:
+            model, api_base = targets[index] if index >= 0 else ("", "")
+            record = HedgeRecord(
+                winner_model=model,
+                winner_endpoint=api_base,
+                winner_index=index,
+                launched=next_index,
+                rejected=rejected,
+                latency=time.perf_counter() - started
+            )
+            self.hedge_records.append(record)
+            return record
+        
+        launch()
+        try:
+            while running:
+                timeout = self.hedge_delay if next_index < len(targets) else None
+                done, _ = await asyncio.wait(
+                    running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 等待超时，发出下一路对冲请求
+                    launch()
+                    continue
+                
+                for task in done:
+                    index = running.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                    else:
+                        response = task.result()
+                        if validator is None or validator(response):
+                            record = finish(index)
+                            print(f"Hedge winner: {record.winner_model} @ {record.winner_endpoint} "
+                                  f"in {record.latency:.2f}s")
+                            return response
+                        rejected += 1
+                        if fallback_response is None:
+                            fallback_response = response
+                    # 该路请求没有可用结果，立即启动下一路
+                    if next_index < len(targets):
+                        launch()
+        finally:
+            for task in running:
+                task.cancel()
+        
+        # 所有请求都没有通过校验时，退回首个成功返回的响应，交由解析阶段处理
+        if fallback_response is not None:
+            finish(-1)
+            return fallback_response
+        finish(-1)
+        raise last_error or LLMRequestError("All hedged requests failed")
+
+    def hedge_winners(self) -> Counter:
+        """
+        统计对冲请求中各目标胜出的次数
+        
+        Returns:
+            Counter: "模型 @ 端点"到胜出次数的映射，全部失败记为"none"
+        """
+        return Counter(
+            f"{record.winner_model} @ {record.winner_endpoint}" if record.winner_index >= 0 else "none"
+            for record in self.hedge_records
+        )
+
+    def _record_metric(self, requested_model: str, served_model: str, endpoint: str,
+                       attempts: int, started: float, error: Optional[Exception] = None):
+        """记录一次请求的指标"""
+        self.request_metrics.append(RequestMetric(
+            requested_model=requested_model,
+            served_model=served_model,
+            endpoint=endpoint,
+            attempts=attempts,
+            latency=time.perf_counter() - started,
+            success=error is None,
+            error=str(error) if error else ""
+        ))
+
+    def model_usage(self) -> Counter:
+        """
+        统计各模型完成的请求数
+        
+        Returns:
+            Counter: 模型名称到成功请求数的映射
+        """
+        return Counter(metric.served_model for metric in self.request_metrics if metric.success)
+
+    def _cache_key(self, prompt: str, system_prompt: str, max_tokens: Optional[int] = None,
+                   schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        计算请求对应的缓存键
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            max_tokens (int, optional): 最大生成令牌数，默认使用MAX_TOKENS
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema
+            
+        Returns:
+            str: 缓存键
+        """
+        fields = dict(
+            model=self.model,
+            api_base=self.api_base,
+            system_prompt=system_prompt,
+            prompt=prompt,
+            temperature=TEMPERATURE,
+            max_tokens=max_tokens or MAX_TOKENS
+        )
+        # 不约束格式的请求保持原有的缓存键
+        if schema:
+            fields["schema"] = schema
+        return ResponseCache.make_key(**fields)
     
-    async def _local_model_request(self, prompt: str, system_prompt: str) -> str:
+    async def _local_model_request(self, prompt: str, system_prompt: str,
+                                   model: Optional[str] = None,
+                                   api_base: Optional[str] = None,
+                                   max_tokens: Optional[int] = None,
+                                   schema: Optional[Dict[str, Any]] = None) -> str:
         """
         发送请求到本地模型
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            model (str, optional): 使用的模型，默认为self.model
+            api_base (str, optional): 本地模型服务地址，默认为self.api_base
+            max_tokens (int, optional): 最大生成令牌数(num_predict)，默认使用MAX_TOKENS
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema，作为Ollama的format参数
+        """
+        path, data = self._local_request_data(prompt, system_prompt, model, max_tokens, stream=False,
+                                              schema=schema)
+        
+        # 发送请求到本地模型
+        print(f"Sending request to local model {data['model']}...")
+        session = await self._get_session()
+        async with session.post(f"{api_base or self.api_base}{path}", json=data) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise LLMRequestError.from_response(response.status, error_text)
+            
+            result = await response.json()
+            text = self._local_response_text(result)
+            if text is None:
+                raise LLMRequestError("Invalid response format from API")
+            
+            # 记录实际预填充的令牌数，命中KV缓存的共享前缀不计入
+            prompt_eval_count = result.get("prompt_eval_count", 0)
+            prompt_eval_duration = result.get("prompt_eval_duration", 0) / 1e9
+            self.prefill_tokens += prompt_eval_count
+            self.prefill_seconds += prompt_eval_duration
+            
+            # 获取完整响应内容并返回，附带结束原因用于判断是否被截断
+            return ModelResponse.create(text, result.get("done_reason"), prompt_eval_count, prompt_eval_duration)
+
+    def _local_request_data(self, prompt: str, system_prompt: str, model: Optional[str],
+                            max_tokens: Optional[int], stream: bool,
+                            schema: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        构建本地模型的请求路径和请求数据
+        使用/api/chat时系统提示词作为第一条消息，所有请求共享的系统提示词位于最前面，
+        Ollama可以复用上一次请求留下的KV缓存，只预填充不同的部分
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            model (str, optional): 使用的模型，默认为self.model
+            max_tokens (int, optional): 最大生成令牌数(num_predict)，默认使用MAX_TOKENS
+            stream (bool): 是否流式返回
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema，作为Ollama的format参数
+            
+        Returns:
+            Tuple[str, Dict[str, Any]]: 请求路径和请求数据
         """
-        # 构建请求数据
         data = {
-            "model": self.model,
-            "prompt": f"{system_prompt}\n\n{prompt}",
-            "stream": False,
+            "model": model or self.model,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": TEMPERATURE,
-                "num_predict": MAX_TOKENS
+                "num_predict": max_tokens or MAX_TOKENS
             }
         }
+        if schema:
+            data["format"] = schema
+        if not self.chat_api:
+            data["prompt"] = f"{system_prompt}\n\n{prompt}"
+            return "/api/generate", data
+        data["messages"] = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        return "/api/chat", data
+
+    @staticmethod
+    def _local_response_text(result: Dict[str, Any]) -> Optional[str]:
+        """从/api/chat或/api/generate的响应（或流式响应的一行）中取出生成的文本，格式不符时返回None"""
+        if "message" in result:
+            return result["message"].get("content", "")
+        return result.get("response")
+    
+    async def _local_model_stream(self, prompt: str, system_prompt: str,
+                                  schema: Optional[Dict[str, Any]] = None,
+                                  model: Optional[str] = None,
+                                  api_base: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        以流式方式请求本地模型，解析Ollama返回的NDJSON流
+        生成总时长不设上限，但连接和两次读取之间的等待都受request_timeout限制
         
-        # 发送请求到本地模型
-        print("Sending request to local model...")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.api_base}/api/generate", json=data) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"API request failed with status {response.status}: {error_text}")
+        Raises:
+            LLMRequestError: 请求失败或模型在流中返回错误
+        """
+        import aiohttp
+        path, data = self._local_request_data(prompt, system_prompt, model, None, stream=True, schema=schema)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.request_timeout,
+                                        sock_read=self.request_timeout)
+        
+        print(f"Streaming request to local model {data['model']}...")
+        session = await self._get_session()
+        async with session.post(f"{api_base or self.api_base}{path}", json=data, timeout=timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise LLMRequestError.from_response(response.status, error_text)
+            
+            # 每一行是一个JSON对象，包含本次生成的文本片段
+            async for line in response.content:
+                line = line.strip()
+                if not line:
+                    continue
+                result = json.loads(line)
+                if "error" in result:
+                    raise LLMRequestError(f"Model error: {result['error']}")
+                text = self._local_response_text(result)
+                if text:
+                    yield text
+                if result.get("done"):
+                    break
+    
+    async def _stream_with_failover(self, prompt: str, system_prompt: str,
+                                    schema: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        带重试、熔断和模型故障转移的流式请求
+        错误分类与_execute_with_failover一致；已产出的片段无法撤回，
+        因此只在产出第一个片段之前重试或切换模型，之后的错误直接抛出
+        
+        Args:
+            prompt (str): 用户提示词
+            system_prompt (str): 系统提示词
+            schema (Dict[str, Any], optional): 约束输出格式的JSON Schema
+            
+        Yields:
+            Tuple[str, str]: 产出该片段的模型和响应文本片段
+            
+        Raises:
+            LLMRequestError: 所有候选模型均失败，或输出中途失败
+        """
+        models = self._candidate_models()
+        endpoint = self.api_base
+        breaker = self._breaker(endpoint)
+        started = time.perf_counter()
+        attempts = 0
+        last_error: Optional[LLMRequestError] = None
+        
+        for model in models:
+            for retry in range(self.max_retries + 1):
+                if not breaker.allow():
+                    last_error = CircuitOpenError(endpoint)
+                    self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+                    raise last_error
                 
-                result = await response.json()
-                if "response" not in result:
-                    raise Exception("Invalid response format from API")
+                attempts += 1
+                produced = False
+                try:
+                    async for chunk in self._local_model_stream(prompt, system_prompt, schema, model, endpoint):
+                        produced = True
+                        yield model, chunk
+                except asyncio.TimeoutError:
+                    last_error = LLMRequestError(f"Stream from {model} timed out after {self.request_timeout}s")
+                except _client_error() as e:
+                    last_error = LLMRequestError(f"Connection error: {str(e)}")
+                except LLMRequestError as e:
+                    last_error = e
+                except BaseException:
+                    # 被取消、调用方提前结束迭代或意外错误，不计入端点的成败
+                    breaker.release()
+                    raise
+                else:
+                    breaker.record_success()
+                    self._record_metric(models[0], model, endpoint, attempts, started)
+                    return
                 
-                # 获取完整响应内容并返回
-                return result["response"]
+                print(f"Stream from model {model} failed (attempt {retry + 1}): {last_error}")
+                if last_error.model_unavailable and last_error.status == 404:
+                    # 模型不存在不代表端点故障
+                    breaker.release()
+                    break
+                breaker.record_failure()
+                if produced or not (last_error.retryable or last_error.model_unavailable):
+                    self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+                    raise last_error
+                if last_error.model_unavailable:
+                    break
+                if retry < self.max_retries:
+                    await asyncio.sleep(backoff_delay(retry, RETRY_DELAY, RETRY_MAX_DELAY))
+            
+            print(f"Model {model} unavailable, failing over to next model")
+        
+        self._record_metric(models[0], "", endpoint, attempts, started, last_error)
+        raise last_error or LLMRequestError("No candidate models available")
     
-    async def _remote_api_request(self, prompt: str, system_prompt: str) -> str:
+    async def _remote_api_request(self, prompt: str, system_prompt: str,
+                                  api_base: Optional[str] = None,
+                                  schema: Optional[Dict[str, Any]] = None) -> str:
         """
         发送请求到远程API（如Magic API）
+        Magic API的{message, conversation_id}请求格式不支持约束输出，schema参数只为与本地请求保持相同的签名，
+        远程响应仍按提示词中的JSON要求解析
         """
+        api_base = api_base or self.api_base
         # 构建请求数据 - 使用正确的Magic API格式
         # 尝试在message中添加指令，提示API返回JSON格式
         message = f"""请以JSON格式回复。
@@ -115,40 +922,34 @@ class LLMEngine:
             "message": message,
             "conversation_id": ""  # 如果需要持续对话，可以保存并重用会话ID
         }
-        
-        # 创建SSL上下文，禁用证书验证
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        
+
         # 发送请求到远程API
-        print(f"Sending request to remote API: {self.api_base}")
-        print(f"Request data: {json.dumps(data, ensure_ascii=False)}")
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.api_base, 
-                                   headers=self.headers, 
-                                   json=data,
-                                   ssl=ssl_context) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    print(f"Error response: {error_text}")
-                    raise Exception(f"API请求失败，状态码 {response.status}: {error_text}")
-                
-                result = await response.json()
-                print(f"Response status: {result.get('code')}, message: {result.get('message')}")
-                
-                # 处理Magic API的响应格式
-                if result.get('code') == 1000 and result.get('message') == 'ok' and result.get('data'):
-                    data = result['data']
-                    if 'messages' in data and len(data['messages']) > 0:
-                        message = data['messages'][0].get('message', {})
-                        content = message.get('content', '')
-                        if content:
-                            return content
-                
-                # 如果无法解析，返回整个响应
-                return f"无法解析API响应: {json.dumps(result, ensure_ascii=False)}"
+        print(f"Sending request to remote API: {api_base}")
+        
+        session = await self._get_session()
+        async with session.post(api_base, 
+                               headers=self.headers, 
+                               json=data,
+                               ssl=self.ssl_context) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                print(f"Error response: {error_text}")
+                raise LLMRequestError.from_response(response.status, error_text)
+            
+            result = await response.json()
+            print(f"Response status: {result.get('code')}, message: {result.get('message')}")
+            
+            # 处理Magic API的响应格式
+            if result.get('code') == 1000 and result.get('message') == 'ok' and result.get('data'):
+                data = result['data']
+                if 'messages' in data and len(data['messages']) > 0:
+                    message = data['messages'][0].get('message', {})
+                    content = message.get('content', '')
+                    if content:
+                        return content
+            
+            # 如果无法解析，返回整个响应
+            return f"无法解析API响应: {json.dumps(result, ensure_ascii=False)}"
 
     async def analyze_requirements(self, requirements: str) -> str:
         """
@@ -0,0 +1,128 @@
+"""
+生成清单模块
+记录需求文档每个章节的内容哈希及其生成的测试用例，
+文档修订后只需重新生成新增或修改过的章节，未变化章节的测试用例及其ID原样复用
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel
+from src.core.chunker import RequirementSection
+import hashlib
+import json
+import os
+
+
+class ManifestSection(BaseModel):
+    """
+    清单章节数据模型
+    定义单个章节的内容哈希及其测试用例
+    """
+    key: str                                # 章节键（章节标题，重名时附加序号）
+    title: str                              # 章节标题
+    content_hash: str                       # 章节内容的SHA-256哈希值
+    test_cases: List[Dict[str, Any]] = []   # 该章节生成的测试用例
+
+
+class GenerationManifest(BaseModel):
+    """
+    生成清单数据模型
+    与导出文件一起保存，记录上一次生成时各章节的状态
+    """
+    requirement_type: Optional[str] = None  # 生成时使用的需求类型
+    id_prefix: str = ""                     # 用例ID命名空间
+    next_id: int = 1                        # 下一个新用例使用的编号，删除的用例编号不会被复用
+    sections: List[ManifestSection] = []    # 按文档顺序排列的章节
+
+    @classmethod
+    def load(cls, path: str) -> Optional["GenerationManifest"]:
+        """
+        从文件加载清单
+
+        Args:
+            path (str): 清单文件路径
+
+        Returns:
+            Optional[GenerationManifest]: 清单对象，文件不存在或无法解析时返回None
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.parse_obj(json.load(f))
+        except Exception as e:
+            print(f"Ignoring unreadable manifest {path}: {str(e)}")
+            return None
+
+    def save(self, path: str):
+        """
+        保存清单，先写入临时文件再替换，避免中断时留下不完整的清单
+
+        Args:
+            path (str): 清单文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+
+def content_hash(text: str) -> str:
+    """
+    计算章节内容哈希
+
+    Args:
+        text (str): 章节文本
+
+    Returns:
+        str: SHA-256哈希值
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def section_keys(sections: List[RequirementSection]) -> List[str]:
+    """
+    为章节生成清单中使用的键
+    以章节标题为键，在章节插入或删除后仍能对应到同一章节；重名的标题附加出现序号
+
+    Args:
+        sections (List[RequirementSection]): 按文档顺序排列的章节
+
+    Returns:
+        List[str]: 与章节顺序一致的键列表
+    """
+    keys = []
+    seen: Dict[str, int] = {}
+    for section in sections:
+        title = section.title or "(untitled)"
+        count = seen.get(title, 0)
+        seen[title] = count + 1
+        keys.append(title if count == 0 else f"{title} #{count + 1}")
+    return keys
+
+
+def diff_sections(manifest: Optional[GenerationManifest], sections: List[RequirementSection]
+                  ) -> Tuple[List[str], Dict[str, ManifestSection], List[str]]:
+    """
+    将当前文档章节与清单对比
+
+    Args:
+        manifest (GenerationManifest, optional): 上一次生成的清单，为空时所有章节都需要生成
+        sections (List[RequirementSection]): 当前文档的章节
+
+    Returns:
+        Tuple[List[str], Dict[str, ManifestSection], List[str]]:
+            当前章节的键列表、内容未变化可以复用的章节（按键索引）、已从文档中删除的章节键
+    """
+    keys = section_keys(sections)
+    previous = {entry.key: entry for entry in manifest.sections} if manifest else {}
+    unchanged = {}
+    for key, section in zip(keys, sections):
+        entry = previous.get(key)
+        if entry is not None and entry.content_hash == content_hash(section.text):
+            unchanged[key] = entry
+    current = set(keys)
+    removed = [key for key in previous if key not in current]
+    return keys, unchanged, removed
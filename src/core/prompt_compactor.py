@@ -0,0 +1,311 @@
+"""
+提示词压缩模块
+需求文档多由Word转换为纯文本，含有大量空行、逐格换行的表格、修订记录、目录和重复出现的版式残留
+（如代码块的语言选择菜单）。发送给LLM之前先去掉这些内容，减少占用的上下文窗口和预填充时间
+
+压缩只删除版式噪声和与测试无关的章节，正文内容及其顺序保持不变
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+import statistics
+
+from pydantic import BaseModel
+
+from src.config import (
+    COMPACTION_DROP_SECTIONS, COMPACTION_TABLE_CELL_MAX_CHARS, COMPACTION_TABLE_MIN_CELLS,
+    COMPACTION_BOILERPLATE_MIN_LINES, COMPACTION_BOILERPLATE_MIN_CHARS,
+    COMPACTION_BOILERPLATE_REPEATS, COMPACTION_BOILERPLATE_LINES
+)
+from src.core.chunker import MARKDOWN_HEADING_PATTERN, _parse_heading
+from src.utils.text_utils import estimate_tokens
+
+# 行内连续的空白（含全角空格、不间断空格和制表符）合并为一个空格
+_SPACE_PATTERN = re.compile(r'[ \t\u00a0\u3000]+')
+# 零宽字符和BOM直接删除
+_INVISIBLE_PATTERN = re.compile(r'[\u200b-\u200d\u2060\ufeff]')
+# 目录条目末尾的引导点和页码，如"1.1 文档修订记录......3"、"文档概述 1"
+_TOC_PAGE_PATTERN = re.compile(r'[\s\.\u00b7\u2026]*\d+$')
+# 列表项开头，这类短行属于正文而不是表格单元格
+_LIST_ITEM_PATTERN = re.compile(r'^(\d+[\.、\)）]|[a-zA-Z][\.、\)）]|[•·\-\*>])')
+# 伪代码行，如"if 活动类别优先级不同 ➔ 取优先级高的活动"
+_CODE_LINE_PATTERN = re.compile(r'^(if|else|elif|for|while|return)\b|[➔→]', re.IGNORECASE)
+# 中日韩文字，含有这些字符的行是正文，不会作为版式残留删除
+_CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+# 以这些标点结尾的短行是句子而不是表格单元格
+_SENTENCE_ENDINGS = set('。；;：:，,！？!?')
+# 单元格分隔符
+CELL_SEPARATOR = "|"
+# 按单元格长度推断列数时，各列长度变异系数的平均值不超过该值才认为列数可信
+_COLUMN_PROFILE_TOLERANCE = 0.25
+# 按单元格长度推断列数时，各列平均长度的变异系数至少为该值（且不小于列内的变异系数）才认为存在列结构，
+# 长度相近的普通短行（如没有句末标点的操作步骤）不会被当作表格
+_COLUMN_SPREAD_MIN = 0.2
+# 推断列数时尝试的最大列数
+_MAX_COLUMNS = 8
+
+
+class CompactionResult(BaseModel):
+    """
+    压缩结果数据模型
+    记录压缩后的文本及压缩前后的令牌估算
+    """
+    text: str                        # 压缩后的文本
+    tokens_before: int               # 压缩前估算的令牌数
+    tokens_after: int                # 压缩后估算的令牌数
+    dropped_sections: List[str] = [] # 删除的章节标题
+    boilerplate_lines: int = 0       # 删除的重复版式行数
+    tables: int = 0                  # 重建的表格数
+
+    @property
+    def saved_ratio(self) -> float:
+        """节省的令牌比例(0~1)"""
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def normalize_lines(text: str) -> List[str]:
+    """
+    合并空白：去掉每行首尾空白和零宽字符，行内连续空白合并为一个空格，删除空行
+
+    Args:
+        text (str): 原始文本
+
+    Returns:
+        List[str]: 非空行列表
+    """
+    lines = []
+    for line in text.splitlines():
+        line = _SPACE_PATTERN.sub(" ", _INVISIBLE_PATTERN.sub("", line)).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _heading_number(line: str, markdown: bool) -> Optional[tuple]:
+    """返回标题行的编号（Markdown标题为层级占位），不是标题时返回None"""
+    heading = _parse_heading(line, markdown)
+    return heading[0] if heading else None
+
+
+def _heading_title(line: str) -> str:
+    """去掉标题行的编号和Markdown标记，得到用于匹配的标题文本"""
+    line = re.sub(r'^#{1,6}\s+', '', line)
+    return re.sub(r'^\d+(?:\.\d+)*(?:[\.、]\s*|\s+)', '', line).strip()
+
+
+def drop_sections(lines: List[str], titles: List[str] = None) -> Tuple[List[str], List[str]]:
+    """
+    删除修订记录、评审记录、目录等与测试无关的章节
+    编号或Markdown标题的章节删除到下一个同级或更高级的标题为止；
+    没有编号的"目录"删除到正文中再次出现第一个目录条目为止
+
+    Args:
+        lines (List[str]): 非空行列表
+        titles (List[str], optional): 要删除的章节标题（不区分大小写），默认使用COMPACTION_DROP_SECTIONS
+
+    Returns:
+        Tuple[List[str], List[str]]: 保留的行，以及删除的章节标题
+    """
+    titles = {title.lower() for title in (COMPACTION_DROP_SECTIONS if titles is None else titles)}
+    markdown = any(MARKDOWN_HEADING_PATTERN.match(line) for line in lines)
+    kept, dropped = [], []
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        title = _heading_title(line).lower()
+        number = _heading_number(line, markdown)
+        if title not in titles or (number is None and line.lower() != title):
+            kept.append(line)
+            position += 1
+            continue
+        dropped.append(line)
+        position += 1
+        if number is not None:
+            while position < len(lines):
+                next_number = _heading_number(lines[position], markdown)
+                if next_number is not None and len(next_number) <= len(number):
+                    break
+                position += 1
+        else:
+            position = _skip_table_of_contents(lines, position)
+    return kept, dropped
+
+
+def _skip_table_of_contents(lines: List[str], position: int) -> int:
+    """
+    跳过目录条目，返回正文开始的位置
+    正文的第一个标题与第一个目录条目相同，据此判断目录结束；找不到时在第一个非目录条目处结束
+    """
+    first_entry = None
+    start = position
+    while position < len(lines):
+        line = lines[position]
+        entry = _TOC_PAGE_PATTERN.sub("", line) or line
+        if first_entry is None:
+            first_entry = entry
+        elif position > start and line == first_entry:
+            return position
+        if entry == line and _heading_number(line, False) is None:
+            # 既没有页码也不像标题，目录已经结束
+            return position
+        position += 1
+    return position
+
+
+def _is_layout_line(line: str, layout_lines: set) -> bool:
+    """判断一行是否可能是版式残留：不是标题，且不含中文（如语言菜单中的语言名）或属于COMPACTION_BOILERPLATE_LINES"""
+    if MARKDOWN_HEADING_PATTERN.match(line) or _heading_number(line, False) is not None:
+        return False
+    return line in layout_lines or not _CJK_PATTERN.search(line)
+
+
+def remove_boilerplate(lines: List[str], min_lines: int = None, min_chars: int = None,
+                       repeats: int = None, layout_lines: List[str] = None) -> Tuple[List[str], int]:
+    """
+    删除重复出现的版式残留（如每个代码块前的语言菜单）
+    只有连续min_lines行都是版式行（不含中文或属于layout_lines）的片段才可能被删除，
+    这样的片段完全相同地出现repeats次及以上时全部删除；含有中文的正文即使重复出现也原样保留
+
+    Args:
+        lines (List[str]): 非空行列表
+        min_lines (int, optional): 片段的最少行数，默认使用COMPACTION_BOILERPLATE_MIN_LINES
+        min_chars (int, optional): 片段的最少字符数，避免把表格中重复的短单元格当作版式残留，
+            默认使用COMPACTION_BOILERPLATE_MIN_CHARS
+        repeats (int, optional): 删除所需的出现次数，默认使用COMPACTION_BOILERPLATE_REPEATS
+        layout_lines (List[str], optional): 含有中文但属于版式残留的行（完全匹配），
+            默认使用COMPACTION_BOILERPLATE_LINES
+
+    Returns:
+        Tuple[List[str], int]: 保留的行，以及删除的行数
+    """
+    min_lines = min_lines or COMPACTION_BOILERPLATE_MIN_LINES
+    min_chars = min_chars or COMPACTION_BOILERPLATE_MIN_CHARS
+    repeats = repeats or COMPACTION_BOILERPLATE_REPEATS
+    layout_lines = set(COMPACTION_BOILERPLATE_LINES if layout_lines is None else layout_lines)
+    layout = [_is_layout_line(line, layout_lines) for line in lines]
+
+    # 只统计全部由版式行组成的片段
+    windows: Dict[int, tuple] = {}
+    counts: Dict[tuple, int] = {}
+    run = 0
+    for index, flag in enumerate(layout):
+        run = run + 1 if flag else 0
+        if run < min_lines:
+            continue
+        start = index - min_lines + 1
+        window = tuple(lines[start:index + 1])
+        if sum(len(line) for line in window) < min_chars:
+            continue
+        windows[start] = window
+        counts[window] = counts.get(window, 0) + 1
+
+    removed = [False] * len(lines)
+    for start, window in windows.items():
+        if counts[window] >= repeats:
+            for offset in range(min_lines):
+                removed[start + offset] = True
+    kept = [line for line, flag in zip(lines, removed) if not flag]
+    return kept, len(lines) - len(kept)
+
+
+def _is_cell(line: str) -> bool:
+    """判断一行是否像是被逐格拆开的表格单元格：较短、不是标题、列表项、伪代码或句子"""
+    return (len(line) <= COMPACTION_TABLE_CELL_MAX_CHARS
+            and line[-1] not in _SENTENCE_ENDINGS
+            and not _LIST_ITEM_PATTERN.match(line)
+            and not _CODE_LINE_PATTERN.search(line)
+            and _heading_number(line, False) is None)
+
+
+def _infer_columns(cells: List[str]) -> Optional[int]:
+    """
+    推断逐格拆开的表格的列数，无法可靠推断时返回None
+
+    先检查矩阵表格：除表头外至少两行，且每一行的行名依次与表头的列名相同；
+    否则取使每一列单元格长度都较为一致、而各列之间长度明显不同的最小列数
+    """
+    for columns in range(2, min(_MAX_COLUMNS, len(cells) // 3) + 1):
+        if len(cells) % columns:
+            continue
+        names = range(1, min(columns, len(cells) // columns))
+        if all(cells[row * columns] == cells[row] for row in names):
+            return columns
+    for columns in range(2, min(_MAX_COLUMNS, len(cells) // 3) + 1):
+        if len(cells) % columns:
+            continue
+        body = [cells[index:index + columns] for index in range(columns, len(cells), columns)]
+        variations, means = [], []
+        for column in zip(*body):
+            lengths = [len(cell) for cell in column]
+            means.append(statistics.mean(lengths))
+            variations.append(statistics.pstdev(lengths) / means[-1])
+        variation = statistics.mean(variations)
+        spread = statistics.pstdev(means) / statistics.mean(means)
+        if variation <= _COLUMN_PROFILE_TOLERANCE and spread >= max(_COLUMN_SPREAD_MIN, variation):
+            return columns
+    return None
+
+
+def rebuild_tables(lines: List[str]) -> Tuple[List[str], int]:
+    """
+    将逐格换行的表格重建为紧凑的行，单元格之间用"|"分隔
+    连续COMPACTION_TABLE_MIN_CELLS个及以上的单元格行可能是一个表格，只有能推断出列数时才重建，
+    每行对应表格的一行；合并单元格、没有句末标点的步骤列表等无法推断列数的短行原样保留
+
+    Args:
+        lines (List[str]): 非空行列表
+
+    Returns:
+        Tuple[List[str], int]: 重建后的行，以及重建的表格数
+    """
+    result: List[str] = []
+    run: List[str] = []
+    tables = 0
+
+    def flush():
+        nonlocal tables
+        if len(run) < COMPACTION_TABLE_MIN_CELLS:
+            result.extend(run)
+            return
+        columns = _infer_columns(run)
+        if columns is None:
+            result.extend(run)
+            return
+        tables += 1
+        result.extend(CELL_SEPARATOR.join(run[index:index + columns])
+                      for index in range(0, len(run), columns))
+
+    for line in lines:
+        if _is_cell(line):
+            run.append(line)
+            continue
+        flush()
+        run = []
+        result.append(line)
+    flush()
+    return result, tables
+
+
+def compact_requirements(text: str) -> CompactionResult:
+    """
+    压缩需求文档：合并空白，删除修订记录和目录等章节，删除重复的版式残留，重建逐格换行的表格
+
+    Args:
+        text (str): 需求文档文本
+
+    Returns:
+        CompactionResult: 压缩后的文本和统计信息
+    """
+    lines = normalize_lines(text)
+    lines, dropped = drop_sections(lines)
+    lines, boilerplate = remove_boilerplate(lines)
+    lines, tables = rebuild_tables(lines)
+    compacted = "\n".join(lines)
+    return CompactionResult(
+        text=compacted,
+        tokens_before=estimate_tokens(text),
+        tokens_after=estimate_tokens(compacted),
+        dropped_sections=dropped,
+        boilerplate_lines=boilerplate,
+        tables=tables
+    )
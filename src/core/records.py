@@ -0,0 +1,78 @@
+"""
+导出记录模块
+定义测试用例的扁平化只读表示，供各导出器共享
+
+CaseRecord/StepRecord与TestCase/TestStep拥有同名属性，导出器可以不加区分地使用两者；
+记录由元组构成，不可变、可以在线程间安全共享，序列化到进程池的开销也比pydantic模型小得多
+"""
+
+from typing import Iterable, List, NamedTuple, Tuple
+import hashlib
+import json
+
+
+class StepRecord(NamedTuple):
+    """测试步骤记录"""
+    step_number: int      # 步骤编号
+    description: str      # 步骤描述
+    expected_result: str  # 预期结果
+
+
+class CaseRecord(NamedTuple):
+    """测试用例记录"""
+    id: str                          # 测试用例唯一标识
+    module: str                      # 所属模块名称
+    title: str                       # 测试用例标题
+    priority: str                    # 优先级(高/中/低)
+    preconditions: Tuple[str, ...]   # 前置条件
+    steps: Tuple[StepRecord, ...]    # 测试步骤
+
+
+def to_record(test_case) -> CaseRecord:
+    """
+    将测试用例转换为记录，已经是记录时原样返回
+
+    Args:
+        test_case (TestCase | CaseRecord): 测试用例
+
+    Returns:
+        CaseRecord: 测试用例记录
+    """
+    if isinstance(test_case, CaseRecord):
+        return test_case
+    return CaseRecord(
+        test_case.id,
+        test_case.module,
+        test_case.title,
+        test_case.priority,
+        tuple(test_case.preconditions),
+        tuple(StepRecord(step.step_number, step.description, step.expected_result)
+              for step in test_case.steps)
+    )
+
+
+def to_records(test_cases: Iterable) -> List[CaseRecord]:
+    """
+    将一组测试用例转换为记录列表
+
+    Args:
+        test_cases (Iterable[TestCase | CaseRecord]): 测试用例
+
+    Returns:
+        List[CaseRecord]: 测试用例记录列表
+    """
+    return [to_record(test_case) for test_case in test_cases]
+
+
+def case_content_hash(test_case) -> str:
+    """
+    计算测试用例内容的哈希值，不包含用例编号（编号带有生成日期，同样的内容每次生成编号都不同）
+
+    Args:
+        test_case (TestCase | CaseRecord): 测试用例
+
+    Returns:
+        str: 内容哈希值(32位十六进制)
+    """
+    payload = json.dumps(to_record(test_case)[1:], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
@@ -0,0 +1,170 @@
+"""
+请求容错模块
+提供LLM请求的错误分类、带抖动的指数退避、按端点的熔断器以及请求指标记录
+"""
+
+from typing import Optional
+from pydantic import BaseModel
+import random
+import time
+
+
+class LLMRequestError(Exception):
+    """
+    LLM请求错误
+    携带HTTP状态码及错误分类，供重试和故障转移逻辑判断下一步动作
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retryable: bool = True, model_unavailable: bool = False):
+        """
+        Args:
+            message (str): 错误信息
+            status (int, optional): HTTP状态码
+            retryable (bool): 在同一模型上重试是否可能成功
+            model_unavailable (bool): 模型不存在或过载，应切换到备选模型
+        """
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.model_unavailable = model_unavailable
+
+    @classmethod
+    def from_response(cls, status: int, error_text: str) -> "LLMRequestError":
+        """
+        根据HTTP响应状态码和错误内容创建错误对象
+
+        Args:
+            status (int): HTTP状态码
+            error_text (str): 响应内容
+
+        Returns:
+            LLMRequestError: 分类后的错误
+        """
+        message = f"API request failed with status {status}: {error_text}"
+        lowered = error_text.lower()
+        if status == 404 or ("model" in lowered and "not found" in lowered):
+            # 模型不存在，重试无意义，直接切换模型
+            return cls(message, status, retryable=False, model_unavailable=True)
+        if status in (429, 503):
+            # 模型过载或限流
+            return cls(message, status, retryable=True, model_unavailable=True)
+        if status >= 500 or status == 408:
+            return cls(message, status, retryable=True)
+        # 其余4xx错误（参数错误、认证失败等）重试和切换模型都无法解决
+        return cls(message, status, retryable=False)
+
+
+class CircuitOpenError(LLMRequestError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, endpoint: str):
+        super().__init__(f"Circuit breaker open for endpoint {endpoint}", retryable=False)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    计算带完全抖动的指数退避等待时间
+
+    Args:
+        attempt (int): 已失败的次数（从0开始）
+        base_delay (float): 基础等待时间(秒)
+        max_delay (float): 最长等待时间(秒)
+
+    Returns:
+        float: 本次应等待的秒数，在[0, min(max_delay, base_delay * 2^attempt)]之间随机
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    连续失败达到阈值后打开，在冷却时间内拒绝请求；冷却结束后只放行一个探测请求（半开），
+    探测请求有结果之前其他请求仍被拒绝，探测成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            failure_threshold (int): 打开熔断器所需的连续失败次数
+            reset_timeout (float): 打开后的冷却时间(秒)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        # 半开状态下是否已放行探测请求，以及放行的时间
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+
+    def allow(self) -> bool:
+        """
+        判断当前是否允许发送请求
+        半开状态下只放行一个探测请求；探测请求超过冷却时间仍没有结果时视为丢失，再放行一个
+
+        Returns:
+            bool: 是否允许
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        elif self.probe_in_flight and now - self.probe_started < self.reset_timeout:
+            return False
+        self.probe_in_flight = True
+        self.probe_started = now
+        return True
+
+    def release(self):
+        """请求结束但无法判断端点是否恢复（如被取消、模型不存在）时，释放探测名额"""
+        self.probe_in_flight = False
+
+    def record_success(self):
+        """记录一次成功请求"""
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        """记录一次失败请求"""
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class RequestMetric(BaseModel):
+    """
+    请求指标数据模型
+    记录每次generate_response最终由哪个模型完成以及耗时
+    """
+    requested_model: str     # 请求的首选模型
+    served_model: str        # 实际完成请求的模型，失败时为空
+    endpoint: str            # 请求的端点
+    attempts: int            # 总尝试次数（含重试和故障转移）
+    latency: float           # 总耗时(秒)
+    success: bool            # 是否成功
+    error: str = ""          # 最后一次错误信息
+
+
+class HedgeRecord(BaseModel):
+    """
+    对冲请求记录数据模型
+    记录每次对冲请求中胜出的目标，用于调整对冲等待时间
+    """
+    winner_model: str        # 胜出的模型，全部失败时为空
+    winner_endpoint: str     # 胜出的端点
+    winner_index: int        # 胜出目标的序号，0表示首选请求，-1表示全部失败
+    launched: int            # 实际发出的请求数
+    rejected: int            # 返回了但未通过校验的响应数
+    latency: float           # 从首个请求发出到得到结果的耗时(秒)
@@ -0,0 +1,170 @@
+"""
+LLM响应缓存模块
+基于SQLite的持久化、内容寻址的响应缓存，支持按容量和存活时间的LRU淘汰，
+可以被多个进程同时安全访问
+"""
+
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+class ResponseCache:
+    """
+    LLM响应缓存类
+    使用请求内容的哈希值作为键，将模型响应持久化到磁盘
+
+    缓存数据库使用WAL日志模式，多个进程可以同时读写同一个缓存目录。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: float):
+        """
+        初始化响应缓存
+
+        Args:
+            cache_dir (str): 缓存目录
+            max_bytes (int): 缓存内容总大小上限(字节)，超出后按最近最少使用淘汰
+            max_age (float): 缓存条目的最长存活时间(秒)，小于等于0表示不过期
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # 当前实例的命中/未命中计数
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "responses.sqlite3")
+        # isolation_level=None 表示由我们显式控制事务
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)"
+        )
+
+    @staticmethod
+    def make_key(**fields: Any) -> str:
+        """
+        根据请求参数计算缓存键
+
+        Args:
+            **fields: 参与缓存键计算的请求参数（模型、API地址、提示词、温度等）
+
+        Returns:
+            str: 请求内容的SHA-256哈希值
+        """
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[str]: 命中时返回缓存的响应文本，否则返回None
+        """
+        row = self._conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or self._is_expired(row[1], now):
+            self.misses += 1
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: str):
+        """
+        写入缓存并按需淘汰旧条目
+
+        Args:
+            key (str): 缓存键
+            value (str): 响应文本
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        # BEGIN IMMEDIATE 获取写锁，保证多进程并发写入和淘汰的一致性
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict(now)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.max_age > 0 and now - created_at > self.max_age
+
+    def _evict(self, now: float):
+        """
+        淘汰过期条目，并在总大小超限时删除最近最少使用的条目
+        必须在写事务中调用
+        """
+        if self.max_age > 0:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # 按访问时间从旧到新删除，直到总大小回到上限以内
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        """清空缓存"""
+        self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict[str, Any]: 命中数、未命中数、条目数和总大小
+        """
+        entries, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
@@ -3,14 +3,28 @@
 负责生成和管理测试用例，包括测试用例的数据模型定义和生成逻辑
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple, Type
+from collections import Counter
 from pydantic import BaseModel
 from src.core.llm_engine import LLMEngine
-from src.config import DEFAULT_TEST_PRIORITY_LEVELS, PRIORITY_MAPPING, LEGACY_PRIORITY_MAPPING
+from src.config import (
+    DEFAULT_TEST_PRIORITY_LEVELS, PRIORITY_MAPPING, LEGACY_PRIORITY_MAPPING, TEST_CATEGORIES,
+    FANOUT_TOTAL_CASES, settings
+)
+from src.core.chunker import RequirementSection, split_sections, pack_sections
+from src.core.prompt_compactor import compact_requirements
+from src.core.journal import JobJournal
+from src.core.manifest import GenerationManifest, ManifestSection, content_hash, diff_sections
+from src.utils.json_repair import extract_json_object, extract_test_case_dicts
+from src.utils.json_stream import IncrementalTestCaseParser
+from src.utils.text_utils import estimate_tokens
+import asyncio
+import inspect
 import uuid
 import json
-import re
 import datetime
+import math
+import time
 
 class TestStep(BaseModel):
     """
@@ -33,20 +47,161 @@ class TestCase(BaseModel):
     steps: List[TestStep]     # 测试步骤列表
     priority: str        # 优先级(高/中/低)
 
+class RequirementAnalysis(BaseModel):
+    """
+    需求分析结果数据模型
+    定义单次生成模式下与测试用例一起输出的分析结果的结构
+    """
+    test_points: List[str]     # 测试点
+    business_rules: List[str]  # 业务规则
+    edge_cases: List[str]      # 边界条件
+
+def _model_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    导出模型的JSON Schema，引用的子模型直接内联，去掉标题和描述等注解
+    
+    Args:
+        model (Type[BaseModel]): pydantic模型
+        
+    Returns:
+        Dict[str, Any]: JSON Schema
+    """
+    # schema()返回的是pydantic缓存的字典，复制后再修改
+    schema = dict(model.schema())
+    definitions = schema.pop("definitions", {})
+    
+    def inline(node: Any, properties: bool = False) -> Any:
+        if isinstance(node, list):
+            return [inline(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if "$ref" in node:
+            return inline(definitions[node["$ref"].rsplit("/", 1)[-1]])
+        # properties中的键是字段名，其余位置的title和description是注解
+        return {key: inline(value, key == "properties") for key, value in node.items()
+                if properties or key not in ("title", "description")}
+    
+    return inline(schema)
+
+def test_case_response_schema(include_analysis: bool = False) -> Dict[str, Any]:
+    """
+    由TestCase和TestStep模型导出约束测试用例输出的JSON Schema
+    用例ID由生成器分配，不要求模型输出，优先级限定为DEFAULT_TEST_PRIORITY_LEVELS
+    
+    Args:
+        include_analysis (bool): 是否要求在test_cases之前输出RequirementAnalysis格式的analysis字段
+        
+    Returns:
+        Dict[str, Any]: {"test_cases": [...]}（或{"analysis": {...}, "test_cases": [...]}）格式响应的JSON Schema
+    """
+    case_schema = _model_schema(TestCase)
+    del case_schema["properties"]["id"]
+    case_schema["required"].remove("id")
+    case_schema["properties"]["priority"]["enum"] = list(DEFAULT_TEST_PRIORITY_LEVELS)
+    properties = {"test_cases": {"type": "array", "items": case_schema}}
+    if include_analysis:
+        # 约束解码按属性顺序输出，先输出分析结果再输出测试用例
+        properties = {"analysis": _model_schema(RequirementAnalysis), **properties}
+    return {
+        "title": "test_cases",
+        "type": "object",
+        "properties": properties,
+        "required": list(properties)
+    }
+
+class RequirementDocument(BaseModel):
+    """
+    需求文档数据模型
+    定义批量生成时单个输入文档的结构
+    """
+    name: str                              # 文档名称（通常为文件名）
+    text: str                              # 需求文档文本
+    requirement_type: Optional[str] = None # 需求类型，用于选择提示模板
+    id_prefix: str = ""                    # 用例ID命名空间，为空时按文档顺序自动分配
+    manifest_path: Optional[str] = None    # 生成清单路径，设置后只重新生成变化的章节
+
+class DocumentResult(BaseModel):
+    """
+    文档生成结果数据模型
+    记录批量生成时单个文档的测试用例、耗时和错误信息
+    """
+    name: str                     # 文档名称
+    requirement_type: Optional[str] = None  # 需求类型
+    id_prefix: str                # 该文档使用的用例ID命名空间
+    test_cases: List[TestCase] = []  # 生成的测试用例
+    document_key: str = ""        # 任务日志中的文档键，未启用任务日志时为空
+    elapsed: float = 0.0          # 生成耗时(秒)
+    error: str = ""               # 生成失败时的错误信息
+
+class GenerationSlice(BaseModel):
+    """
+    生成分片数据模型
+    定义分片生成时单个并发请求的内容
+    """
+    name: str            # 分片名称（测试类型或测试点分组），用作任务日志的阶段后缀
+    prompt: str          # 用户提示词
+    system_prompt: str   # 系统提示词
+
 class TestGenerator:
     """
     测试用例生成器类
     负责基于需求生成完整的测试用例集
     """
     
-    def __init__(self, llm_engine: LLMEngine):
+    def __init__(self, llm_engine: LLMEngine, mode: str = None,
+                 chunk_max_tokens: int = None, chunk_concurrency: int = None,
+                 id_prefix: str = "", journal: JobJournal = None, compaction: bool = None,
+                 fanout: str = None, fanout_max_tokens: int = None, fanout_concurrency: int = None,
+                 structured_output: bool = None, pipeline: str = None):
         """
         初始化测试用例生成器
         
+        注意：ID计数器保存在实例上，同一实例不能并发生成多个文档，
+        并发处理多个文档请使用generate_many
+        
         Args:
             llm_engine (LLMEngine): LLM引擎实例，用于生成测试用例内容
+            mode (str, optional): 生成模式(single/chunked/auto)，默认使用GENERATION_MODE
+            chunk_max_tokens (int, optional): 章节块的令牌上限，默认使用CHUNK_MAX_TOKENS
+            chunk_concurrency (int, optional): 并行处理的章节数上限，默认使用CHUNK_CONCURRENCY
+            id_prefix (str, optional): 用例ID命名空间，非空时ID格式为日期-命名空间-编号
+            journal (JobJournal, optional): 任务日志，设置后记录每一步的结果，重新运行时跳过已完成的步骤
+            compaction (bool, optional): 发送前是否压缩需求文档，默认使用PROMPT_COMPACTION_ENABLED
+            fanout (str, optional): 分片生成模式(off/category/test_point)，默认使用GENERATION_FANOUT
+            fanout_max_tokens (int, optional): 每个分片请求的最大生成令牌数，默认使用FANOUT_MAX_TOKENS
+            fanout_concurrency (int, optional): 同时发出的分片请求数上限，默认使用FANOUT_CONCURRENCY
+            structured_output (bool, optional): 是否用JSON Schema约束生成测试用例的输出格式，
+                默认使用STRUCTURED_OUTPUT
+            pipeline (str, optional): 生成流程(two_step/fast)，默认使用GENERATION_PIPELINE
         """
         self.llm_engine = llm_engine
+        self.mode = mode or settings.GENERATION_MODE
+        self.chunk_max_tokens = chunk_max_tokens or settings.CHUNK_MAX_TOKENS
+        self.chunk_concurrency = chunk_concurrency or settings.CHUNK_CONCURRENCY
+        self.id_prefix = id_prefix
+        self.journal = journal
+        self.compaction = settings.PROMPT_COMPACTION_ENABLED if compaction is None else compaction
+        self.fanout = fanout or settings.GENERATION_FANOUT
+        if self.fanout not in ("off", "category", "test_point"):
+            raise ValueError(f"Unknown generation fanout: {self.fanout}")
+        self.pipeline = pipeline or settings.GENERATION_PIPELINE
+        if self.pipeline not in ("two_step", "fast"):
+            raise ValueError(f"Unknown generation pipeline: {self.pipeline}")
+        if self.pipeline == "fast" and self.fanout != "off":
+            # 分片依赖单独请求的分析结果，单次生成模式下每个文档（或章节）只发一个请求
+            print("Fast pipeline generates each document in one request, ignoring generation fanout")
+            self.fanout = "off"
+        self.fanout_max_tokens = fanout_max_tokens or settings.FANOUT_MAX_TOKENS
+        self.fanout_concurrency = fanout_concurrency or settings.FANOUT_CONCURRENCY
+        # chunked模式下所有章节的分片请求共享同一个并发上限
+        self._fanout_semaphore = asyncio.Semaphore(self.fanout_concurrency)
+        self.structured_output = settings.STRUCTURED_OUTPUT if structured_output is None else structured_output
+        self.response_schema = test_case_response_schema() if self.structured_output else None
+        # 各解析方式(structured/parsed/repaired/salvaged/failed)的响应数，逐个用例的日志默认关闭
+        self.parse_methods: Counter = Counter()
+        self.log_test_cases = settings.LOG_TEST_CASES
+        # 最近一次生成的文档在任务日志中的键
+        self.document_key = None
         # 初始化计数器用于递增编号
         self.id_counter = 1
         # 设置日期前缀，用于测试用例ID
@@ -55,56 +210,756 @@ class TestGenerator:
     def generate_test_id(self) -> str:
         """
         生成测试用例ID
-        格式为：日期-递增编号(YYYYMMDD-XXX)
+        格式为：日期-递增编号(YYYYMMDD-XXX)，设置了命名空间时为日期-命名空间-递增编号
         
         Returns:
             str: 生成的测试用例ID
         """
         # 格式化计数器为3位数，如001, 002等
         formatted_counter = f"{self.id_counter:03d}"
-        # 组合日期前缀和计数器
-        test_id = f"{self.date_prefix}-{formatted_counter}"
+        # 组合日期前缀、命名空间和计数器
+        if self.id_prefix:
+            test_id = f"{self.date_prefix}-{self.id_prefix}-{formatted_counter}"
+        else:
+            test_id = f"{self.date_prefix}-{formatted_counter}"
         # 递增计数器
         self.id_counter += 1
         return test_id
 
-    async def generate_test_cases(self, requirements: str, requirement_type: str = None) -> List[TestCase]:
+    async def generate_test_cases(self, requirements: str, requirement_type: str = None,
+                                  document_name: str = None) -> List[TestCase]:
         """
         基于需求生成测试用例
         
         Args:
             requirements (str): 需求文档文本
             requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            document_name (str, optional): 文档名称，记录在任务日志中
             
         Returns:
             List[TestCase]: 生成的测试用例列表
             
         Process:
+            0. 启用提示词压缩时，先去掉文档中的空白、修订记录、目录和版式残留
             1. 首先分析需求文档
             2. 基于分析结果生成详细的测试用例
             3. 解析生成的内容为TestCase对象
+            
+            启用分片生成时，第2、3步拆分为按测试类型或测试点划分的多个并发请求，合并后重新编号
+            
+            fast流程下，第1、2步合并为一次请求，模型在同一个响应中先输出分析结果再输出测试用例
+            
+            chunked模式下，文档先按章节拆分，每个章节并行执行以上流程后合并
+            
+            启用任务日志时，每一步的结果都会被记录，已完成的步骤直接从日志中恢复
         """
         # 重置ID计数器，确保每次生成测试用例时ID从1开始
         self.id_counter = 1
         # 更新日期前缀，以确保使用当前日期
         self.date_prefix = datetime.datetime.now().strftime("%Y%m%d")
+        requirements = self._compact_requirements(requirements, document_name)
         
-        # 首先分析需求
-        analysis = await self.llm_engine.analyze_requirements(requirements)
+        self.document_key = None
+        if self.journal is not None:
+            self.document_key = JobJournal.document_key(
+                requirements,
+                requirement_type=requirement_type,
+                mode=self.mode,
+                chunk_max_tokens=self.chunk_max_tokens,
+                id_prefix=self.id_prefix,
+                fanout=self.fanout,
+                pipeline=self.pipeline
+            )
+            self.journal.start_document(self.document_key, document_name or self.document_key[:12])
+            restored = self._restore_test_cases(JobJournal.DOCUMENT)
+            if restored:
+                print(f"Resumed {len(restored)} test cases from journal")
+                self.id_counter = len(restored) + 1
+                return restored
         
-        # 根据需求类型选择系统提示词
-        system_prompt = self.get_system_prompt(requirement_type)
+        if self._use_chunking(requirements):
+            test_cases = await self._generate_chunked(requirements, requirement_type)
+        else:
+            # 分析需求并生成、解析测试用例
+            test_cases, failed = await self._generate_requirements(
+                JobJournal.DOCUMENT, requirements, requirement_type
+            )
+            if self.fanout != "off":
+                # 各分片并发解析时ID交错分配，合并后按分片顺序重新编号
+                self.id_counter = 1
+                for test_case in test_cases:
+                    test_case.id = self.generate_test_id()
+            # 有分片失败时不记录整个文档的结果，下次运行时只重新生成失败的分片
+            if test_cases and not failed:
+                self._record_test_cases(JobJournal.DOCUMENT, test_cases)
         
-        # 获取测试用例生成结果
-        test_cases_response = await self.llm_engine.generate_response(
-            str(analysis),
-            system_prompt
+        # 如果解析失败或没有test_cases字段，返回样例测试用例（样例不记录到任务日志）
+        if not test_cases:
+            print("No valid test cases found in response")
+            return [self._create_sample_test_case(requirement_type)]
+        return test_cases
+
+    async def _journaled(self, section: str, stage: str, produce: Callable[[], Any],
+                         accept: Callable[[str], bool] = None) -> str:
+        """
+        执行一个可从任务日志恢复的步骤
+        日志中已有该步骤的结果时直接返回，否则执行并记录结果
+        
+        Args:
+            section (str): 章节键
+            stage (str): 处理阶段
+            produce (Callable): 返回协程的函数，协程结果为该步骤的文本结果
+            accept (Callable, optional): 判断结果是否值得记录，不可用的响应不记录，下次运行时重新请求
+            
+        Returns:
+            str: 步骤结果
+        """
+        if self.journal is None or self.document_key is None:
+            return await produce()
+        payload = self.journal.get(self.document_key, section, stage)
+        if payload is not None:
+            return payload
+        payload = str(await produce())
+        if accept is None or accept(payload):
+            self.journal.record(self.document_key, section, stage, payload)
+        return payload
+
+    def _restore_test_cases(self, section: str) -> Optional[List[TestCase]]:
+        """
+        从任务日志中恢复已解析的测试用例
+        
+        Args:
+            section (str): 章节键
+            
+        Returns:
+            Optional[List[TestCase]]: 已解析的测试用例，日志中没有记录时返回None
+        """
+        if self.journal is None or self.document_key is None:
+            return None
+        payload = self.journal.get(self.document_key, section, JobJournal.PARSED)
+        if payload is None:
+            return None
+        return [TestCase.parse_obj(item) for item in json.loads(payload)]
+
+    def _record_test_cases(self, section: str, test_cases: List[TestCase]):
+        """
+        将解析后的测试用例记录到任务日志
+        
+        Args:
+            section (str): 章节键
+            test_cases (List[TestCase]): 测试用例列表
+        """
+        if self.journal is None or self.document_key is None:
+            return
+        payload = json.dumps([test_case.dict() for test_case in test_cases], ensure_ascii=False)
+        self.journal.record(self.document_key, section, JobJournal.PARSED, payload)
+
+    def _compact_requirements(self, requirements: str, document_name: str = None) -> str:
+        """
+        压缩需求文档并打印压缩前后的令牌估算，未启用压缩时原样返回
+        
+        Args:
+            requirements (str): 需求文档文本
+            document_name (str, optional): 文档名称，用于输出信息
+            
+        Returns:
+            str: 压缩后的需求文档文本
+        """
+        if not self.compaction:
+            return requirements
+        result = compact_requirements(requirements)
+        details = []
+        if result.dropped_sections:
+            details.append(f"dropped {len(result.dropped_sections)} sections")
+        if result.boilerplate_lines:
+            details.append(f"removed {result.boilerplate_lines} boilerplate lines")
+        if result.tables:
+            details.append(f"rebuilt {result.tables} tables")
+        print(f"Prompt compaction{f' ({document_name})' if document_name else ''}: "
+              f"{result.tokens_before} -> {result.tokens_after} tokens "
+              f"(-{result.saved_ratio:.0%}){': ' + ', '.join(details) if details else ''}")
+        return result.text
+
+    def _use_chunking(self, requirements: str) -> bool:
+        """
+        根据生成模式判断是否按章节拆分文档
+        
+        Args:
+            requirements (str): 需求文档文本
+            
+        Returns:
+            bool: 是否使用章节并行生成
+        """
+        if self.mode == "chunked":
+            return True
+        if self.mode == "auto":
+            return estimate_tokens(requirements) > self.chunk_max_tokens
+        return False
+
+    async def _generate_chunked(self, requirements: str, requirement_type: str = None) -> List[TestCase]:
+        """
+        按章节拆分需求文档，在并发上限内并行分析和生成，再按章节顺序合并
+        
+        Args:
+            requirements (str): 需求文档文本
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            List[TestCase]: 合并并重新编号后的测试用例列表，没有有效用例时返回空列表
+        """
+        sections = pack_sections(
+            split_sections(requirements, self.chunk_max_tokens),
+            self.chunk_max_tokens
+        )
+        print(f"Split requirements into {len(sections)} sections "
+              f"(concurrency: {self.chunk_concurrency})")
+        
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        
+        # gather按输入顺序返回结果，合并顺序与文档章节顺序一致
+        results = await asyncio.gather(*(
+            self._generate_section(section, len(sections), requirement_type, semaphore)
+            for section in sections
+        ))
+        failed = sum(1 for section_cases in results if section_cases is None)
+        test_cases = [test_case for section_cases in results if section_cases for test_case in section_cases]
+        
+        if not test_cases:
+            print("No valid test cases found in any section")
+            return []
+        # 各章节内已去重，合并后再去除跨章节的重复用例
+        test_cases = self._remove_duplicates(test_cases)
+        
+        # 各章节并发解析时ID交错分配，合并后按章节顺序重新编号
+        self.id_counter = 1
+        for test_case in test_cases:
+            test_case.id = self.generate_test_id()
+        print(f"\nTotal test cases from {len(sections)} sections: {len(test_cases)}")
+        # 有章节失败时不记录整个文档的结果，下次运行时只重新处理失败的章节
+        if failed:
+            print(f"{failed} sections failed and will be retried on the next run")
+        else:
+            self._record_test_cases(JobJournal.DOCUMENT, test_cases)
+        return test_cases
+
+    async def _generate_section(self, section: RequirementSection, total: int, requirement_type: str,
+                                semaphore: asyncio.Semaphore) -> Optional[List[TestCase]]:
+        """
+        分析单个章节并生成其测试用例，启用任务日志时从日志中恢复已完成的步骤
+        
+        Args:
+            section (RequirementSection): 需求章节
+            total (int): 本次处理的章节总数，用于进度输出
+            requirement_type (str): 需求类型，用于选择适当的提示模板
+            semaphore (asyncio.Semaphore): 限制并发章节数的信号量
+            
+        Returns:
+            Optional[List[TestCase]]: 章节的测试用例，请求失败时返回None
+        """
+        section_key = JobJournal.section_key(section.index, section.text)
+        restored = self._restore_test_cases(section_key)
+        if restored is not None:
+            print(f"Section {section.index + 1}/{total} resumed from journal")
+            return restored
+        async with semaphore:
+            print(f"Processing section {section.index + 1}/{total}: {section.title}")
+            try:
+                test_cases, failed = await self._generate_requirements(
+                    section_key, section.text, requirement_type
+                )
+            except Exception as e:
+                # 单个章节失败不影响其他章节
+                print(f"Section {section.index + 1} failed: {str(e)}")
+                return None
+            if test_cases and not failed:
+                self._record_test_cases(section_key, test_cases)
+            return test_cases
+
+    async def _generate_requirements(self, section: str, requirements: str,
+                                     requirement_type: str = None) -> Tuple[List[TestCase], int]:
+        """
+        按生成流程处理一段需求文本：two_step先分析需求再基于分析结果生成，fast一次请求完成
+        
+        Args:
+            section (str): 章节键，整个文档使用JobJournal.DOCUMENT
+            requirements (str): 需求文档或章节文本
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            Tuple[List[TestCase], int]: 测试用例列表，以及失败的分片数
+        """
+        if self.pipeline == "fast":
+            return await self._generate_fast(section, requirements, requirement_type), 0
+        analysis = await self._journaled(
+            section, JobJournal.ANALYZED,
+            lambda: self.llm_engine.analyze_requirements(requirements)
+        )
+        return await self._generate_from_analysis(section, analysis, requirement_type)
+
+    async def _generate_fast(self, section: str, requirements: str,
+                             requirement_type: str = None) -> List[TestCase]:
+        """
+        单次生成：把需求文本直接发给模型，要求在同一个响应中先输出分析结果再输出测试用例
+        响应中的分析结果以两步生成相同的{"analysis": {...}}格式记录到任务日志的analyzed阶段
+        
+        Args:
+            section (str): 章节键，整个文档使用JobJournal.DOCUMENT
+            requirements (str): 需求文档或章节文本
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            List[TestCase]: 测试用例列表
+        """
+        schema = test_case_response_schema(include_analysis=True) if self.structured_output else None
+        
+        async def generate() -> str:
+            response = await self.llm_engine.generate_response(
+                self.get_fast_prompt(requirements),
+                self.get_system_prompt(requirement_type),
+                validator=self._is_usable_response,
+                schema=schema
+            )
+            # 分析结果先于原始响应记录，与两步生成的步骤顺序一致
+            data = extract_json_object(response) if self.journal is not None and self.document_key is not None else None
+            if data and isinstance(data.get("analysis"), dict) and self._is_usable_response(response):
+                self.journal.record(self.document_key, section, JobJournal.ANALYZED,
+                                    json.dumps({"analysis": data["analysis"]}, ensure_ascii=False))
+            return response
+        
+        response = await self._journaled(section, JobJournal.GENERATED, generate,
+                                         accept=self._is_usable_response)
+        return self._extract_test_cases(response)
+
+    async def _generate_from_analysis(self, section: str, analysis: str,
+                                      requirement_type: str = None) -> Tuple[List[TestCase], int]:
+        """
+        基于需求分析结果生成并解析测试用例，启用分片生成时拆分为多个并发请求后按分片顺序合并
+        
+        Args:
+            section (str): 章节键，整个文档使用JobJournal.DOCUMENT
+            analysis (str): 需求分析结果
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            Tuple[List[TestCase], int]: 测试用例列表，以及失败的分片数
+            
+        Raises:
+            Exception: 不分片时请求失败，或所有分片都失败时抛出最后一个错误
+        """
+        if self.fanout == "off":
+            response = await self._journaled(
+                section, JobJournal.GENERATED,
+                lambda: self.llm_engine.generate_response(
+                    str(analysis),
+                    self.get_system_prompt(requirement_type),
+                    validator=self._is_usable_response,
+                    schema=self.response_schema
+                ),
+                accept=self._is_usable_response
+            )
+            return self._extract_test_cases(response), 0
+        
+        slices = self._fanout_slices(analysis, requirement_type)
+        print(f"Generating {len(slices)} slices by {self.fanout} "
+              f"(max tokens: {self.fanout_max_tokens}, concurrency: {self.fanout_concurrency})")
+        results = await asyncio.gather(
+            *(self._generate_slice(section, generation_slice) for generation_slice in slices),
+            return_exceptions=True
         )
+        test_cases, errors = [], []
+        for generation_slice, result in zip(slices, results):
+            if isinstance(result, Exception):
+                print(f"Slice {generation_slice.name} failed: {str(result)}")
+                errors.append(result)
+            else:
+                test_cases.extend(result)
+        if len(errors) == len(slices):
+            raise errors[-1]
+        # 各分片内已去重，合并后再去除跨分片的重复用例
+        return self._remove_duplicates(test_cases), len(errors)
+
+    async def _generate_slice(self, section: str, generation_slice: GenerationSlice) -> List[TestCase]:
+        """
+        发出单个分片请求并解析其测试用例，原始响应按分片记录到任务日志
+        
+        Args:
+            section (str): 章节键
+            generation_slice (GenerationSlice): 分片
+            
+        Returns:
+            List[TestCase]: 分片的测试用例列表
+        """
+        async with self._fanout_semaphore:
+            response = await self._journaled(
+                section, f"{JobJournal.GENERATED}/{generation_slice.name}",
+                lambda: self.llm_engine.generate_response(
+                    generation_slice.prompt,
+                    generation_slice.system_prompt,
+                    validator=self._is_usable_response,
+                    max_tokens=self.fanout_max_tokens,
+                    schema=self.response_schema
+                ),
+                accept=self._is_usable_response
+            )
+        return self._extract_test_cases(response)
+
+    def _fanout_slices(self, analysis: str, requirement_type: str = None) -> List[GenerationSlice]:
+        """
+        拆分生成请求
+        category模式下每种测试类型一个分片，用户提示词均为完整的分析结果；
+        test_point模式下把分析结果中的测试点按顺序分成若干组，每组一个分片，
+        业务规则和边界条件等其他分析内容在每个分片中保留
+        
+        Args:
+            analysis (str): 需求分析结果
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            List[GenerationSlice]: 按顺序排列的分片
+        """
+        system_prompt = self.get_system_prompt(requirement_type)
+        if self.fanout == "test_point":
+            data = extract_json_object(str(analysis))
+            content = data.get("analysis", data) if data else None
+            test_points = content.get("test_points") if isinstance(content, dict) else None
+            if isinstance(test_points, list) and len(test_points) > 1:
+                count = min(settings.FANOUT_TEST_POINT_SLICES, len(test_points))
+                size = math.ceil(len(test_points) / count)
+                groups = [test_points[index:index + size] for index in range(0, len(test_points), size)]
+                case_count = math.ceil(FANOUT_TOTAL_CASES / len(groups))
+                slices = []
+                for number, group in enumerate(groups, 1):
+                    prompt = json.dumps({"analysis": {**content, "test_points": group}}, ensure_ascii=False)
+                    prompt = self._fanout_prompt(prompt, "以上test_points列出的测试点", case_count)
+                    slices.append(GenerationSlice(name=f"points-{number}", prompt=prompt,
+                                                  system_prompt=system_prompt))
+                return slices
+            print("No test points found in analysis, falling back to category slices")
+        
+        case_count = math.ceil(FANOUT_TOTAL_CASES / len(TEST_CATEGORIES))
+        return [
+            GenerationSlice(
+                name=category,
+                prompt=self._fanout_prompt(str(analysis), f"{category}（{description}）", case_count),
+                system_prompt=system_prompt
+            )
+            for category, description in TEST_CATEGORIES.items()
+        ]
+
+    @staticmethod
+    def _fanout_prompt(prompt: str, focus: str, case_count: int) -> str:
+        """
+        在分片的用户提示词末尾加上分片说明
+        分片说明放在最后，所有分片的系统提示词完全相同，category模式下分析结果也相同，
+        本地模型可以复用共享前缀的KV缓存，每个分片只需预填充末尾的分片说明
+        
+        Args:
+            prompt (str): 分片的用户提示词
+            focus (str): 本次请求负责的测试类型或测试点
+            case_count (int): 本次请求需要生成的测试用例数
+            
+        Returns:
+            str: 加上分片说明的用户提示词
+        """
+        return f"""{prompt}
+
+注意：本次请求是并行生成中的一个分片，其他测试类型或测试点由其他请求负责。
+本次只为以下内容生成测试用例：{focus}
+本次生成{case_count}个左右的测试用例即可，系统提示中关于测试用例总数和覆盖所有测试类型的要求不适用于本次请求"""
+
+    async def generate_incremental(self, requirements: str, manifest_path: str,
+                                   requirement_type: str = None) -> List[TestCase]:
+        """
+        增量生成测试用例
+        将文档按章节与上一次生成的清单对比，只有新增或修改过的章节会请求LLM，
+        未变化章节的测试用例及其ID原样复用，新用例沿用清单的ID命名空间并接续清单中的编号
         
-        # 解析响应为TestCase对象列表
-        test_cases = self._parse_test_cases(test_cases_response, requirement_type)
+        Args:
+            requirements (str): 需求文档文本
+            manifest_path (str): 清单文件路径，不存在时生成全部章节并创建清单
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Returns:
+            List[TestCase]: 按文档章节顺序排列的测试用例列表
+        """
+        manifest = GenerationManifest.load(manifest_path)
+        if manifest is not None and manifest.requirement_type != requirement_type:
+            # 需求类型变化后提示词不同，旧用例不再适用
+            print("Manifest was generated for a different requirement type, regenerating all sections")
+            manifest = None
+        if manifest is not None:
+            # 沿用清单的ID命名空间，保证同一文档的用例ID在多次生成之间保持稳定
+            self.id_prefix = manifest.id_prefix
+        
+        requirements = self._compact_requirements(requirements, manifest_path)
+        sections = split_sections(requirements, self.chunk_max_tokens)
+        keys, unchanged, removed = diff_sections(manifest, sections)
+        pending = [section for key, section in zip(keys, sections) if key not in unchanged]
+        previous = {entry.key: entry for entry in manifest.sections} if manifest else {}
+        print(f"Incremental generation: {len(unchanged)} unchanged, "
+              f"{sum(1 for key in keys if key in previous and key not in unchanged)} modified, "
+              f"{sum(1 for key in keys if key not in previous)} added, {len(removed)} removed sections")
+        
+        self.document_key = None
+        if self.journal is not None:
+            self.document_key = JobJournal.document_key(
+                requirements,
+                requirement_type=requirement_type,
+                mode="incremental",
+                chunk_max_tokens=self.chunk_max_tokens,
+                id_prefix=self.id_prefix,
+                fanout=self.fanout,
+                pipeline=self.pipeline
+            )
+            self.journal.start_document(self.document_key, manifest_path)
+        
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        results = await asyncio.gather(*(
+            self._generate_section(section, len(sections), requirement_type, semaphore)
+            for section in pending
+        ))
+        generated = dict(zip((keys[section.index] for section in pending), results))
+        
+        # 新用例的编号接续清单，已删除用例的编号不会被复用
+        self.id_counter = manifest.next_id if manifest else 1
+        self.date_prefix = datetime.datetime.now().strftime("%Y%m%d")
+        new_manifest = GenerationManifest(requirement_type=requirement_type, id_prefix=self.id_prefix)
+        test_cases = []
+        for key, section in zip(keys, sections):
+            if key in unchanged:
+                entry = unchanged[key]
+            elif generated.get(key) is not None:
+                section_cases = generated[key]
+                for test_case in section_cases:
+                    test_case.id = self.generate_test_id()
+                entry = ManifestSection(
+                    key=key,
+                    title=section.title,
+                    content_hash=content_hash(section.text),
+                    test_cases=[test_case.dict() for test_case in section_cases]
+                )
+            elif key in previous:
+                # 修改过的章节生成失败时保留旧用例和旧哈希，下次运行时重新生成
+                print(f"Keeping previous test cases for failed section: {key}")
+                entry = previous[key]
+            else:
+                continue
+            new_manifest.sections.append(entry)
+            test_cases.extend(TestCase.parse_obj(item) for item in entry.test_cases)
+        
+        new_manifest.next_id = self.id_counter
+        new_manifest.save(manifest_path)
+        print(f"Reused {sum(len(entry.test_cases) for entry in unchanged.values())} test cases, "
+              f"generated {sum(len(cases) for cases in generated.values() if cases)} new test cases")
+        
+        if not test_cases:
+            print("No valid test cases found in any section")
+            return [self._create_sample_test_case(requirement_type)]
         return test_cases
 
+    async def stream_test_cases(self, requirements: str, requirement_type: str = None) -> AsyncIterator[TestCase]:
+        """
+        基于需求以流式方式生成测试用例
+        每当模型输出中的一个测试用例对象闭合，就立即产出对应的TestCase，
+        下游导出等处理无需等待整个响应生成完毕
+        
+        Args:
+            requirements (str): 需求文档文本
+            requirement_type (str, optional): 需求类型，用于选择适当的提示模板
+            
+        Yields:
+            TestCase: 验证通过的测试用例
+        """
+        self.id_counter = 1
+        self.date_prefix = datetime.datetime.now().strftime("%Y%m%d")
+        requirements = self._compact_requirements(requirements)
+        
+        analysis = await self.llm_engine.analyze_requirements(requirements)
+        system_prompt = self.get_system_prompt(requirement_type)
+        
+        parser = IncrementalTestCaseParser()
+        # 已产出的用例无法撤回，流式模式下只丢弃与先前用例重复的新用例
+        duplicates = None
+        if settings.DEDUP_ENABLED:
+            from src.utils.dedup import NearDuplicateIndex, case_text
+            duplicates = NearDuplicateIndex()
+        produced = 0
+        removed = 0
+        async for chunk in self.llm_engine.stream_response(str(analysis), system_prompt,
+                                                           schema=self.response_schema):
+            for tc in parser.feed(chunk):
+                try:
+                    test_case = self._build_test_case(tc)
+                except Exception as e:
+                    print(f"Error building streamed test case: {str(e)}")
+                    continue
+                if test_case is None:
+                    continue
+                if duplicates is not None and duplicates.add([case_text(test_case)])[0] >= 0:
+                    print(f"Removed near-duplicate streamed test case {test_case.id} {test_case.title!r}")
+                    removed += 1
+                    continue
+                produced += 1
+                yield test_case
+        
+        if removed:
+            print(f"Removed {removed} near-duplicate streamed test cases")
+        
+        # 与非流式模式保持一致：没有解析出任何用例时返回示例用例
+        if produced == 0:
+            print("No valid test cases found in streamed response")
+            yield self._create_sample_test_case(requirement_type)
+
+    async def generate_many(self, documents: List[RequirementDocument], concurrency: int = None,
+                            on_document: Callable[[DocumentResult], Any] = None) -> List[DocumentResult]:
+        """
+        批量生成多个需求文档的测试用例
+        各文档在并发上限内共享同一个LLM引擎并行生成，每个文档使用独立的生成器实例
+        和用例ID命名空间，单个文档失败不影响其他文档
+        
+        Args:
+            documents (List[RequirementDocument]): 需求文档列表
+            concurrency (int, optional): 同时处理的文档数上限，默认使用BATCH_CONCURRENCY
+            on_document (Callable, optional): 每个文档完成时的回调（如导出文件），
+                可以是普通函数或协程函数
+            
+        Returns:
+            List[DocumentResult]: 与输入顺序一致的生成结果列表
+        """
+        concurrency = concurrency or settings.BATCH_CONCURRENCY
+        semaphore = asyncio.Semaphore(concurrency)
+        prefixes = self._assign_id_prefixes(documents)
+        total = len(documents)
+        completed = 0
+        started = time.perf_counter()
+        print(f"Generating test cases for {total} documents (concurrency: {concurrency})")
+        
+        async def process(document: RequirementDocument, id_prefix: str) -> DocumentResult:
+            nonlocal completed
+            async with semaphore:
+                # 每个文档使用独立的生成器，避免ID计数器在并发文档之间相互干扰
+                generator = TestGenerator(
+                    self.llm_engine,
+                    mode=self.mode,
+                    chunk_max_tokens=self.chunk_max_tokens,
+                    chunk_concurrency=self.chunk_concurrency,
+                    id_prefix=id_prefix,
+                    journal=self.journal,
+                    compaction=self.compaction,
+                    fanout=self.fanout,
+                    fanout_max_tokens=self.fanout_max_tokens,
+                    fanout_concurrency=self.fanout_concurrency,
+                    structured_output=self.structured_output,
+                    pipeline=self.pipeline
+                )
+                result = DocumentResult(
+                    name=document.name,
+                    requirement_type=document.requirement_type,
+                    id_prefix=id_prefix
+                )
+                document_started = time.perf_counter()
+                try:
+                    if document.manifest_path:
+                        result.test_cases = await generator.generate_incremental(
+                            document.text, document.manifest_path, document.requirement_type
+                        )
+                    else:
+                        result.test_cases = await generator.generate_test_cases(
+                            document.text, document.requirement_type, document.name
+                        )
+                except Exception as e:
+                    result.error = str(e)
+                result.document_key = generator.document_key or ""
+                self.parse_methods.update(generator.parse_methods)
+                result.elapsed = time.perf_counter() - document_started
+                
+                completed += 1
+                status = f"failed: {result.error}" if result.error else f"{len(result.test_cases)} test cases"
+                print(f"[{completed}/{total}] {document.name}: {status} ({result.elapsed:.1f}s)")
+                
+                if on_document is not None:
+                    try:
+                        outcome = on_document(result)
+                        if inspect.isawaitable(outcome):
+                            await outcome
+                    except Exception as e:
+                        print(f"Error handling result of {document.name}: {str(e)}")
+                return result
+        
+        results = await asyncio.gather(*(
+            process(document, id_prefix) for document, id_prefix in zip(documents, prefixes)
+        ))
+        self._print_batch_summary(results, time.perf_counter() - started)
+        return results
+
+    @staticmethod
+    def _assign_id_prefixes(documents: List[RequirementDocument]) -> List[str]:
+        """
+        为每个文档分配互不重复的用例ID命名空间
+        未指定命名空间（或与其他文档重复）的文档按顺序使用D001、D002...
+        
+        Args:
+            documents (List[RequirementDocument]): 需求文档列表
+            
+        Returns:
+            List[str]: 与文档顺序一致的命名空间列表
+        """
+        # 先保留显式指定的命名空间，自动分配时跳过它们
+        used = {document.id_prefix for document in documents if document.id_prefix}
+        prefixes = []
+        seen = set()
+        next_number = 1
+        for document in documents:
+            prefix = document.id_prefix
+            if not prefix or prefix in seen:
+                while f"D{next_number:03d}" in used:
+                    next_number += 1
+                prefix = f"D{next_number:03d}"
+                used.add(prefix)
+            seen.add(prefix)
+            prefixes.append(prefix)
+        return prefixes
+
+    @staticmethod
+    def _print_batch_summary(results: List[DocumentResult], elapsed: float):
+        """
+        打印批量生成的吞吐量汇总
+        
+        Args:
+            results (List[DocumentResult]): 各文档的生成结果
+            elapsed (float): 总耗时(秒)
+        """
+        succeeded = [result for result in results if not result.error]
+        total_cases = sum(len(result.test_cases) for result in succeeded)
+        minutes = max(elapsed, 1e-9) / 60
+        print(f"\nBatch finished in {elapsed:.1f}s: "
+              f"{len(succeeded)}/{len(results)} documents, {total_cases} test cases")
+        print(f"Throughput: {len(succeeded) / minutes:.2f} docs/min, "
+              f"{total_cases / minutes:.1f} cases/min")
+        for result in results:
+            if result.error:
+                print(f"  Failed: {result.name}: {result.error}")
+
+    @staticmethod
+    def get_fast_prompt(requirements: str) -> str:
+        """
+        获取单次生成模式的用户提示词
+        系统提示词与两步生成相同，分析要求和输出格式写在用户提示词中
+        
+        Args:
+            requirements (str): 需求文档文本
+            
+        Returns:
+            str: 用户提示词
+        """
+        return f"""请先分析以下需求文档，提取测试点、业务规则和边界条件，写入analysis字段；
+然后基于需求文档和分析结果生成测试用例，写入test_cases字段。
+输出格式：{{"analysis": {{"test_points": [...], "business_rules": [...], "edge_cases": [...]}}, "test_cases": [...]}}，
+test_cases中每个测试用例的格式与系统提示中的示例相同。
+
+需求文档：
+{requirements}"""
+
     def get_system_prompt(self, requirement_type: str = None):
         """
         根据需求类型获取系统提示
@@ -115,7 +970,10 @@ class TestGenerator:
         Returns:
             str: 适合该需求类型的系统提示
         """
-        # 通用提示部分
+        # 通用提示部分，测试类型列表由TEST_CATEGORIES生成
+        category_list = "\n".join(
+            f"   - {category}：{description}" for category, description in TEST_CATEGORIES.items()
+        )
         common_prompt = """警告：任何非JSON格式的输出都会导致系统崩溃！
 你必须严格按照以下要求执行：
 
@@ -126,13 +984,7 @@ class TestGenerator:
 5. 支持的优先级有：高, 中, 低
 6. 必须生成至少50个测试用例，确保测试覆盖尽可能全面
 7. 必须覆盖以下所有测试类型：
-   - 功能测试：验证所有核心功能是否按照需求正常工作
-   - 边界测试：测试边界值和极限条件
-   - 异常测试：验证系统对异常输入和环境的处理能力
-   - 性能测试：验证系统性能指标
-   - 安全测试：验证系统安全性能
-   - 用户体验测试：验证系统的易用性
-   - 集成测试：验证不同组件之间的交互"""
+""" + category_list
 
         # 根据需求类型选择特定提示
         type_specific_prompts = {
@@ -273,134 +1125,175 @@ class TestGenerator:
 11. 必须生成至少60个测试用例，确保全面覆盖需求的各个方面"""
             return common_prompt + default_specific + json_format
 
-    def _parse_test_cases(self, response: str, requirement_type: str = None) -> List[TestCase]:
+    def _extract_test_cases(self, response: str) -> List[TestCase]:
         """
-        将LLM响应解析为TestCase对象列表
+        从LLM响应中提取所有有效的测试用例
         
         Args:
             response (str): LLM生成的响应文本
-            requirement_type (str, optional): 需求类型，可用于特定的解析逻辑
             
         Returns:
-            List[TestCase]: 测试用例对象列表
+            List[TestCase]: 测试用例对象列表，没有有效用例时返回空列表
         """
-        try:
-            print("Response content:")
-            print(response)
-            
-            # 移除<think>...</think>标签及其内容
-            response = re.sub(r'<think>[\s\S]*?</think>', '', response)
-            
-            # 查找JSON部分
-            json_match = re.search(r'```json\s*([\s\S]*?)\s*```', response)
-            if json_match:
-                # 从代码块中提取JSON
-                json_str = json_match.group(1)
-            else:
-                # 尝试直接从响应中提取JSON
-                json_match = re.search(r'\{[\s\S]*\}', response)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    print("No JSON found in response")
-                    return [self._create_sample_test_case(requirement_type)]
-            
-            # 清理JSON字符串
-            json_str = re.sub(r',\s*([}\]])', r'\1', json_str)  # 移除尾随逗号
+        print(f"Response length: {len(response)} chars")
+        case_dicts, method = extract_test_case_dicts(response, self.structured_output)
+        self.parse_methods[method] += 1
+        if not case_dicts:
+            print("No JSON test cases found in response")
+            return []
+        print(f"Extracted {len(case_dicts)} test cases from response ({method})")
+        
+        test_cases = []
+        for tc in case_dicts:
+            try:
+                test_case = self._build_test_case(tc)
+            except Exception as e:
+                # 单个用例字段类型错误时跳过该用例，保留其余用例
+                print(f"Error building test case: {str(e)}")
+                continue
+            if test_case is not None:
+                test_cases.append(test_case)
+        
+        test_cases = self._remove_duplicates(test_cases)
+        if test_cases:
+            print(f"\nTotal valid test cases: {len(test_cases)}")
+        return test_cases
+
+    def parse_failure_rate(self) -> float:
+        """
+        统计解析失败（没有提取出任何测试用例）的响应比例
+        
+        Returns:
+            float: 解析失败的响应数占已解析响应数的比例，尚未解析任何响应时为0
+        """
+        total = sum(self.parse_methods.values())
+        return self.parse_methods["failed"] / total if total else 0.0
+
+    def _remove_duplicates(self, test_cases: List[TestCase]) -> List[TestCase]:
+        """
+        去除近似重复的测试用例，未启用DEDUP_ENABLED时原样返回
+        
+        Args:
+            test_cases (List[TestCase]): 测试用例列表
             
-            print("\nTrying to parse JSON:")
-            print(json_str)
+        Returns:
+            List[TestCase]: 去重后保持原有顺序的测试用例列表
+        """
+        if not settings.DEDUP_ENABLED or len(test_cases) < 2:
+            return test_cases
+        # 去重模块依赖numpy，在第一次去重时才导入
+        from src.utils.dedup import deduplicate
+        test_cases, removed = deduplicate(test_cases)
+        if removed:
+            print(f"Removed {removed} near-duplicate test cases ({settings.DEDUP_STRATEGY})")
+        return test_cases
+
+    def _build_test_case(self, tc: Dict[str, Any], test_id: str = None,
+                         verbose: bool = None) -> Optional[TestCase]:
+        """
+        将单个测试用例字典转换为经过验证的TestCase对象
+        
+        Args:
+            tc (Dict[str, Any]): 从LLM响应中解析出的测试用例字典
+            test_id (str, optional): 指定的用例ID，为空时生成新的ID
+            verbose (bool, optional): 是否逐个打印处理过程，默认使用LOG_TEST_CASES
             
-            try:
-                data = json.loads(json_str)
-                
-                if 'test_cases' in data:
-                    test_cases = []
-                    for tc in data['test_cases']:
-                        print(f"\nProcessing test case: {tc.get('title', 'Untitled')}")
-                        # 尝试提取必要的字段
-                        module = tc.get('module', '')
-                        title = tc.get('title', '')
-                        
-                        # 处理优先级，确保使用中文格式
-                        priority = tc.get('priority', '中') 
-                        # 如果是英文优先级，转换为中文
-                        if priority.lower() in PRIORITY_MAPPING:
-                            priority = PRIORITY_MAPPING[priority.lower()]
-                        elif priority in LEGACY_PRIORITY_MAPPING:
-                            priority = LEGACY_PRIORITY_MAPPING[priority]
-                        
-                        # 处理前置条件
-                        preconditions = tc.get('preconditions', [])
-                        if isinstance(preconditions, str):
-                            preconditions = [preconditions]
-                        
-                        # 处理测试步骤
-                        steps = []
-                        tc_steps = tc.get('steps', [])
-                        if isinstance(tc_steps, list):
-                            for i, step in enumerate(tc_steps, 1):
-                                if isinstance(step, dict):
-                                    # 只处理必要的字段
-                                    step_number = step.get('step_number', step.get('step', i))
-                                    description = step.get('description', step.get('action', ''))
-                                    expected_result = step.get('expected_result', '')
-                                    
-                                    # 确保字段值不为空
-                                    if description and expected_result:
-                                        steps.append(TestStep(
-                                            step_number=step_number,
-                                            description=description,
-                                            expected_result=expected_result
-                                        ))
-                        
-                        # 如果没有有效的步骤，创建一个默认步骤
-                        if not steps:
-                            steps = [TestStep(
-                                step_number=1,
-                                description="执行测试步骤",
-                                expected_result="验证测试结果"
-                            )]
-                        
-                        # 创建测试用例
-                        test_case = TestCase(
-                            id=self.generate_test_id(),  # 使用新的ID生成方法
-                            module=module or '通用模块',
-                            title=title or '未命名测试用例',
-                            preconditions=preconditions or [],
-                            steps=steps,
-                            priority=priority  # 使用处理后的中文优先级
-                        )
-                        
-                        print(f"\nCreated test case: {test_case.title}")
-                        print(f"ID: {test_case.id}")  # 打印生成的ID
-                        print(f"Module: {test_case.module}")
-                        print(f"Priority: {test_case.priority}")
-                        print(f"Steps count: {len(test_case.steps)}")
-                        
-                        # 验证测试用例
-                        if self.validate_test_case(test_case):
-                            test_cases.append(test_case)
-                            print(f"Test case validated and added successfully")
-                        else:
-                            print(f"Test case validation failed")
+        Returns:
+            Optional[TestCase]: 验证通过的测试用例，验证失败时返回None
+        """
+        if verbose is None:
+            verbose = self.log_test_cases
+        if verbose:
+            print(f"\nProcessing test case: {tc.get('title', 'Untitled')}")
+        # 尝试提取必要的字段
+        module = tc.get('module', '')
+        title = tc.get('title', '')
+        
+        # 处理优先级，确保使用中文格式
+        priority = tc.get('priority', '中') 
+        # 如果是英文优先级，转换为中文
+        if priority.lower() in PRIORITY_MAPPING:
+            priority = PRIORITY_MAPPING[priority.lower()]
+        elif priority in LEGACY_PRIORITY_MAPPING:
+            priority = LEGACY_PRIORITY_MAPPING[priority]
+        
+        # 处理前置条件
+        preconditions = tc.get('preconditions', [])
+        if isinstance(preconditions, str):
+            preconditions = [preconditions]
+        
+        # 处理测试步骤
+        steps = []
+        tc_steps = tc.get('steps', [])
+        if isinstance(tc_steps, list):
+            for i, step in enumerate(tc_steps, 1):
+                if isinstance(step, dict):
+                    # 只处理必要的字段
+                    step_number = step.get('step_number', step.get('step', i))
+                    description = step.get('description', step.get('action', ''))
+                    expected_result = step.get('expected_result', '')
                     
-                    if test_cases:
-                        print(f"\nTotal valid test cases: {len(test_cases)}")
-                        return test_cases
-                
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON: {str(e)}")
-                print("JSON content:")
-                print(json_str)
-            
-            # 如果解析失败或没有test_cases字段，返回样例测试用例
-            print("No valid test cases found in response")
-            return [self._create_sample_test_case(requirement_type)]
+                    # 确保字段值不为空
+                    if description and expected_result:
+                        steps.append(TestStep(
+                            step_number=step_number,
+                            description=description,
+                            expected_result=expected_result
+                        ))
+        
+        # 如果没有有效的步骤，创建一个默认步骤
+        if not steps:
+            steps = [TestStep(
+                step_number=1,
+                description="执行测试步骤",
+                expected_result="验证测试结果"
+            )]
+        
+        # 创建测试用例
+        test_case = TestCase(
+            id=test_id or self.generate_test_id(),  # 使用新的ID生成方法
+            module=module or '通用模块',
+            title=title or '未命名测试用例',
+            preconditions=preconditions or [],
+            steps=steps,
+            priority=priority  # 使用处理后的中文优先级
+        )
+        
+        if verbose:
+            print(f"\nCreated test case: {test_case.title}")
+            print(f"ID: {test_case.id}")  # 打印生成的ID
+            print(f"Module: {test_case.module}")
+            print(f"Priority: {test_case.priority}")
+            print(f"Steps count: {len(test_case.steps)}")
+        
+        # 验证测试用例
+        if self.validate_test_case(test_case):
+            if verbose:
+                print(f"Test case validated and added successfully")
+            return test_case
+        if verbose:
+            print(f"Test case validation failed")
+        return None
+
+    def _is_usable_response(self, response: str) -> bool:
+        """
+        判断LLM响应中是否至少包含一个能通过验证的测试用例
+        用作对冲请求的校验函数，不消耗用例ID
+        
+        Args:
+            response (str): LLM生成的响应文本
             
-        except Exception as e:
-            print(f"Error parsing test cases: {str(e)}")
-            return [self._create_sample_test_case(requirement_type)]
+        Returns:
+            bool: 响应是否可用
+        """
+        case_dicts, _ = extract_test_case_dicts(response, self.structured_output)
+        for tc in case_dicts:
+            try:
+                if self._build_test_case(tc, test_id="validation", verbose=False) is not None:
+                    return True
+            except Exception:
+                continue
+        return False
 
     def _create_sample_test_case(self, requirement_type: str = None) -> TestCase:
         """
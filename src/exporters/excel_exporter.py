@@ -1,136 +1,494 @@
 """
 Excel导出器模块
 负责将测试用例导出为格式化的Excel文件，支持样式美化和自动调整
+使用openpyxl的只写模式逐行流式写入，内存占用与用例数量无关
+合并导出模式只更新已有工作簿中发生变化的行，保留评审人员的手工修改
 """
 
-from typing import List
-import pandas as pd
+from typing import Dict, List, Iterable, AsyncIterable, Optional, Tuple, Union
 from src.core.test_generator import TestCase
-from src.config import EXCEL_TEMPLATE_HEADERS, OUTPUT_DIR
+from src.core.journal import JobJournal
+from src.config import EXCEL_TEMPLATE_HEADERS, OUTPUT_DIR, settings
+import datetime
+import hashlib
+import json
 import os
-from openpyxl.styles import Border, Side, Alignment, PatternFill, Font
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Border, Side, Alignment, PatternFill, Font, NamedStyle
 from openpyxl.utils import get_column_letter
 
+# 各列宽度，顺序与EXCEL_TEMPLATE_HEADERS一致
+COLUMN_WIDTHS = {
+    'A': 15,  # 用例编号
+    'B': 15,  # 所属模块
+    'C': 25,  # 用例标题
+    'D': 10,  # 优先级
+    'E': 20,  # 前置条件
+    'F': 40,  # 测试步骤
+    'G': 40   # 预期结果
+}
+# 优先级列在行中的索引
+PRIORITY_COLUMN = EXCEL_TEMPLATE_HEADERS.index("优先级")
+# 各优先级单元格的背景色
+PRIORITY_COLORS = {
+    "高": 'FFD9D9',
+    "中": 'FFFDCC',
+    "低": 'D9FFD9'
+}
+DATA_ROW_HEIGHT = 60
+SHEET_NAME = 'Test Cases'
+# 用例编号列在行中的索引
+ID_COLUMN = EXCEL_TEMPLATE_HEADERS.index("用例编号")
+# 合并导出添加的列：可见的变更状态，以及隐藏的该行最近一次写入时生成内容的哈希
+STATUS_HEADER = "变更状态"
+HASH_HEADER = "内容哈希"
+STATUS_ADDED = "新增"
+STATUS_UPDATED = "更新"
+STATUS_CONFLICT = "冲突"
+STATUS_REMOVED = "已删除"
+STATUS_COLUMN_WIDTH = 18
+
+
+def build_named_styles() -> List[NamedStyle]:
+    """
+    构建导出工作表使用的命名样式：表头、普通单元格，以及每种优先级颜色各一个单元格样式
+
+    Returns:
+        List[NamedStyle]: 需要注册到工作簿中的样式
+    """
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+
+    header = NamedStyle(name='tc_header')
+    header.font = Font(bold=True)
+    header.fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
+    header.border = border
+    header.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+
+    cell = NamedStyle(name='tc_cell')
+    cell.border = border
+    cell.alignment = Alignment(vertical='top', wrap_text=True)
+
+    styles = [header, cell]
+    # 按优先级着色
+    for color in PRIORITY_COLORS.values():
+        style = NamedStyle(name=f'tc_priority_{color}')
+        style.border = border
+        style.alignment = Alignment(vertical='top', wrap_text=True)
+        style.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+        styles.append(style)
+    return styles
+
+
+def register_named_styles(workbook: Workbook):
+    """把工作簿中还没有的命名样式注册进去"""
+    for style in build_named_styles():
+        if style.name not in workbook.named_styles:
+            workbook.add_named_style(style)
+
+
+def priority_style(priority: str) -> str:
+    """优先级对应的单元格样式名称"""
+    color = PRIORITY_COLORS.get(priority)
+    return f'tc_priority_{color}' if color else 'tc_cell'
+
+
+def row_content_hash(row: List[str]) -> str:
+    """
+    计算一行生成内容的哈希，不包含用例编号
+    用例编号中带有生成日期，内容不变的用例在另一天重新生成时哈希仍然相同，能匹配到已有的行
+
+    Args:
+        row (List[str]): 按EXCEL_TEMPLATE_HEADERS顺序排列的单元格值
+
+    Returns:
+        str: 标识该行内容的十六进制摘要
+    """
+    content = ["" if value is None else str(value) for index, value in enumerate(row) if index != ID_COLUMN]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+
+
+def flatten_test_case(test_case: TestCase) -> List[str]:
+    """
+    把一个测试用例展开为表格中的一行
+
+    Args:
+        test_case (TestCase): 测试用例
+
+    Returns:
+        List[str]: 按EXCEL_TEMPLATE_HEADERS顺序排列的单元格值
+    """
+    # 处理前置条件
+    preconditions_str = "\n".join(f"{i+1}. {p}" for i, p in enumerate(test_case.preconditions))
+    # 处理测试步骤和预期结果
+    steps_str = "\n".join(f"{step.step_number}. {step.description}" for step in test_case.steps)
+    expected_results_str = "\n".join(f"{step.step_number}. {step.expected_result}" for step in test_case.steps)
+    return [
+        test_case.id,
+        test_case.module,
+        test_case.title,
+        test_case.priority,
+        preconditions_str,
+        steps_str,
+        expected_results_str
+    ]
+
+
 class ExcelExporter:
-    def export(self, test_cases: List[TestCase], output_filename: str) -> str:
+    def __init__(self, journal: JobJournal = None):
         """
-        Export test cases to Excel format
-        
+        初始化Excel导出器
+
         Args:
-            test_cases (List[TestCase]): List of test cases to export
-            output_filename (str): Name of the output file
-            
+            journal (JobJournal, optional): 任务日志，日志中已导出的文档会被跳过
+        """
+        self.journal = journal
+
+    def export(self, test_cases: List[TestCase], output_filename: str, document_key: str = None,
+               merge: bool = None) -> str:
+        """
+        将测试用例导出为Excel文件
+
+        Args:
+            test_cases (List[TestCase]): 要导出的测试用例列表
+            output_filename (str): 输出文件名
+            document_key (str, optional): 任务日志中的文档键
+            merge (bool, optional): 是否合并到已有工作簿而不是覆盖，默认使用EXCEL_MERGE_EXPORT
+
+        Returns:
+            str: 导出文件的路径
+        """
+        output_path = self._output_path(output_filename)
+
+        # 任务日志中已经以相同内容导出过的文档直接跳过
+        if self.journal is not None and document_key:
+            fingerprint = JobJournal.fingerprint(test_cases)
+            if self.journal.is_exported(document_key, "excel", output_path, fingerprint):
+                print(f"Excel file already exported: {output_path}")
+                return output_path
+
+        merge = settings.EXCEL_MERGE_EXPORT if merge is None else merge
+        if merge and os.path.exists(output_path):
+            self.export_merge(test_cases, output_filename)
+        else:
+            print(f"\nExporting {len(test_cases)} test cases to Excel")
+            self.export_stream(test_cases, output_filename)
+
+        if self.journal is not None and document_key:
+            self.journal.record_export(document_key, "excel", output_path,
+                                       JobJournal.fingerprint(test_cases))
+        return output_path
+
+    def export_stream(self, test_cases: Iterable[TestCase], output_filename: str) -> str:
+        """
+        逐行流式写入Excel文件
+        工作簿以只写模式打开，每行写入时使用共享的命名样式，内存占用与导出的用例数量无关
+
+        Args:
+            test_cases (Iterable[TestCase]): 要导出的测试用例，可以是生成器
+            output_filename (str): 输出文件名
+
         Returns:
-            str: Path to the exported file
+            str: 导出文件的路径
         """
-        # Convert test cases to DataFrame format
-        data = []
+        writer = _StreamingSheetWriter()
         for test_case in test_cases:
-            # 处理前置条件
-            preconditions_str = ""
-            if test_case.preconditions:
-                preconditions_str = "\n".join([f"{i+1}. {p}" for i, p in enumerate(test_case.preconditions)])
-            
-            # 处理测试步骤和预期结果
-            steps_str = ""
-            expected_results_str = ""
-            
-            for step in test_case.steps:
-                if steps_str:
-                    steps_str += "\n"
-                steps_str += f"{step.step_number}. {step.description}"
-                
-                if expected_results_str:
-                    expected_results_str += "\n"
-                expected_results_str += f"{step.step_number}. {step.expected_result}"
-            
-            # 添加到数据列表
-            data.append({
-                "用例编号": test_case.id,
-                "所属模块": test_case.module,
-                "用例标题": test_case.title,
-                "优先级": test_case.priority,
-                "前置条件": preconditions_str,
-                "测试步骤": steps_str,
-                "预期结果": expected_results_str
-            })
-        
-        df = pd.DataFrame(data)
-        print(f"\nExporting {len(data)} test cases to Excel")
-        print("DataFrame columns:", df.columns.tolist())
-        print("DataFrame shape:", df.shape)
-        
-        # Ensure columns are in the correct order
-        df = df.reindex(columns=EXCEL_TEMPLATE_HEADERS)
-        
-        # Create output path
+            writer.append(test_case)
+        return writer.save(self._output_path(output_filename))
+
+    def export_merge(self, test_cases: Iterable[TestCase], output_filename: str) -> str:
+        """
+        将测试用例合并到已有工作簿，只修改发生变化的部分
+
+        已有的行先按生成内容的哈希（保存在隐藏的内容哈希列中）匹配，再按用例编号匹配：
+
+        - 内容没有变化的行保持原样
+        - 内容变化的行逐个单元格更新并标记为更新；生成之后被评审人员修改过的行
+          保留评审人员的内容，改为标记为冲突
+        - 没有匹配行的测试用例追加到末尾并标记为新增
+        - 没有对应测试用例的生成行标记为已删除
+
+        工作簿先以只读方式扫描一遍，没有任何变化时不会重写。
+        评审人员添加的行（没有内容哈希）和额外的列不会被修改
+
+        Args:
+            test_cases (Iterable[TestCase]): 要合并的测试用例
+            output_filename (str): 工作簿文件名，文件不存在时按常规方式导出
+
+        Returns:
+            str: 导出文件的路径
+        """
+        output_path = self._output_path(output_filename)
+        if not os.path.exists(output_path):
+            return self.export_stream(test_cases, output_filename)
+
+        plan = _MergePlan.scan(output_path, test_cases)
+        if plan.has_changes:
+            plan.apply()
+        print(f"Excel file merged: {output_path} ({plan.summary()})")
+        return output_path
+
+    async def export_async(self, test_cases: Union[AsyncIterable[TestCase], Iterable[TestCase]],
+                           output_filename: str) -> str:
+        """
+        从异步迭代器（如TestGenerator.stream_test_cases）流式写入Excel文件，每收到一个测试用例立即写入一行
+
+        Args:
+            test_cases (AsyncIterable[TestCase] | Iterable[TestCase]): 要导出的测试用例
+            output_filename (str): 输出文件名
+
+        Returns:
+            str: 导出文件的路径
+        """
+        if not hasattr(test_cases, '__aiter__'):
+            return self.export_stream(test_cases, output_filename)
+        writer = _StreamingSheetWriter()
+        async for test_case in test_cases:
+            writer.append(test_case)
+        return writer.save(self._output_path(output_filename))
+
+    @staticmethod
+    def _output_path(output_filename: str) -> str:
+        # 构建输出路径
         if not output_filename.endswith('.xlsx'):
             output_filename += '.xlsx'
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        # Export to Excel with formatting
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Test Cases')
-            
-            # Get the workbook and the worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Test Cases']
-            
-            # Define styles
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            header_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
-            header_font = Font(bold=True)
-            header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            
-            cell_alignment = Alignment(vertical='top', wrap_text=True)
-            
-            # Set column widths
-            column_widths = {
-                'A': 15,  # 用例编号
-                'B': 15,  # 所属模块
-                'C': 25,  # 用例标题
-                'D': 10,  # 优先级
-                'E': 20,  # 前置条件
-                'F': 40,  # 测试步骤
-                'G': 40   # 预期结果
-            }
-            
-            for col_letter, width in column_widths.items():
-                worksheet.column_dimensions[col_letter].width = width
-            
-            # Format headers
-            for col_num, header in enumerate(df.columns, 1):
-                cell = worksheet.cell(row=1, column=col_num)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = header_alignment
-            
-            # Format all data cells
-            for row_num in range(2, len(df) + 2):
-                # Set row height
-                worksheet.row_dimensions[row_num].height = 60
-                
-                for col_num in range(1, len(df.columns) + 1):
-                    cell = worksheet.cell(row=row_num, column=col_num)
-                    cell.border = border
-                    cell.alignment = cell_alignment
-                    
-                    # Color code priorities
-                    if col_num == 4:  # Priority column
-                        value = cell.value
-                        if value == "高":
-                            cell.fill = PatternFill(start_color='FFD9D9', end_color='FFD9D9', fill_type='solid')
-                        elif value == "中":
-                            cell.fill = PatternFill(start_color='FFFDCC', end_color='FFFDCC', fill_type='solid')
-                        elif value == "低":
-                            cell.fill = PatternFill(start_color='D9FFD9', end_color='D9FFD9', fill_type='solid')
-        
-        print(f"Excel file generated: {output_path}")
-        return output_path 
\ No newline at end of file
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        return os.path.join(OUTPUT_DIR, output_filename)
+
+
+class _StreamingSheetWriter:
+    """
+    按测试用例模板布局的只写工作表：带样式的表头行、固定列宽，以及通过命名样式实现的优先级着色
+    """
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet(SHEET_NAME)
+        self.rows = 0
+        self._style_arrays = {}
+        register_named_styles(self.workbook)
+
+        # 列宽和行高必须在写入任何行之前设置
+        for col_letter, width in COLUMN_WIDTHS.items():
+            self.worksheet.column_dimensions[col_letter].width = width
+        self.worksheet.sheet_format.defaultRowHeight = DATA_ROW_HEIGHT
+        self.worksheet.sheet_format.customHeight = True
+        self.worksheet.row_dimensions[1].height = 20
+
+        self.worksheet.append([self._cell(header, 'tc_header') for header in EXCEL_TEMPLATE_HEADERS])
+
+    def _cell(self, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.worksheet, value=value)
+        style_array = self._style_arrays.get(style)
+        if style_array is None:
+            # 命名样式只解析一次，之后各单元格共享同一个样式数组；
+            # 只写单元格在整行写入时立即序列化，之后不会再被修改
+            cell.style = style
+            self._style_arrays[style] = cell._style
+        else:
+            cell._style = style_array
+        return cell
+
+    def append(self, test_case: TestCase):
+        """把一个测试用例写为带样式的一行"""
+        row = []
+        for col_num, value in enumerate(flatten_test_case(test_case)):
+            style = 'tc_cell'
+            if col_num == PRIORITY_COLUMN:
+                style = priority_style(value)
+            row.append(self._cell(value, style))
+        self.worksheet.append(row)
+        self.rows += 1
+
+    def save(self, output_path: str) -> str:
+        self.workbook.save(output_path)
+        print(f"Excel file generated: {output_path} ({self.rows} test cases)")
+        return output_path
+
+
+class _MergePlan:
+    """
+    已有工作簿与新一组测试用例之间的行级差异
+    以只读模式扫描工作表确定差异，有变化时再用openpyxl完整加载、修改并保存
+    """
+
+    def __init__(self, output_path: str, columns: Dict[str, int]):
+        self.output_path = output_path
+        self.columns = columns                     # 表头 -> 列号(从1开始)
+        self.unchanged = 0
+        self.updates: List[Tuple[int, List[str], str]] = []        # (行号, 单元格值, 哈希)
+        self.conflicts: List[Tuple[int, str]] = []                 # (行号, 哈希)
+        self.additions: List[Tuple[List[str], str]] = []           # (单元格值, 哈希)
+        self.removals: List[int] = []
+        self.backfill: Dict[int, str] = {}         # 行号 -> 哈希，哈希列是新加的列时补写
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.updates or self.conflicts or self.additions or self.removals
+                    or STATUS_HEADER not in self.columns or HASH_HEADER not in self.columns)
+
+    def summary(self) -> str:
+        return (f"{self.unchanged} unchanged, {len(self.updates)} updated, "
+                f"{len(self.conflicts)} conflicts, {len(self.additions)} added, {len(self.removals)} removed")
+
+    @staticmethod
+    def _worksheet(workbook: Workbook):
+        """测试用例工作表，不存在时使用第一个工作表"""
+        return workbook[SHEET_NAME] if SHEET_NAME in workbook.sheetnames else workbook.worksheets[0]
+
+    @classmethod
+    def scan(cls, output_path: str, test_cases: Iterable[TestCase]) -> "_MergePlan":
+        """以只读模式扫描一遍工作表，确定哪些行需要修改"""
+        new_cases = []
+        for test_case in test_cases:
+            values = flatten_test_case(test_case)
+            new_cases.append((values, row_content_hash(values)))
+
+        workbook = load_workbook(output_path, read_only=True)
+        try:
+            worksheet = cls._worksheet(workbook)
+            # 非Excel写出的文件中记录的使用范围可能不准确，按实际单元格读取
+            worksheet.reset_dimensions()
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = {}
+            for column, value in enumerate(header, start=1):
+                if value:
+                    columns.setdefault(str(value), column)
+            missing = [name for name in EXCEL_TEMPLATE_HEADERS if name not in columns]
+            if missing:
+                raise ValueError(f"Not a test case workbook, missing columns {missing}: {output_path}")
+            plan = cls(output_path, columns)
+
+            template = [columns[name] for name in EXCEL_TEMPLATE_HEADERS]
+            id_column = columns[EXCEL_TEMPLATE_HEADERS[ID_COLUMN]]
+            hash_column = columns.get(HASH_HEADER)
+            status_column = columns.get(STATUS_HEADER)
+            by_hash: Dict[str, List[int]] = {}
+            by_id: Dict[str, List[int]] = {}
+            removed: Dict[int, bool] = {}
+            edited = set()
+
+            def value_at(row: tuple, column: Optional[int]) -> Optional[str]:
+                if column is None or column > len(row) or row[column - 1] is None:
+                    return None
+                return str(row[column - 1])
+
+            for row_number, row in enumerate(rows, start=2):
+                values = [value_at(row, column) for column in template]
+                current = row_content_hash(values)
+                if hash_column is None:
+                    # 第一次合并到普通导出的工作簿：按现有内容接管这些行
+                    if not any(values):
+                        continue
+                    stored = current
+                    plan.backfill[row_number] = stored
+                else:
+                    stored = value_at(row, hash_column)
+                    if not stored:
+                        # 手工添加的行，不属于生成器管理
+                        continue
+                    if current != stored:
+                        # 生成之后被评审人员修改过
+                        edited.add(row_number)
+                test_id = value_at(row, id_column)
+                status = value_at(row, status_column)
+                removed[row_number] = bool(status) and status.startswith(STATUS_REMOVED)
+                by_hash.setdefault(stored, []).append(row_number)
+                if test_id:
+                    by_id.setdefault(test_id, []).append(row_number)
+        finally:
+            workbook.close()
+
+        matched = set()
+
+        def take(candidates: Optional[List[int]]) -> Optional[int]:
+            while candidates:
+                row_number = candidates.pop(0)
+                if row_number not in matched:
+                    matched.add(row_number)
+                    return row_number
+            return None
+
+        for values, content in new_cases:
+            row_number = take(by_hash.get(content))
+            if row_number is not None and not removed[row_number]:
+                plan.unchanged += 1
+                continue
+            if row_number is None:
+                row_number = take(by_id.get(str(values[ID_COLUMN])))
+            if row_number is None:
+                plan.additions.append((values, content))
+            elif row_number in edited:
+                plan.conflicts.append((row_number, content))
+            else:
+                plan.updates.append((row_number, values, content))
+
+        plan.removals = sorted(row_number for row_number in removed
+                               if row_number not in matched and not removed[row_number])
+        return plan
+
+    def apply(self):
+        """完整加载工作簿，写入修改的单元格、追加的行和状态标记后保存"""
+        workbook = load_workbook(self.output_path)
+        worksheet = self._worksheet(workbook)
+        # 工作簿中可能缺少某些优先级的命名样式
+        register_named_styles(workbook)
+
+        def set_cell(row: int, column: int, value, style: str = None):
+            cell = worksheet.cell(row, column)
+            cell.value = value
+            if style:
+                cell.style = style
+
+        status_column = self._ensure_column(worksheet, STATUS_HEADER, hidden=False)
+        hash_column = self._ensure_column(worksheet, HASH_HEADER, hidden=True)
+        template = [self.columns[name] for name in EXCEL_TEMPLATE_HEADERS]
+        today = datetime.date.today().isoformat()
+
+        for row_number, content in self.backfill.items():
+            set_cell(row_number, hash_column, content)
+
+        for row_number, values, content in self.updates:
+            for index, (column, value) in enumerate(zip(template, values)):
+                current = worksheet.cell(row_number, column).value
+                if index == ID_COLUMN or ("" if current is None else str(current)) == value:
+                    continue
+                set_cell(row_number, column, value, priority_style(value) if index == PRIORITY_COLUMN else None)
+            set_cell(row_number, status_column, f"{STATUS_UPDATED} {today}")
+            set_cell(row_number, hash_column, content)
+
+        for row_number, content in self.conflicts:
+            # 保留评审人员的版本；写入新的内容哈希后，生成器再次修改该用例之前不会重复标记冲突
+            set_cell(row_number, status_column, f"{STATUS_CONFLICT} {today}")
+            set_cell(row_number, hash_column, content)
+
+        for row_number in self.removals:
+            set_cell(row_number, status_column, f"{STATUS_REMOVED} {today}")
+
+        for values, content in self.additions:
+            row_number = worksheet.max_row + 1
+            for index, (column, value) in enumerate(zip(template, values)):
+                set_cell(row_number, column, value, priority_style(value) if index == PRIORITY_COLUMN else 'tc_cell')
+            set_cell(row_number, status_column, f"{STATUS_ADDED} {today}", 'tc_cell')
+            set_cell(row_number, hash_column, content)
+            worksheet.row_dimensions[row_number].height = DATA_ROW_HEIGHT
+
+        # 写到临时文件后替换，写入中断不会损坏原文件
+        temp_path = self.output_path + ".tmp"
+        workbook.save(temp_path)
+        os.replace(temp_path, self.output_path)
+
+    def _ensure_column(self, worksheet, header: str, hidden: bool) -> int:
+        """返回表头所在的列，不存在时在最后一列之后添加"""
+        column = self.columns.get(header)
+        if column is None:
+            column = max(worksheet.max_column, max(self.columns.values())) + 1
+            cell = worksheet.cell(1, column, header)
+            cell.style = 'tc_header'
+            dimension = worksheet.column_dimensions[get_column_letter(column)]
+            dimension.width = STATUS_COLUMN_WIDTH
+            dimension.hidden = hidden
+            self.columns[header] = column
+        return column
@@ -0,0 +1,173 @@
+"""
+导出流水线模块
+在线程池或进程池中并行运行所有已配置的导出器，不阻塞事件循环；
+测试用例只扁平化一次，所有导出器共享同一份只读记录
+"""
+
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pydantic import BaseModel
+from src.core.journal import JobJournal
+from src.core.records import to_records
+from src.config import settings
+import asyncio
+import time
+
+# 导出函数签名：export(records, file_base_name, document_key=None) -> 导出文件路径
+ExportFunction = Callable[..., str]
+
+
+class ExportResult(BaseModel):
+    """
+    导出结果数据模型
+    记录单个导出器的输出路径和耗时
+    """
+    name: str            # 导出器名称
+    path: str = ""       # 导出文件路径，失败时为空
+    seconds: float = 0.0 # 导出器自身的耗时(秒)
+    error: str = ""      # 导出失败时的错误信息
+
+
+def _timed_export(func: ExportFunction, records, file_base_name: str, document_key: Optional[str]):
+    """
+    在工作线程或子进程中运行导出函数并计时
+    定义在模块级别，以便进程池序列化
+    """
+    start = time.perf_counter()
+    path = func(records, file_base_name, document_key=document_key)
+    return path, time.perf_counter() - start
+
+
+def default_exporters(journal: JobJournal = None, formats: List[str] = None) -> Dict[str, ExportFunction]:
+    """
+    创建默认的导出器集合
+
+    Args:
+        journal (JobJournal, optional): 任务日志，仅线程池模式可用（数据库连接无法传递到子进程）
+        formats (List[str], optional): 导出格式(excel/xmind/jsonl/csv/parquet)，默认使用EXPORT_FORMATS
+
+    Returns:
+        Dict[str, ExportFunction]: 导出器名称到导出函数的映射
+
+    Raises:
+        ValueError: 格式名称无法识别时抛出
+    """
+    # 只导入用到的导出器，只导出XMind时不会加载openpyxl
+    exporters = {}
+    for name in formats or settings.EXPORT_FORMATS:
+        if name == "excel":
+            from src.exporters.excel_exporter import ExcelExporter
+            exporters[name] = ExcelExporter(journal).export
+        elif name == "xmind":
+            from src.exporters.xmind_exporter import XMindExporter
+            exporters[name] = XMindExporter(journal).export_xmind
+        else:
+            from src.exporters.tabular_exporter import TABULAR_EXPORTERS
+            if name not in TABULAR_EXPORTERS:
+                raise ValueError(f"Unknown export format: {name}")
+            exporters[name] = TABULAR_EXPORTERS[name](journal).export
+    return exporters
+
+
+class ExportPipeline:
+    """
+    导出流水线类
+    将同一组测试用例并行导出为多种格式，总耗时约等于最慢的导出器，
+    导出期间事件循环可以继续处理其他文档的LLM请求
+
+    导出函数接收(records, file_base_name, document_key=None)，records为CaseRecord列表，
+    file_base_name为不含扩展名的文件名，由导出器自行添加扩展名。
+    使用进程池时导出函数及其绑定的对象必须可以被pickle序列化。
+    """
+
+    def __init__(self, exporters: Dict[str, ExportFunction] = None, executor: str = None,
+                 max_workers: int = None):
+        """
+        初始化导出流水线
+
+        Args:
+            exporters (Dict[str, ExportFunction], optional): 导出器名称到导出函数的映射，默认使用EXPORT_FORMATS中的格式
+            executor (str, optional): 执行方式(thread/process)，默认使用EXPORT_EXECUTOR
+            max_workers (int, optional): 工作线程/进程数上限，默认使用EXPORT_MAX_WORKERS
+        """
+        self.exporters = dict(exporters) if exporters is not None else default_exporters()
+        self.executor_type = executor or settings.EXPORT_EXECUTOR
+        if self.executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown export executor: {self.executor_type}")
+        self.max_workers = max_workers or settings.EXPORT_MAX_WORKERS
+        self._executor: Optional[Executor] = None
+
+    def register(self, name: str, export: ExportFunction):
+        """
+        添加或替换一个导出器
+
+        Args:
+            name (str): 导出器名称
+            export (ExportFunction): 导出函数
+        """
+        self.exporters[name] = export
+
+    def _get_executor(self) -> Executor:
+        """延迟创建线程池或进程池，在流水线的整个生命周期内复用"""
+        if self._executor is None:
+            if self.executor_type == "process":
+                # 进程池会导入multiprocessing，只在使用时才导入
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="export")
+        return self._executor
+
+    async def run(self, test_cases, file_base_name: str, document_key: str = None) -> List[ExportResult]:
+        """
+        并行运行所有导出器
+
+        Args:
+            test_cases (Iterable[TestCase | CaseRecord]): 待导出的测试用例
+            file_base_name (str): 输出文件名（不含扩展名）
+            document_key (str, optional): 任务日志中的文档键
+
+        Returns:
+            List[ExportResult]: 与导出器注册顺序一致的导出结果，单个导出器失败不影响其他导出器
+        """
+        # 只扁平化一次，所有导出器共享同一份记录
+        records = to_records(test_cases)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+
+        names = list(self.exporters)
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(executor, _timed_export, self.exporters[name],
+                                 records, file_base_name, document_key)
+            for name in names
+        ), return_exceptions=True)
+
+        results = []
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Export {name} failed: {str(outcome)}")
+                results.append(ExportResult(name=name, error=str(outcome)))
+            else:
+                path, seconds = outcome
+                print(f"Export {name}: {path} ({seconds:.2f}s)")
+                results.append(ExportResult(name=name, path=path, seconds=seconds))
+
+        elapsed = time.perf_counter() - started
+        slowest = max((result.seconds for result in results), default=0.0)
+        print(f"Exported {len(records)} test cases to {len(results)} formats in {elapsed:.2f}s "
+              f"(slowest exporter {slowest:.2f}s, {self.executor_type} pool)")
+        return results
+
+    def close(self):
+        """关闭线程池或进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
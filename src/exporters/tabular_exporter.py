@@ -0,0 +1,380 @@
+"""
+表格导出器模块
+将测试用例扁平化为规范化的用例表和步骤表，导出为JSON Lines、CSV或Parquet格式，供下游分析和测试管理系统导入
+
+每次导出生成一个目录，目录中包含两张表：
+    cases: id, module, title, priority, preconditions, step_count
+    steps: case_id, step_number, description, expected_result
+步骤表按用例顺序写入，step_count记录每个用例的步骤数，读取时两张表顺序对齐即可还原用例
+
+三种格式都按块写入、支持追加：JSONL和CSV追加到已有文件末尾，Parquet每次导出新增一个part文件；
+导出中途失败时撤销本次写入的内容，已有的导出结果保持不变
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List
+from src.core.journal import JobJournal
+from src.core.test_generator import TestCase, TestStep
+from src.config import OUTPUT_DIR, settings
+import csv
+import glob
+import json
+import os
+import shutil
+
+# 用例表和步骤表的列
+CASE_COLUMNS = ["id", "module", "title", "priority", "preconditions", "step_count"]
+STEP_COLUMNS = ["case_id", "step_number", "description", "expected_result"]
+# 两张表在导出目录中的名称
+CASE_TABLE = "cases"
+STEP_TABLE = "steps"
+
+
+def flatten_case_rows(test_case) -> (Dict[str, Any], List[Dict[str, Any]]):
+    """
+    将测试用例扁平化为一行用例记录和若干行步骤记录
+
+    Args:
+        test_case (TestCase | CaseRecord): 测试用例
+
+    Returns:
+        (Dict[str, Any], List[Dict[str, Any]]): 用例行和步骤行
+    """
+    case_row = {
+        "id": test_case.id,
+        "module": test_case.module,
+        "title": test_case.title,
+        "priority": test_case.priority,
+        "preconditions": list(test_case.preconditions),
+        "step_count": len(test_case.steps),
+    }
+    step_rows = [{
+        "case_id": test_case.id,
+        "step_number": step.step_number,
+        "description": step.description,
+        "expected_result": step.expected_result,
+    } for step in test_case.steps]
+    return case_row, step_rows
+
+
+def build_test_case(case_row: Dict[str, Any], step_rows: List[Dict[str, Any]]) -> TestCase:
+    """
+    由用例行和步骤行还原测试用例
+
+    Args:
+        case_row (Dict[str, Any]): 用例行
+        step_rows (List[Dict[str, Any]]): 该用例的步骤行
+
+    Returns:
+        TestCase: 测试用例
+    """
+    return TestCase(
+        id=case_row["id"],
+        module=case_row["module"],
+        title=case_row["title"],
+        priority=case_row["priority"],
+        preconditions=list(case_row["preconditions"]),
+        steps=[TestStep(
+            step_number=int(step["step_number"]),
+            description=step["description"],
+            expected_result=step["expected_result"]
+        ) for step in step_rows]
+    )
+
+
+class TabularExporter(ABC):
+    """
+    表格导出器基类
+    逐块累积用例行和步骤行，每满chunk_size个用例写出一次，内存占用与用例数量无关
+    """
+
+    # 导出器名称，同时作为导出目录的扩展名和任务日志中的导出器键
+    format_name = ""
+
+    def __init__(self, journal: JobJournal = None, chunk_size: int = None):
+        """
+        初始化表格导出器
+
+        Args:
+            journal (JobJournal, optional): 任务日志，设置后已导出的文档不会重复导出（追加模式下可避免重复追加）
+            chunk_size (int, optional): 每次写出的用例数，默认使用TABULAR_CHUNK_SIZE
+        """
+        self.journal = journal
+        self.chunk_size = chunk_size or settings.TABULAR_CHUNK_SIZE
+
+    def export(self, test_cases: Iterable[TestCase], output_filename: str,
+               document_key: str = None, append: bool = False) -> str:
+        """
+        将测试用例导出为用例表和步骤表
+
+        Args:
+            test_cases (Iterable[TestCase]): 待导出的测试用例，可以是生成器
+            output_filename (str): 输出目录名（自动添加格式扩展名）
+            document_key (str, optional): 任务日志中的文档键（需要传入列表才能计算内容指纹）
+            append (bool): 是否追加到已有的导出结果之后，否则覆盖
+
+        Returns:
+            str: 导出目录的完整路径
+        """
+        output_path = self._output_path(output_filename)
+        journaled = self.journal is not None and document_key and isinstance(test_cases, list)
+        if journaled:
+            fingerprint = JobJournal.fingerprint(test_cases)
+            if self.journal.is_exported(document_key, self.format_name, output_path, fingerprint):
+                print(f"{self.format_name} export already exists: {output_path}")
+                return output_path
+
+        if not append and os.path.isdir(output_path):
+            shutil.rmtree(output_path)
+        os.makedirs(output_path, exist_ok=True)
+
+        cases = 0
+        case_rows, step_rows = [], []
+        completed = False
+        try:
+            # _open中途失败时已打开的写入目标同样由_close关闭
+            self._open(output_path)
+            for test_case in test_cases:
+                case_row, case_steps = flatten_case_rows(test_case)
+                case_rows.append(case_row)
+                step_rows.extend(case_steps)
+                if len(case_rows) >= self.chunk_size:
+                    self._write_chunk(case_rows, step_rows)
+                    cases += len(case_rows)
+                    case_rows, step_rows = [], []
+            if case_rows:
+                self._write_chunk(case_rows, step_rows)
+                cases += len(case_rows)
+            completed = True
+        finally:
+            self._close(completed)
+
+        if journaled:
+            self.journal.record_export(document_key, self.format_name, output_path, fingerprint)
+        print(f"{self.format_name} export generated: {output_path} ({cases} test cases)")
+        return output_path
+
+    def _output_path(self, output_filename: str) -> str:
+        # 确保输出目录名以格式扩展名结尾
+        extension = f".{self.format_name}"
+        if not output_filename.endswith(extension):
+            output_filename += extension
+        return os.path.join(OUTPUT_DIR, output_filename)
+
+    @abstractmethod
+    def _open(self, output_path: str):
+        """打开两张表的写入目标，每打开一个就立即记录下来，以便中途失败时_close能够关闭"""
+
+    @abstractmethod
+    def _write_chunk(self, case_rows: List[Dict[str, Any]], step_rows: List[Dict[str, Any]]):
+        """写出一块用例行和步骤行"""
+
+    @abstractmethod
+    def _close(self, completed: bool):
+        """
+        关闭已打开的写入目标，_open可能只完成了一部分
+
+        Args:
+            completed (bool): 导出是否成功完成，为False时撤销本次写入的内容
+        """
+
+
+class JsonlExporter(TabularExporter):
+    """
+    JSON Lines导出器
+    每张表一个.jsonl文件，每行一个JSON对象，前置条件保存为字符串数组
+    """
+
+    format_name = "jsonl"
+
+    def _open(self, output_path: str):
+        # 文件 -> 打开时的长度，失败时截断回这个长度
+        self._files = {}
+        for table in (CASE_TABLE, STEP_TABLE):
+            f = open(os.path.join(output_path, f"{table}.jsonl"), 'a', encoding='utf-8')
+            self._files[table] = (f, f.tell())
+
+    def _write_chunk(self, case_rows, step_rows):
+        for table, rows in ((CASE_TABLE, case_rows), (STEP_TABLE, step_rows)):
+            self._files[table][0].write("".join(
+                json.dumps(row, ensure_ascii=False) + "\n" for row in rows
+            ))
+
+    def _close(self, completed: bool):
+        _close_files(self._files, completed)
+
+
+class CsvExporter(TabularExporter):
+    """
+    CSV导出器
+    每张表一个.csv文件，新文件带UTF-8 BOM以便Excel正确识别中文，前置条件保存为JSON数组字符串
+    """
+
+    format_name = "csv"
+
+    def _open(self, output_path: str):
+        self._files = {}
+        self._writers = {}
+        for table, columns in ((CASE_TABLE, CASE_COLUMNS), (STEP_TABLE, STEP_COLUMNS)):
+            path = os.path.join(output_path, f"{table}.csv")
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            # 只有新文件才写BOM和表头，追加时BOM不能出现在文件中间
+            f = open(path, 'a', encoding='utf-8-sig' if is_new else 'utf-8', newline='')
+            self._files[table] = (f, f.tell())
+            writer = csv.DictWriter(f, fieldnames=columns)
+            if is_new:
+                writer.writeheader()
+            self._writers[table] = writer
+
+    def _write_chunk(self, case_rows, step_rows):
+        self._writers[CASE_TABLE].writerows(
+            dict(row, preconditions=json.dumps(row["preconditions"], ensure_ascii=False))
+            for row in case_rows
+        )
+        self._writers[STEP_TABLE].writerows(step_rows)
+
+    def _close(self, completed: bool):
+        _close_files(self._files, completed)
+
+
+class ParquetExporter(TabularExporter):
+    """
+    Parquet导出器
+    每张表一个子目录，每次导出新增一个part文件，每块用例写为一个行组；
+    前置条件保存为字符串列表列。需要安装pyarrow
+    """
+
+    format_name = "parquet"
+
+    def _open(self, output_path: str):
+        # 表 -> (写入器, part文件路径)，在导入pyarrow之前初始化，导入失败时_close也能执行
+        self._writers = {}
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schemas = {
+            CASE_TABLE: pa.schema([
+                ("id", pa.string()),
+                ("module", pa.string()),
+                ("title", pa.string()),
+                ("priority", pa.string()),
+                ("preconditions", pa.list_(pa.string())),
+                ("step_count", pa.int32()),
+            ]),
+            STEP_TABLE: pa.schema([
+                ("case_id", pa.string()),
+                ("step_number", pa.int32()),
+                ("description", pa.string()),
+                ("expected_result", pa.string()),
+            ]),
+        }
+        self._table_class = pa.Table
+        for table, schema in schemas.items():
+            table_dir = os.path.join(output_path, table)
+            os.makedirs(table_dir, exist_ok=True)
+            # 追加时使用下一个part编号，已有的part文件保持不变
+            part = len(glob.glob(os.path.join(table_dir, "part-*.parquet")))
+            path = os.path.join(table_dir, f"part-{part:05d}.parquet")
+            self._writers[table] = (pq.ParquetWriter(path, schema), path)
+
+    def _write_chunk(self, case_rows, step_rows):
+        for table, rows in ((CASE_TABLE, case_rows), (STEP_TABLE, step_rows)):
+            writer = self._writers[table][0]
+            writer.write_table(self._table_class.from_pylist(rows, schema=writer.schema))
+
+    def _close(self, completed: bool):
+        writers, self._writers = self._writers, {}
+        for writer, path in writers.values():
+            try:
+                writer.close()
+            finally:
+                # 本次导出的part文件不完整，删除后不会被read_test_cases读到
+                if not completed and os.path.exists(path):
+                    os.remove(path)
+
+
+def _close_files(files: Dict[str, Any], completed: bool):
+    """
+    关闭JSONL/CSV导出打开的文件，导出失败时先截断回打开时的长度
+
+    Args:
+        files (Dict[str, Any]): 表名 -> (文件对象, 打开时的长度)
+        completed (bool): 导出是否成功完成
+    """
+    for f, size in files.values():
+        try:
+            if not completed:
+                f.truncate(size)
+        finally:
+            f.close()
+    files.clear()
+
+
+def _read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv(path: str, is_case_table: bool) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if is_case_table:
+                row["preconditions"] = json.loads(row["preconditions"] or "[]")
+                row["step_count"] = int(row["step_count"])
+            yield row
+
+
+def _read_parquet(table_dir: str, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    import pyarrow.parquet as pq
+
+    for path in sorted(glob.glob(os.path.join(table_dir, "part-*.parquet"))):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield from batch.to_pylist()
+
+
+def _read_table(export_path: str, table: str, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """按导出目录的扩展名选择读取方式，逐行返回表中的记录"""
+    if export_path.endswith(".jsonl"):
+        return _read_jsonl(os.path.join(export_path, f"{table}.jsonl"))
+    if export_path.endswith(".csv"):
+        return _read_csv(os.path.join(export_path, f"{table}.csv"), table == CASE_TABLE)
+    if export_path.endswith(".parquet"):
+        return _read_parquet(os.path.join(export_path, table), chunk_size)
+    raise ValueError(f"Unknown tabular export format: {export_path}")
+
+
+def read_test_cases(export_path: str, chunk_size: int = None) -> Iterator[TestCase]:
+    """
+    惰性读取表格导出结果并还原为测试用例，两张表同步流式读取，不会一次性载入内存
+
+    Args:
+        export_path (str): 导出目录路径（以.jsonl、.csv或.parquet结尾）
+        chunk_size (int, optional): Parquet每批读取的行数，默认使用TABULAR_CHUNK_SIZE
+
+    Yields:
+        TestCase: 测试用例
+
+    Raises:
+        ValueError: 导出格式无法识别或步骤表与用例表不一致时抛出
+    """
+    chunk_size = chunk_size or settings.TABULAR_CHUNK_SIZE
+    cases = _read_table(export_path, CASE_TABLE, chunk_size)
+    steps = _read_table(export_path, STEP_TABLE, chunk_size)
+    for case_row in cases:
+        step_rows = []
+        for _ in range(int(case_row["step_count"])):
+            step = next(steps, None)
+            if step is None or step["case_id"] != case_row["id"]:
+                raise ValueError(f"Step table out of sync at test case {case_row['id']}: {export_path}")
+            step_rows.append(step)
+        yield build_test_case(case_row, step_rows)
+
+
+# 格式名称到导出器类的映射
+TABULAR_EXPORTERS = {
+    exporter.format_name: exporter
+    for exporter in (JsonlExporter, CsvExporter, ParquetExporter)
+}
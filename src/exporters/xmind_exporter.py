@@ -3,103 +3,299 @@ XMind导出器模块
 负责将测试用例导出为XMind思维导图格式，支持层级结构和主题组织
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, AsyncIterable, Union
 import json
 import os
+import shutil
+import tempfile
+import zipfile
 from src.core.test_generator import TestCase
-from src.config import OUTPUT_DIR
+from src.core.journal import JobJournal
+from src.config import OUTPUT_DIR, settings
+
+# 根主题和画布标题
+ROOT_TITLE = "Test Cases"
+# 每个模块的临时缓冲区在内存中的上限，超过后自动转存到磁盘
+MODULE_SPOOL_SIZE = 1024 * 1024
+
+
+def build_case_node(test_case: TestCase) -> Dict[str, Any]:
+    """
+    创建测试用例节点：用例 -> 优先级/前置条件/测试步骤 -> 预期结果
+
+    Args:
+        test_case (TestCase): 测试用例
+
+    Returns:
+        Dict[str, Any]: 以title/children表示的节点
+    """
+    case_node = {
+        "title": f"{test_case.id}: {test_case.title}",
+        "children": []
+    }
+
+    # 添加优先级信息
+    info_node = {
+        "title": f"优先级: {test_case.priority}",
+        "children": []
+    }
+    case_node["children"].append(info_node)
+
+    # 添加前置条件
+    if test_case.preconditions:
+        precond_node = {
+            "title": "前置条件",
+            "children": [{"title": precond} for precond in test_case.preconditions]
+        }
+        case_node["children"].append(precond_node)
+
+    # 添加测试步骤和预期结果
+    steps_node = {
+        "title": "测试步骤",
+        "children": []
+    }
+    for step in test_case.steps:
+        step_node = {
+            "title": f"{step.step_number}. {step.description}",
+            "children": [{
+                "title": f"预期结果: {step.expected_result}"
+            }]
+        }
+        steps_node["children"].append(step_node)
+    case_node["children"].append(steps_node)
+    return case_node
+
 
 class XMindExporter:
     """
     XMind导出器类
     将测试用例转换为结构化的思维导图格式
     """
-    
-    def export(self, test_cases: List[TestCase], output_filename: str) -> str:
+
+    def __init__(self, journal: JobJournal = None):
+        """
+        初始化XMind导出器
+
+        Args:
+            journal (JobJournal, optional): 任务日志，设置后已导出的文档不会重复导出
+        """
+        self.journal = journal
+
+    def export(self, test_cases: List[TestCase], output_filename: str, document_key: str = None) -> str:
         """
         将测试用例导出为XMind格式的JSON文件
-        
+
         Args:
             test_cases (List[TestCase]): 待导出的测试用例列表
             output_filename (str): 输出文件名
-            
+            document_key (str, optional): 任务日志中的文档键
+
         Returns:
             str: 导出文件的完整路径
         """
+        # 确保输出文件名以.json结尾
+        if not output_filename.endswith('.json'):
+            output_filename = output_filename.replace('.xmind', '.json')
+            if not output_filename.endswith('.json'):
+                output_filename += '.json'
+
+        # 创建输出路径
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+
+        # 任务日志中记录相同内容已导出到同一路径时跳过
+        if self._already_exported(test_cases, output_path, document_key):
+            return output_path
+
         # 创建思维导图结构
         mindmap = {
-            "title": "Test Cases",
+            "title": ROOT_TITLE,
             "children": []
         }
-        
+
         # 按模块分组测试用例
         module_dict = {}
         for test_case in test_cases:
             if test_case.module not in module_dict:
                 module_dict[test_case.module] = []
             module_dict[test_case.module].append(test_case)
-        
-        # 创建模块节点
+
+        # 创建模块节点，添加该模块的所有测试用例
         for module_name, module_cases in module_dict.items():
             module_node = {
                 "title": module_name,
-                "children": []
+                "children": [build_case_node(test_case) for test_case in module_cases]
             }
-            
-            # 添加该模块的所有测试用例
-            for test_case in module_cases:
-                # 创建测试用例节点
-                case_node = {
-                    "title": f"{test_case.id}: {test_case.title}",
-                    "children": []
-                }
-                
-                # 添加优先级信息
-                info_node = {
-                    "title": f"优先级: {test_case.priority}",
-                    "children": []
-                }
-                case_node["children"].append(info_node)
-                
-                # 添加前置条件
-                if test_case.preconditions:
-                    precond_node = {
-                        "title": "前置条件",
-                        "children": [{"title": precond} for precond in test_case.preconditions]
-                    }
-                    case_node["children"].append(precond_node)
-                
-                # 添加测试步骤和预期结果
-                steps_node = {
-                    "title": "测试步骤",
-                    "children": []
-                }
-                for step in test_case.steps:
-                    step_node = {
-                        "title": f"{step.step_number}. {step.description}",
-                        "children": [{
-                            "title": f"预期结果: {step.expected_result}"
-                        }]
-                    }
-                    steps_node["children"].append(step_node)
-                case_node["children"].append(steps_node)
-                
-                module_node["children"].append(case_node)
-            
             mindmap["children"].append(module_node)
-        
-        # 确保输出文件名以.json结尾
-        if not output_filename.endswith('.json'):
-            output_filename = output_filename.replace('.xmind', '.json')
-            if not output_filename.endswith('.json'):
-                output_filename += '.json'
-        
-        # 创建输出路径
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
+
         # 保存为JSON文件
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(mindmap, f, ensure_ascii=False, indent=2)
-        
+
+        self._record_export(test_cases, output_path, document_key)
         print(f"XMind file generated: {output_path}")
-        return output_path 
\ No newline at end of file
+        return output_path
+
+    def export_xmind(self, test_cases: Iterable[TestCase], output_filename: str,
+                     compact: bool = None, document_key: str = None) -> str:
+        """
+        将测试用例以流式方式写入.xmind文件（包含content.json、metadata.json和manifest.json的zip包）
+
+        用例逐个序列化后按模块追加到临时缓冲区，不在内存中构建完整的思维导图，
+        最后按模块首次出现的顺序把缓冲区依次写入压缩包
+
+        Args:
+            test_cases (Iterable[TestCase]): 待导出的测试用例，可以是生成器
+            output_filename (str): 输出文件名
+            compact (bool, optional): 是否输出不带缩进的紧凑JSON，默认使用XMIND_COMPACT_JSON
+            document_key (str, optional): 任务日志中的文档键（需要传入列表才能计算内容指纹）
+
+        Returns:
+            str: 导出文件的完整路径
+        """
+        output_path = self._xmind_path(output_filename)
+        if self._already_exported(test_cases, output_path, document_key):
+            return output_path
+
+        writer = _XMindArchiveWriter(settings.XMIND_COMPACT_JSON if compact is None else compact)
+        try:
+            for test_case in test_cases:
+                writer.add(test_case)
+            writer.save(output_path)
+        finally:
+            writer.close()
+
+        self._record_export(test_cases, output_path, document_key)
+        print(f"XMind file generated: {output_path} ({writer.cases} test cases)")
+        return output_path
+
+    async def export_xmind_async(self, test_cases: Union[AsyncIterable[TestCase], Iterable[TestCase]],
+                                 output_filename: str, compact: bool = None) -> str:
+        """
+        从异步迭代器（如TestGenerator.stream_test_cases）接收测试用例并写入.xmind文件
+
+        Args:
+            test_cases (AsyncIterable[TestCase] | Iterable[TestCase]): 待导出的测试用例
+            output_filename (str): 输出文件名
+            compact (bool, optional): 是否输出不带缩进的紧凑JSON，默认使用XMIND_COMPACT_JSON
+
+        Returns:
+            str: 导出文件的完整路径
+        """
+        if not hasattr(test_cases, '__aiter__'):
+            return self.export_xmind(test_cases, output_filename, compact)
+
+        output_path = self._xmind_path(output_filename)
+        writer = _XMindArchiveWriter(settings.XMIND_COMPACT_JSON if compact is None else compact)
+        try:
+            async for test_case in test_cases:
+                writer.add(test_case)
+            writer.save(output_path)
+        finally:
+            writer.close()
+        print(f"XMind file generated: {output_path} ({writer.cases} test cases)")
+        return output_path
+
+    @staticmethod
+    def _xmind_path(output_filename: str) -> str:
+        # 确保输出文件名以.xmind结尾
+        if output_filename.endswith('.json'):
+            output_filename = output_filename[:-len('.json')]
+        if not output_filename.endswith('.xmind'):
+            output_filename += '.xmind'
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        return os.path.join(OUTPUT_DIR, output_filename)
+
+    def _already_exported(self, test_cases, output_path: str, document_key: str) -> bool:
+        """任务日志中记录相同内容已导出到同一路径时返回True"""
+        if self.journal is None or not document_key or not isinstance(test_cases, list):
+            return False
+        fingerprint = JobJournal.fingerprint(test_cases)
+        if self.journal.is_exported(document_key, "xmind", output_path, fingerprint):
+            print(f"XMind file already exported: {output_path}")
+            return True
+        return False
+
+    def _record_export(self, test_cases, output_path: str, document_key: str):
+        """在任务日志中记录导出结果"""
+        if self.journal is None or not document_key or not isinstance(test_cases, list):
+            return
+        self.journal.record_export(document_key, "xmind", output_path,
+                                   JobJournal.fingerprint(test_cases))
+
+
+class _XMindArchiveWriter:
+    """
+    .xmind压缩包写入器
+    每个模块对应一个临时缓冲区，存放该模块下已序列化的用例主题（以逗号分隔）
+    """
+
+    def __init__(self, compact: bool):
+        self.compact = compact
+        self.cases = 0
+        self._modules: Dict[str, Any] = {}  # 模块名 -> 临时缓冲区，保持首次出现的顺序
+        self._next_id = 0
+
+    def _topic_id(self) -> str:
+        # 主题ID只需在文件内唯一，使用计数器比uuid快得多
+        self._next_id += 1
+        return f"topic-{self._next_id}"
+
+    def _to_topic(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """将title/children节点转换为XMind的主题结构"""
+        topic = {"id": self._topic_id(), "title": node["title"]}
+        children = node.get("children")
+        if children:
+            topic["children"] = {"attached": [self._to_topic(child) for child in children]}
+        return topic
+
+    def _dumps(self, value: Any) -> str:
+        if self.compact:
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        return json.dumps(value, ensure_ascii=False, indent=2)
+
+    def add(self, test_case: TestCase):
+        """序列化一个测试用例并追加到所属模块的缓冲区"""
+        spool = self._modules.get(test_case.module)
+        if spool is None:
+            spool = tempfile.SpooledTemporaryFile(max_size=MODULE_SPOOL_SIZE, mode='w+b')
+            self._modules[test_case.module] = spool
+        elif spool.tell():
+            spool.write(b',')
+        spool.write(self._dumps(self._to_topic(build_case_node(test_case))).encode('utf-8'))
+        self.cases += 1
+
+    def save(self, output_path: str):
+        """写出压缩包：content.json按模块顺序拼接各缓冲区，另附metadata.json和manifest.json"""
+        separator = ',' if self.compact else ',\n'
+        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open('content.json', 'w') as content:
+                sheet_head = (
+                    '[{"id":"sheet-1","class":"sheet","title":%s,'
+                    '"rootTopic":{"id":"root","class":"topic","title":%s,'
+                    '"structureClass":"org.xmind.ui.logic.right","children":{"attached":['
+                ) % (json.dumps(ROOT_TITLE), json.dumps(ROOT_TITLE))
+                content.write(sheet_head.encode('utf-8'))
+                for index, (module_name, spool) in enumerate(self._modules.items()):
+                    module_head = '%s{"id":%s,"title":%s,"children":{"attached":[' % (
+                        separator if index else '',
+                        json.dumps(self._topic_id()),
+                        json.dumps(module_name, ensure_ascii=False)
+                    )
+                    content.write(module_head.encode('utf-8'))
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, content)
+                    content.write(b']}}')
+                content.write(b']}}}]')
+            archive.writestr('metadata.json', json.dumps({
+                "creator": {"name": "AutoTestCase Generator", "version": "1.0"}
+            }))
+            archive.writestr('manifest.json', json.dumps({
+                "file-entries": {"content.json": {}, "metadata.json": {}}
+            }))
+
+    def close(self):
+        """释放临时缓冲区"""
+        for spool in self._modules.values():
+            spool.close()
+        self._modules.clear()
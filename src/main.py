@@ -1,20 +1,25 @@
 """
 主程序
 演示如何生成和导出测试用例
+
+用法:
+    python src/main.py                                  # 处理docs/requirements.txt
+    python src/main.py --batch docs/                    # 批量处理目录下的.txt/.md文档
+    python src/main.py --batch "docs/**/*.md" --concurrency 4
 """
 
-import asyncio
+import argparse
+import glob
 import os
 import sys
 import re
 
-# 将当前目录添加到Python路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# 将项目根目录添加到Python路径，所有模块统一以src包的形式导入，避免同一模块被导入两次
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.llm_engine import LLMEngine
-from core.test_generator import TestGenerator
-from exporters.excel_exporter import ExcelExporter
-from exporters.xmind_exporter import XMindExporter
+# 配置在首次读取时才解析；asyncio、LLM引擎、生成器、导出器等较重的模块在实际用到时才导入，
+# 显示帮助等不需要它们的命令可以快速启动（因此下面的部分类型注解写成字符串）
+from src.config import OUTPUT_DIR, settings
 
 def read_requirements(file_path: str) -> str:
     """
@@ -38,45 +43,25 @@ def read_requirements(file_path: str) -> str:
     except Exception as e:
         raise Exception(f"读取需求文档失败: {str(e)}")
 
-def detect_requirement_type(requirements: str) -> str:
+def detect_requirement_type(requirements: str, type_scores: dict = None) -> str:
     """
     根据需求文档内容检测需求类型
     
     Args:
         requirements (str): 需求文档内容
+        type_scores (dict, optional): 已计算好的各需求类型得分，为空时扫描需求文档计算
         
     Returns:
         str: 检测到的需求类型，用于文件命名
     """
-    # 将需求文本转为小写以便不区分大小写匹配
-    req_lower = requirements.lower()
-    
-    # 定义需求类型关键词映射
-    type_keywords = {
-        "login": ["登录", "login", "认证", "authentication", "用户名", "密码"],
-        "register": ["注册", "register", "sign up", "用户注册"],
-        "user_management": ["用户管理", "user management", "user profile", "用户信息"],
-        "task_management": ["任务管理", "task management", "任务列表", "任务创建", "task list"],
-        "dashboard": ["仪表盘", "dashboard", "数据统计", "报表"],
-        "report": ["报告", "report", "reporting", "数据报表"],
-        "api": ["api", "接口", "interface", "服务调用"],
-        "module": ["模块", "module", "组件"],
-        "system": ["系统", "system", "平台"],
-        "performance": ["性能", "performance", "负载", "load"],
-        "security": ["安全", "security", "权限", "permission"],
-        "authorization": ["授权", "authorization", "授权码", "authorization code", "密码授权", "账号授权", "敏感操作"]
-    }
-    
-    # 搜索所有可能的需求类型，并计算匹配度
-    type_scores = {}
-    for req_type, keywords in type_keywords.items():
-        score = sum(req_lower.count(keyword) for keyword in keywords)
-        if score > 0:
-            type_scores[req_type] = score
-    
-    # 查找匹配度最高的需求类型
-    if type_scores:
-        best_type = max(type_scores.items(), key=lambda x: x[1])[0]
+    # 使用共享的关键词自动机一次扫描得到所有需求类型的得分（不区分大小写）
+    if type_scores is None:
+        from src.utils.keyword_matcher import requirement_type_matcher
+        type_scores = requirement_type_matcher().scores(requirements)
+    
+    # 查找匹配度最高的需求类型，得分相同时取配置中靠前的类型
+    best_type, best_score = max(type_scores.items(), key=lambda x: x[1], default=(None, 0))
+    if best_score > 0:
         return best_type
     
     # 如果没有匹配，则尝试从文本中提取可能的模块名称
@@ -88,16 +73,177 @@ def detect_requirement_type(requirements: str) -> str:
     # 如果都没有找到，则返回默认值
     return "requirement"
 
-async def main():
+def collect_requirement_files(pattern: str) -> list:
+    """
+    收集批量模式下的需求文档路径
+    
+    Args:
+        pattern (str): 目录路径（收集其中的.txt和.md文件）或glob通配符
+        
+    Returns:
+        list: 排序后的文件路径列表
+    """
+    if os.path.isdir(pattern):
+        paths = [
+            os.path.join(pattern, name) for name in os.listdir(pattern)
+            if name.lower().endswith(('.txt', '.md'))
+        ]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+def document_base_name(path: str, requirement_type: str) -> str:
+    """
+    批量模式下单个文档的输出文件名（不含扩展名），以文档名为前缀以免相互覆盖
+    
+    Args:
+        path (str): 需求文档路径
+        requirement_type (str): 需求类型
+        
+    Returns:
+        str: 输出文件基础名
+    """
+    document_name = os.path.splitext(os.path.basename(path))[0]
+    return f"{document_name}_{requirement_type}_test_cases"
+
+def manifest_path_for(file_base_name: str) -> str:
+    """
+    增量生成时与导出文件放在一起的清单路径
+    
+    Args:
+        file_base_name (str): 输出文件基础名
+        
+    Returns:
+        str: 清单文件路径
+    """
+    return os.path.join(OUTPUT_DIR, f"{file_base_name}.manifest.json")
+
+async def export_document(result: "DocumentResult", pipeline: "ExportPipeline", store: "TestCaseStore" = None):
+    """
+    导出单个文档的测试用例，文件名以文档名为前缀以免相互覆盖
+    导出在流水线的线程池/进程池中进行，其他文档的生成不会因此停顿
+    
+    Args:
+        result (DocumentResult): 文档生成结果
+        pipeline (ExportPipeline): 导出流水线
+        store (TestCaseStore, optional): 测试用例库，设置后同时写入用例库
+    """
+    if result.error or not result.test_cases:
+        return
+    file_base_name = document_base_name(result.name, result.requirement_type)
+    await pipeline.run(result.test_cases, file_base_name, result.document_key)
+    if store is not None:
+        count = store.add_document(result.name, result.test_cases, result.requirement_type, result.document_key)
+        print(f"Stored {count} test cases for {result.name} in {store.path}")
+
+async def run_batch(pattern: str, concurrency: int = None, journal_path: str = None,
+                    incremental: bool = False, store_path: str = None):
+    """
+    批量模式：为目录或通配符匹配到的每个需求文档生成测试用例并分别导出
+    
+    Args:
+        pattern (str): 目录路径或glob通配符
+        concurrency (int, optional): 同时处理的文档数上限
+        journal_path (str, optional): 任务日志路径，为空时不记录进度（中断后需要从头开始）
+        incremental (bool): 是否只重新生成相对上次清单变化过的章节
+        store_path (str, optional): 测试用例库路径，为空时不写入用例库
+    """
+    paths = collect_requirement_files(pattern)
+    if not paths:
+        print(f"No requirement documents found for: {pattern}")
+        return
+    
+    from src.core.case_store import TestCaseStore
+    from src.core.journal import JobJournal
+    from src.core.llm_engine import LLMEngine
+    from src.core.test_generator import TestGenerator, RequirementDocument
+    from src.exporters.pipeline import ExportPipeline, default_exporters
+    
+    documents = []
+    for path in paths:
+        try:
+            requirements = read_requirements(path)
+        except Exception as e:
+            print(f"Skipping {path}: {str(e)}")
+            continue
+        requirement_type = detect_requirement_type(requirements)
+        manifest_path = None
+        if incremental:
+            manifest_path = manifest_path_for(document_base_name(path, requirement_type))
+        documents.append(RequirementDocument(
+            name=path,
+            text=requirements,
+            requirement_type=requirement_type,
+            manifest_path=manifest_path
+        ))
+    
+    # 任务日志由生成器和导出器共享；进程池中的导出器无法访问日志数据库
+    journal = JobJournal(journal_path) if journal_path else None
+    export_journal = journal if settings.EXPORT_EXECUTOR == "thread" else None
+    pipeline = ExportPipeline(default_exporters(export_journal))
+    store = TestCaseStore(store_path) if store_path else None
+    try:
+        async with LLMEngine() as llm_engine:
+            test_generator = TestGenerator(llm_engine, journal=journal)
+            await test_generator.generate_many(
+                documents,
+                concurrency=concurrency,
+                on_document=lambda result: export_document(result, pipeline, store)
+            )
+            print(f"Response parsing: {dict(test_generator.parse_methods)}, "
+                  f"failure rate {test_generator.parse_failure_rate():.1%}")
+    finally:
+        pipeline.close()
+        if store is not None:
+            store.close()
+        if journal is not None:
+            print(f"Journal: {journal.resumed} steps resumed ({journal.path})")
+            journal.close()
+
+def parse_args(argv=None):
+    """
+    解析命令行参数
+    
+    Args:
+        argv (list, optional): 命令行参数，默认使用sys.argv
+        
+    Returns:
+        argparse.Namespace: 解析结果
+    """
+    parser = argparse.ArgumentParser(description="基于需求文档生成测试用例")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB",
+                        help="批量模式：需求文档目录（.txt/.md）或glob通配符")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="批量模式下同时处理的文档数，默认使用BATCH_CONCURRENCY")
+    parser.add_argument("--journal", default=None,
+                        help="批量模式的任务日志路径，中断后重新运行会从日志中恢复进度，默认使用JOURNAL_PATH")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="批量模式下不使用任务日志")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量生成：只重新生成相对上次清单新增或修改的章节，其余章节复用已有用例和ID")
+    parser.add_argument("--store", default=None,
+                        help="测试用例库路径，生成的用例按来源文档写入该SQLite数据库，默认使用CASE_STORE_PATH")
+    return parser.parse_args(argv)
+
+async def main(incremental: bool = False, store_path: str = None):
     """
     主程序函数
     展示完整的测试用例生成和导出流程
+    
+    Args:
+        incremental (bool): 是否只重新生成相对上次清单变化过的章节
+        store_path (str, optional): 测试用例库路径，为空时不写入用例库
     """
+    from src.core.case_store import TestCaseStore
+    from src.core.llm_engine import LLMEngine
+    from src.core.test_generator import TestGenerator
+    from src.exporters.pipeline import ExportPipeline
+    from src.utils.keyword_matcher import requirement_type_matcher
+    
     # 初始化所需组件
     llm_engine = LLMEngine()
     test_generator = TestGenerator(llm_engine)
-    excel_exporter = ExcelExporter()
-    xmind_exporter = XMindExporter()
+    pipeline = ExportPipeline()
     
     # 从文件读取需求文档
     requirements_file = os.path.join('docs', 'requirements.txt')
@@ -123,29 +269,14 @@ async def main():
         """
     
     try:
-        # 检测需求类型
-        requirement_type = detect_requirement_type(requirements)
+        # 检测需求类型，调试输出复用同一次扫描的得分
+        type_scores = requirement_type_matcher().scores(requirements)
+        requirement_type = detect_requirement_type(requirements, type_scores)
         print(f"Detected requirement type: {requirement_type}")
         
         # 添加调试输出
         print("Requirement type scores:")
-        req_lower = requirements.lower()
-        type_keywords = {
-            "login": ["登录", "login", "认证", "authentication", "用户名", "密码"],
-            "register": ["注册", "register", "sign up", "用户注册"],
-            "user_management": ["用户管理", "user management", "user profile", "用户信息"],
-            "task_management": ["任务管理", "task management", "任务列表", "任务创建", "task list"],
-            "dashboard": ["仪表盘", "dashboard", "数据统计", "报表"],
-            "report": ["报告", "report", "reporting", "数据报表"],
-            "api": ["api", "接口", "interface", "服务调用"],
-            "module": ["模块", "module", "组件"],
-            "system": ["系统", "system", "平台"],
-            "performance": ["性能", "performance", "负载", "load"],
-            "security": ["安全", "security", "权限", "permission"],
-            "authorization": ["授权", "authorization", "授权码", "authorization code", "密码授权", "账号授权", "敏感操作"]
-        }
-        for req_type, keywords in type_keywords.items():
-            score = sum(req_lower.count(keyword) for keyword in keywords)
+        for req_type, score in type_scores.items():
             if score > 0:
                 print(f"{req_type}: {score}")
         
@@ -154,21 +285,40 @@ async def main():
         
         # 生成测试用例
         print("Generating test cases...")
-        test_cases = await test_generator.generate_test_cases(requirements, requirement_type)
+        if incremental:
+            test_cases = await test_generator.generate_incremental(
+                requirements, manifest_path_for(file_base_name), requirement_type
+            )
+        else:
+            test_cases = await test_generator.generate_test_cases(requirements, requirement_type)
         
-        # 导出为Excel格式
-        print("Exporting to Excel...")
-        excel_path = excel_exporter.export(test_cases, f"{file_base_name}.xlsx")
-        print(f"Excel file generated: {excel_path}")
+        # 并行导出为Excel和XMind格式
+        print("Exporting to Excel and XMind...")
+        await pipeline.run(test_cases, file_base_name)
         
-        # 导出为XMind格式
-        print("Exporting to XMind...")
-        xmind_path = xmind_exporter.export(test_cases, f"{file_base_name}.json")
-        print(f"XMind file generated: {xmind_path}")
+        # 写入测试用例库
+        if store_path:
+            store = TestCaseStore(store_path)
+            try:
+                count = store.add_document(requirements_file, test_cases, requirement_type)
+                print(f"Stored {count} test cases in {store_path}")
+            finally:
+                store.close()
         
     except Exception as e:
         print(f"Error: {str(e)}")
+    finally:
+        # 关闭LLM引擎持有的连接池和导出线程池
+        await llm_engine.close()
+        pipeline.close()
 
 if __name__ == "__main__":
+    args = parse_args()
+    import asyncio
+    store_path = settings.CASE_STORE_PATH if args.store is None else args.store
     # 运行异步主程序
-    asyncio.run(main()) 
\ No newline at end of file
+    if args.batch:
+        journal_path = None if args.no_journal else (args.journal or settings.JOURNAL_PATH)
+        asyncio.run(run_batch(args.batch, args.concurrency, journal_path, args.incremental, store_path))
+    else:
+        asyncio.run(main(args.incremental, store_path)) 
\ No newline at end of file
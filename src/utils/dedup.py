@@ -0,0 +1,252 @@
+"""
+近似重复检测模块
+对测试用例的模块、标题、步骤和预期结果做字符k-gram分片后计算MinHash签名，
+再用LSH分桶只比较落入同一个桶的候选用例，在亚二次时间内找出近似重复的用例
+
+分片按字符而不是按词进行，中文文本无需分词即可处理
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+import re
+
+import numpy as np
+
+from src.config import settings
+
+# 归一化时去掉的字符：空白、标点和下划线，中文字符属于\w会被保留
+_NOISE_PATTERN = re.compile(r'[\W_]+')
+
+# 分片滚动哈希的基数，奇数保证与2^64互素
+_SHINGLE_BASE = np.uint64(1099511628211)
+
+# 每批计算签名的用例数，限制分片哈希矩阵(分片数 × 置换数)的内存占用
+SIGNATURE_BATCH_SIZE = 500
+
+# 合并重复用例时比较优先级高低
+_PRIORITY_RANK = {"高": 0, "中": 1, "低": 2}
+
+
+def normalize_text(text: str) -> str:
+    """
+    归一化文本：转为小写并去掉空白和标点，措辞相同但标点、空格不同的文本归一化后相同
+
+    Args:
+        text (str): 原始文本
+
+    Returns:
+        str: 归一化后的文本
+    """
+    return _NOISE_PATTERN.sub("", text.lower())
+
+
+def case_text(test_case: Any) -> str:
+    """
+    拼接用于比较的用例内容：模块、标题、各步骤的描述和预期结果，不包含编号和优先级
+    不同模块中步骤相同的用例（如各模块各自的"退出登录"）覆盖的是不同功能，不视为重复
+
+    Args:
+        test_case (Any): TestCase对象
+
+    Returns:
+        str: 归一化后的用例内容
+    """
+    parts = [test_case.module, test_case.title]
+    for step in test_case.steps:
+        parts.append(step.description)
+        parts.append(step.expected_result)
+    return normalize_text("".join(parts))
+
+
+class NearDuplicateIndex:
+    """
+    近似重复索引类
+    按加入顺序保留每组近似重复中的第一个用例作为代表，LSH桶中只保存代表，
+    新用例只与同桶的代表比较签名，估计的Jaccard相似度达到阈值即视为重复
+
+    索引可以逐批加入，流式生成时每产出一个用例就可以立即判断是否重复
+    """
+
+    def __init__(self, threshold: float = None, shingle_size: int = None,
+                 num_perm: int = None, bands: int = None, seed: int = 1):
+        """
+        初始化近似重复索引
+
+        Args:
+            threshold (float, optional): 判定为重复的相似度阈值(0~1)，默认使用DEDUP_THRESHOLD
+            shingle_size (int, optional): 字符分片长度，默认使用DEDUP_SHINGLE_SIZE
+            num_perm (int, optional): MinHash置换数(签名长度)，默认使用DEDUP_NUM_PERM
+            bands (int, optional): LSH分段数，必须整除num_perm，默认使用DEDUP_BANDS
+            seed (int, optional): 生成哈希参数的随机种子，相同种子的签名可以相互比较
+        """
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.shingle_size = shingle_size or settings.DEDUP_SHINGLE_SIZE
+        self.num_perm = num_perm or settings.DEDUP_NUM_PERM
+        self.bands = bands or settings.DEDUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        self.rows = self.num_perm // self.bands
+
+        # 乘法移位哈希 h(x) = (a*x + b) >> 32，a取奇数
+        rng = np.random.default_rng(seed)
+        self._mul = rng.integers(1, 2 ** 63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._add = rng.integers(0, 2 ** 63, size=self.num_perm, dtype=np.uint64)
+        # 将每段的签名值合并为一个桶键
+        self._band_mul = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._powers = _SHINGLE_BASE ** np.arange(self.shingle_size - 1, -1, -1, dtype=np.uint64)
+
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        # 已加入文本的签名，按容量倍增，候选代表的签名可以一次性取出比较
+        self._signatures = np.empty((0, self.num_perm), dtype=np.uint32)
+        self.size = 0
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        计算一批文本的MinHash签名
+
+        Args:
+            texts (Sequence[str]): 归一化后的文本
+
+        Returns:
+            np.ndarray: 形状为(len(texts), num_perm)的uint32签名矩阵，空文本的签名全为最大值
+        """
+        result = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        for begin in range(0, len(texts), SIGNATURE_BATCH_SIZE):
+            batch = texts[begin:begin + SIGNATURE_BATCH_SIZE]
+            present = [index for index, text in enumerate(batch) if text]
+            if not present:
+                continue
+            hashes, starts = self._shingle_hashes([batch[index] for index in present])
+            # 每个分片在所有置换下的哈希值(置换数 × 分片数，按行连续)，再按文本分段取最小值
+            permuted = ((self._mul[:, None] * hashes + self._add[:, None]) >> np.uint64(32)).astype(np.uint32)
+            minimum = np.minimum.reduceat(permuted, starts, axis=1)
+            result[begin + np.asarray(present)] = minimum.T
+        return result
+
+    def add(self, texts: Sequence[str]) -> List[int]:
+        """
+        按顺序加入一批文本，与已加入的代表（含本批中排在前面的代表）比较
+
+        Args:
+            texts (Sequence[str]): 归一化后的文本
+
+        Returns:
+            List[int]: 与输入一一对应，重复文本为其代表的序号(加入索引时的顺序)，否则为-1
+        """
+        signatures = self.signatures(texts)
+        band_keys = self._band_keys(signatures).tolist()
+        if self.size + len(texts) > len(self._signatures):
+            capacity = max(self.size + len(texts), 2 * len(self._signatures))
+            grown = np.empty((capacity, self.num_perm), dtype=np.uint32)
+            grown[:self.size] = self._signatures[:self.size]
+            self._signatures = grown
+        self._signatures[self.size:self.size + len(texts)] = signatures
+
+        matches = []
+        for signature, keys, text in zip(signatures, band_keys, texts):
+            index = self.size
+            self.size += 1
+            match = -1
+            if text:
+                match = self._find_match(signature, keys)
+                if match < 0:
+                    for bucket, key in zip(self._buckets, keys):
+                        bucket.setdefault(key, []).append(index)
+            matches.append(match)
+        return matches
+
+    def _find_match(self, signature: np.ndarray, keys: List[int]) -> int:
+        """在同桶的代表中查找估计相似度最高且达到阈值的一个，没有时返回-1"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            members = bucket.get(key)
+            if members:
+                candidates.update(members)
+        if not candidates:
+            return -1
+        # 估计的Jaccard相似度即签名中相等位置的比例，有多个达到阈值时取最相似的
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        equal = np.count_nonzero(self._signatures[candidates] == signature, axis=1)
+        best = int(np.argmax(equal))
+        if equal[best] < self.threshold * self.num_perm:
+            return -1
+        return int(candidates[best])
+
+    def _shingle_hashes(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        向量化计算一批非空文本的字符分片哈希
+
+        每个文本之后补shingle_size-1个0作为分隔，分片只从文本内的位置开始，
+        末尾不足长度的分片带有补零，短于分片长度的文本也至少有一个分片
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 所有分片的哈希值，以及每个文本第一个分片的下标
+        """
+        pad = "\0" * (self.shingle_size - 1)
+        joined = pad.join(texts) + pad
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        windows = np.lib.stride_tricks.sliding_window_view(codes, self.shingle_size)
+        hashes = windows @ self._powers  # uint64乘加自然按2^64取模
+
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        # 每个文本在拼接串中的偏移比在结果中的偏移多出前面各分隔符的长度，据此去掉从分隔符开始的分片
+        gaps = np.arange(len(texts), dtype=np.int64) * (self.shingle_size - 1)
+        positions = np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(gaps, lengths)
+        return hashes[positions], starts
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """将签名按段合并为桶键，形状为(文本数, bands)"""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (banded * self._band_mul).sum(axis=2, dtype=np.uint64)
+
+
+def merge_duplicate(representative: Any, duplicate: Any):
+    """
+    将重复用例的信息合并到代表用例：合并前置条件，取较高的优先级，保留较完整的步骤
+
+    Args:
+        representative (Any): 保留的代表用例，原地修改
+        duplicate (Any): 被合并的重复用例
+    """
+    for precondition in duplicate.preconditions:
+        if precondition not in representative.preconditions:
+            representative.preconditions.append(precondition)
+    if _PRIORITY_RANK.get(duplicate.priority, 3) < _PRIORITY_RANK.get(representative.priority, 3):
+        representative.priority = duplicate.priority
+    if len(duplicate.steps) > len(representative.steps):
+        representative.steps = duplicate.steps
+
+
+def deduplicate(test_cases: Iterable[Any], threshold: float = None,
+                strategy: str = None) -> Tuple[List[Any], int]:
+    """
+    去除近似重复的测试用例，每组重复保留最先出现的一个，其余按策略丢弃或合并到保留的用例，
+    每个被去除的用例都会打印出来
+
+    Args:
+        test_cases (Iterable[Any]): 测试用例
+        threshold (float, optional): 判定为重复的相似度阈值，默认使用DEDUP_THRESHOLD
+        strategy (str, optional): drop(直接丢弃)或merge(合并到保留的用例)，默认使用DEDUP_STRATEGY
+
+    Returns:
+        Tuple[List[Any], int]: 保持原有顺序的去重结果，以及去除的用例数
+    """
+    strategy = strategy or settings.DEDUP_STRATEGY
+    if strategy not in ("drop", "merge"):
+        raise ValueError(f"Unknown dedup strategy: {strategy}")
+    test_cases = list(test_cases)
+    if len(test_cases) < 2:
+        return test_cases, 0
+
+    index = NearDuplicateIndex(threshold=threshold)
+    matches = index.add([case_text(test_case) for test_case in test_cases])
+    kept = []
+    for test_case, match in zip(test_cases, matches):
+        if match < 0:
+            kept.append(test_case)
+            continue
+        print(f"Removed near-duplicate test case {test_case.id} {test_case.title!r} "
+              f"(duplicate of {test_cases[match].id} {test_cases[match].title!r}, {strategy})")
+        if strategy == "merge":
+            merge_duplicate(test_cases[match], test_case)
+    return kept, len(test_cases) - len(kept)
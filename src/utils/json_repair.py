@@ -0,0 +1,315 @@
+"""
+JSON提取与修复模块
+以单次线性扫描从LLM响应中定位最外层JSON对象（或测试用例数组），修复常见的格式问题，
+并在输出被截断时尽可能挽救所有完整的测试用例
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import re
+
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+
+# JSON结构字符，扫描时只需在这些位置停下
+_STRUCTURAL_PATTERN = re.compile(r'[{}\[\]"]')
+# 字符串内部只需关注引号和转义符
+_STRING_SPECIAL_PATTERN = re.compile(r'["\\]')
+
+# 修复时使用的词法单元：完整字符串、未闭合字符串、标点、裸词、空白
+_TOKEN_PATTERN = re.compile(
+    r'(?P<string>"(?:[^"\\]|\\.)*")'
+    r'|(?P<open_string>"(?:[^"\\]|\\.)*\\?$)'
+    r'|(?P<punct>[{}\[\]:,])'
+    r'|(?P<word>[^\s{}\[\]:,"]+)'
+    r'|(?P<space>\s+)',
+    re.S
+)
+# 尾随逗号，仅用于快速修复尝试，修复结果必须能被完整解析才会被采用
+_TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+_LITERAL_PATTERN = re.compile(r'^(?:true|false|null|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)$')
+_CLOSERS = {'{': '}', '[': ']'}
+# 顶层数组形式的测试用例输出[{...}, ...]的起始
+_ARRAY_ROOT_PATTERN = re.compile(r'\[\s*\{')
+
+
+def strip_think_blocks(text: str) -> str:
+    """
+    移除推理模型输出的<think>...</think>块
+    未闭合的<think>块（输出被截断）会连同其后的内容一起移除
+
+    Args:
+        text (str): 模型输出文本
+
+    Returns:
+        str: 移除推理内容后的文本
+    """
+    if _THINK_OPEN not in text:
+        return text
+    parts = []
+    pos = 0
+    while True:
+        start = text.find(_THINK_OPEN, pos)
+        if start < 0:
+            parts.append(text[pos:])
+            break
+        parts.append(text[pos:start])
+        end = text.find(_THINK_CLOSE, start + len(_THINK_OPEN))
+        if end < 0:
+            break
+        pos = end + len(_THINK_CLOSE)
+    return ''.join(parts)
+
+
+def find_json_object(text: str, root: str = '{') -> Tuple[int, int, List[str]]:
+    """
+    线性扫描定位第一个最外层JSON对象，正确处理字符串中的括号和转义字符
+
+    Args:
+        text (str): 待扫描的文本
+        root (str): 根容器的起始字符，为'['时定位第一个最外层数组
+
+    Returns:
+        Tuple[int, int, List[str]]: 对象起始位置、结束位置（不含）以及结束时仍未闭合的容器栈。
+            找不到对象时起始位置为-1；对象被截断时结束位置为文本长度且栈非空
+    """
+    start = text.find(root)
+    if start < 0:
+        return -1, -1, []
+
+    stack = [root]
+    pos = start + 1
+    length = len(text)
+    while pos < length:
+        match = _STRUCTURAL_PATTERN.search(text, pos)
+        if match is None:
+            break
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            # 跳过整个字符串
+            while True:
+                special = _STRING_SPECIAL_PATTERN.search(text, pos)
+                if special is None:
+                    return start, length, stack
+                if special.group() == '\\':
+                    pos = special.end() + 1
+                    continue
+                pos = special.end()
+                break
+        elif char in '{[':
+            stack.append(char)
+        else:
+            stack.pop()
+            if not stack:
+                return start, pos, []
+    return start, length, stack
+
+
+def repair_json(fragment: str) -> str:
+    """
+    修复常见的JSON格式问题：尾随逗号、未加引号的键和裸字符串值，
+    以及截断的结尾（丢弃不完整的最后一个元素并补齐缺失的括号）
+
+    Args:
+        fragment (str): 以'{'或'['开头的JSON文本
+
+    Returns:
+        str: 修复后的JSON文本
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    truncated = False
+
+    for match in _TOKEN_PATTERN.finditer(fragment):
+        kind = match.lastgroup
+        token = match.group()
+        if kind == 'space':
+            continue
+        if kind == 'open_string':
+            truncated = True
+            break
+
+        previous = out[-1] if out else ''
+        if kind == 'punct':
+            if token in '{[':
+                stack.append(token)
+                out.append(token)
+            elif token in '}]':
+                if not stack:
+                    continue
+                if previous == ',':
+                    out.pop()
+                out.append(_CLOSERS[stack.pop()])
+                if not stack:
+                    break
+            elif token == ',':
+                if previous not in (',', '{', '['):
+                    out.append(token)
+            else:
+                out.append(token)
+        elif kind == 'word':
+            if _LITERAL_PATTERN.match(token):
+                out.append(token)
+            else:
+                # 裸键或裸字符串值，去掉可能存在的单引号后加上双引号
+                out.append(json.dumps(token.strip("'"), ensure_ascii=False))
+        else:
+            out.append(token)
+
+    if stack:
+        truncated = True
+    if truncated:
+        _trim_incomplete_tail(out, stack)
+        while stack:
+            out.append(_CLOSERS[stack.pop()])
+    return ''.join(out)
+
+
+def _trim_incomplete_tail(out: List[str], stack: List[str]):
+    """
+    截断修复：移除末尾不完整的元素（悬空的逗号、冒号、没有值的键以及空的未闭合容器）
+    """
+    while out:
+        last = out[-1]
+        if last == ',':
+            out.pop()
+        elif last in _CLOSERS and len(stack) > 1:
+            # 刚打开就被截断的容器，连同其在栈中的记录一起去掉
+            out.pop()
+            stack.pop()
+        elif last == ':':
+            # 去掉冒号和对应的键
+            out.pop()
+            if out:
+                out.pop()
+        elif stack and stack[-1] == '{' and len(out) >= 2 and out[-2] in ('{', ','):
+            # 对象中只有键没有冒号
+            out.pop()
+        else:
+            break
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def _case_list(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """从解析结果中取出测试用例列表"""
+    if isinstance(data, dict) and isinstance(data.get('test_cases'), list):
+        return [tc for tc in data['test_cases'] if isinstance(tc, dict)]
+    if isinstance(data, list):
+        return [tc for tc in data if isinstance(tc, dict)]
+    return None
+
+
+def _case_root(text: str) -> str:
+    """
+    判断测试用例输出的根容器：第一个JSON对象紧跟在'['之后（[{...}, ...]形式）时为'['，否则为'{'
+    """
+    start = text.find('{')
+    array = _ARRAY_ROOT_PATTERN.search(text, 0, start + 1) if start >= 0 else None
+    return '[' if array is not None and array.end() == start + 1 else '{'
+
+
+def is_truncated_json(response: str) -> bool:
+    """
+    判断LLM响应中的JSON是否在中途被截断：找到了JSON对象的起始，但到文本结尾仍有未闭合的括号
+
+    Args:
+        response (str): LLM响应文本
+
+    Returns:
+        bool: JSON被截断时返回True，没有JSON或JSON完整时返回False
+    """
+    text = strip_think_blocks(response)
+    start, _, stack = find_json_object(text, _case_root(text))
+    return start >= 0 and bool(stack)
+
+
+def extract_json_object(response: str) -> Optional[Dict[str, Any]]:
+    """
+    从LLM响应中提取第一个最外层JSON对象（如需求分析结果），无法直接解析时尝试修复
+
+    Args:
+        response (str): LLM响应文本
+
+    Returns:
+        Optional[Dict[str, Any]]: 解析出的对象，响应中没有可用的JSON对象时返回None
+    """
+    text = strip_think_blocks(response)
+    start, end, _ = find_json_object(text)
+    if start < 0:
+        return None
+    candidate = text[start:end]
+    data = _loads(candidate)
+    if data is None:
+        data = _loads(repair_json(candidate))
+    return data if isinstance(data, dict) else None
+
+
+def extract_test_case_dicts(response: str, structured: bool = False) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    从LLM响应中提取测试用例字典列表
+
+    响应可以是{"test_cases": [...]}对象，也可以是测试用例对象组成的顶层数组[{...}, ...]。
+    依次尝试：整体直接解析 -> 移除尾随逗号后解析 -> 扫描定位最外层对象后解析 ->
+    逐词法单元修复后解析 -> 从截断的输出中逐个挽救完整的测试用例。
+
+    Args:
+        response (str): LLM响应文本
+        structured (bool): 响应是否由JSON Schema约束生成。为True时先把整个响应作为JSON解析，
+            不做任何清理，失败（如输出被截断）时再按上述步骤处理
+
+    Returns:
+        Tuple[List[Dict[str, Any]], str]: 测试用例字典列表和使用的解析方式
+            (structured/parsed/repaired/salvaged/failed)
+    """
+    # 延迟导入，避免与json_stream之间的循环依赖
+    from src.utils.json_stream import IncrementalTestCaseParser
+
+    if structured:
+        cases = _case_list(_loads(response))
+        if cases is not None:
+            return cases, "structured"
+
+    text = strip_think_blocks(response)
+    root = _case_root(text)
+    start = text.find(root)
+    if start < 0:
+        return [], "failed"
+
+    # 快速路径：根容器的起始括号到最后一个对应的闭括号之间恰好是合法JSON时无需逐字符扫描
+    candidate = text[start:text.rfind(_CLOSERS[root]) + 1]
+    cases = _case_list(_loads(candidate))
+    if cases is not None:
+        return cases, "parsed"
+    # 最常见的问题是尾随逗号，先用一次正则替换尝试修复
+    cases = _case_list(_loads(_TRAILING_COMMA_PATTERN.sub(r'\1', candidate)))
+    if cases is not None:
+        return cases, "repaired"
+
+    start, end, stack = find_json_object(text, root)
+
+    candidate = text[start:end]
+    if not stack:
+        cases = _case_list(_loads(candidate))
+        if cases is not None:
+            return cases, "parsed"
+        cases = _case_list(_loads(repair_json(candidate)))
+        if cases is not None:
+            return cases, "repaired"
+
+    # 输出被截断或无法整体修复：逐个收集已闭合的测试用例对象
+    salvaged = IncrementalTestCaseParser().feed(text[start:])
+    if salvaged:
+        return salvaged, "salvaged"
+
+    if stack:
+        cases = _case_list(_loads(repair_json(candidate)))
+        if cases:
+            return cases, "repaired"
+    return [], "failed"
@@ -0,0 +1,155 @@
+"""
+增量JSON解析模块
+在流式生成过程中逐块接收模型输出，每当一个测试用例对象闭合时立即将其解析出来
+"""
+
+from typing import List, Dict, Any, Tuple
+import json
+import re
+
+from src.utils.json_repair import repair_json
+
+# JSON外部只需关注<think>标签和JSON的起始括号
+_OUTSIDE_PATTERN = re.compile(r'<think>|[{\[]')
+_THINK_CLOSE = "</think>"
+# 保留在缓冲区末尾、可能是被切断的标签前缀的最大长度
+_TAG_TAIL = len(_THINK_CLOSE) - 1
+
+# JSON结构字符和字符串内部的特殊字符
+_STRUCTURAL_PATTERN = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL_PATTERN = re.compile(r'["\\]')
+
+# 测试用例对象所在的容器栈：根对象中的数组，或顶层数组
+_CASE_CONTAINERS = (['{', '['], ['['])
+
+
+class IncrementalTestCaseParser:
+    """
+    增量测试用例解析器
+
+    逐块喂入模型输出文本，解析器跟踪括号嵌套和字符串/转义状态，
+    当测试用例数组中的某个对象闭合时返回该对象。支持以下两种输出结构：
+
+        {"test_cases": [{...}, {...}]}
+        [{...}, {...}]
+
+    JSON开始之前的<think>...</think>推理内容和```json代码块标记会被忽略。
+    扫描只在结构字符处停留，总耗时与输入长度成线性关系。
+    """
+
+    def __init__(self):
+        self._buffer = ""               # 尚未处理完的文本
+        self._pos = 0                   # 在缓冲区中的扫描位置
+        self._stack: List[str] = []     # 当前打开的容器（'{' 或 '['）
+        self._in_string = False         # 是否处于JSON字符串内部
+        self._escape = False            # 缓冲区末尾是否为未完成的转义
+        self._in_think = False          # 是否处于<think>推理块内部
+        self._capture_start = -1        # 正在收集的测试用例对象起始位置
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        喂入一段模型输出
+
+        Args:
+            text (str): 新到达的文本片段
+
+        Returns:
+            List[Dict[str, Any]]: 本次片段中闭合的测试用例对象列表
+        """
+        completed = []
+        buffer = self._buffer + text
+        pos = self._pos
+        length = len(buffer)
+
+        while pos < length:
+            if not self._stack:
+                pos, need_more = self._scan_outside(buffer, pos)
+                if need_more:
+                    break
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                special = _STRING_SPECIAL_PATTERN.search(buffer, pos)
+                if special is None:
+                    pos = length
+                    break
+                pos = special.end()
+                if special.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL_PATTERN.search(buffer, pos)
+            if match is None:
+                pos = length
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._capture_start < 0 and self._stack in _CASE_CONTAINERS:
+                    self._capture_start = match.start()
+                self._stack.append(char)
+            else:
+                if self._stack:
+                    self._stack.pop()
+                if self._capture_start >= 0 and char == '}' and self._stack in _CASE_CONTAINERS:
+                    parsed = self._parse_object(buffer[self._capture_start:pos])
+                    if parsed is not None:
+                        completed.append(parsed)
+                    self._capture_start = -1
+
+        # 只保留仍需要的文本：正在收集的对象，或尚未扫描的尾部
+        keep_from = self._capture_start if self._capture_start >= 0 else min(pos, length)
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._capture_start >= 0:
+            self._capture_start = 0
+        return completed
+
+    def _scan_outside(self, buffer: str, pos: int) -> Tuple[int, bool]:
+        """
+        处理JSON之外的文本：跳过<think>推理块，遇到'{'或'['时进入JSON
+
+        Returns:
+            Tuple[int, bool]: 新的扫描位置，以及是否需要等待更多文本
+        """
+        if self._in_think:
+            end = buffer.find(_THINK_CLOSE, pos)
+            if end < 0:
+                # 保留可能被切断的结束标签前缀
+                return max(pos, len(buffer) - _TAG_TAIL), True
+            self._in_think = False
+            return end + len(_THINK_CLOSE), False
+
+        match = _OUTSIDE_PATTERN.search(buffer, pos)
+        if match is None:
+            return max(pos, len(buffer) - _TAG_TAIL), True
+        if match.group() == '<think>':
+            self._in_think = True
+        else:
+            self._stack.append(match.group())
+        return match.end(), False
+
+    @staticmethod
+    def _parse_object(raw: str):
+        """
+        解析单个测试用例对象文本，失败时尝试修复
+
+        Returns:
+            Dict[str, Any] | None: 解析成功返回字典，否则返回None
+        """
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                return json.loads(repair_json(raw))
+            except json.JSONDecodeError:
+                print(f"Skipping malformed test case: {raw[:80]}")
+                return None
@@ -0,0 +1,172 @@
+"""
+关键词匹配模块
+将多组带权重的关键词预编译为一个Aho-Corasick自动机，一次扫描文本即可得到每一组的得分，
+文本可以分块输入，不需要把整个文档读入内存
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+import json
+import re
+
+from src.config import REQUIREMENT_TYPE_KEYWORDS, settings
+
+# 流式读取文件时每次读取的字符数
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class KeywordMatcher:
+    """
+    多模式关键词匹配器类
+    构建时把所有关键词转为小写并编译为Aho-Corasick自动机，匹配时不区分大小写；
+    同一个关键词的多次出现按不重叠计数（与str.count一致），不同关键词之间可以重叠，
+    如"密码授权"同时计入"密码"、"授权"和"密码授权"
+    """
+
+    def __init__(self, groups: Mapping[str, Union[Mapping[str, float], Iterable[str]]]):
+        """
+        编译关键词自动机
+
+        Args:
+            groups (Mapping): 分组名称到关键词的映射，关键词可以是{关键词: 权重}，
+                也可以是关键词列表（权重均为1）
+        """
+        self.groups = list(groups)
+        # 每个关键词模式：(所属分组下标, 长度, 权重)，同一个关键词出现在多个分组时分别计分
+        self._patterns: List[Tuple[int, int, float]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for group_index, keywords in enumerate(groups.values()):
+            if not isinstance(keywords, Mapping):
+                keywords = {keyword: 1 for keyword in keywords}
+            for keyword, weight in keywords.items():
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        outputs.append([])
+                    state = next_state
+                outputs[state].append(len(self._patterns))
+                self._patterns.append((group_index, len(keyword), weight))
+
+        # 按广度优先顺序计算失败指针，并把失败指针链上的输出合并到当前状态；
+        # 同时把失败转移展开为完整的状态转移表，扫描时每个字符只需查一次表
+        fail = [0] * len(self._goto)
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [{} for _ in self._goto[1:]]
+        queue = list(self._goto[0].values())
+        for state in queue:
+            if state:
+                self._delta[state] = {**self._delta[fail[state]], **self._goto[state]}
+            for char, next_state in self._goto[state].items():
+                fail[next_state] = self._delta[fail[state]].get(char, 0) if state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                queue.append(next_state)
+        self._outputs = [tuple(output) for output in outputs]
+        # 处于初始状态时，用正则直接跳到下一个可能是关键词首字符的位置
+        self._first_chars = re.compile(
+            "[" + "".join(re.escape(char) for char in self._goto[0]) + "]"
+        ) if self._goto[0] else None
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        计算一段完整文本中每个分组的得分
+
+        Args:
+            text (str): 待匹配的文本
+
+        Returns:
+            Dict[str, float]: 按分组定义顺序排列的得分，未命中的分组为0
+        """
+        return self.scan([text])
+
+    def scan(self, chunks: Iterable[str]) -> Dict[str, float]:
+        """
+        分块扫描文本并计算每个分组的得分，跨越分块边界的关键词同样可以匹配
+
+        Args:
+            chunks (Iterable[str]): 文本块，如逐行或逐块读取的文件
+
+        Returns:
+            Dict[str, float]: 按分组定义顺序排列的得分，未命中的分组为0
+        """
+        delta, outputs, patterns = self._delta, self._outputs, self._patterns
+        first_chars = self._first_chars
+        totals = [0] * len(self.groups)
+        # 每个关键词下一次可以计数的起始位置，用于实现不重叠计数
+        next_allowed = [0] * len(patterns)
+        state = 0
+        offset = 0
+        for chunk in chunks:
+            chunk = chunk.lower()
+            length = len(chunk)
+            position = 0
+            while position < length:
+                if state == 0:
+                    if first_chars is None:
+                        break
+                    match = first_chars.search(chunk, position)
+                    if match is None:
+                        break
+                    position = match.start()
+                state = delta[state].get(chunk[position], 0)
+                position += 1
+                for pattern in outputs[state]:
+                    group, pattern_length, weight = patterns[pattern]
+                    if offset + position - pattern_length >= next_allowed[pattern]:
+                        next_allowed[pattern] = offset + position
+                        totals[group] += weight
+            offset += length
+        return dict(zip(self.groups, totals))
+
+    def scan_file(self, path: str, encoding: str = "utf-8") -> Dict[str, float]:
+        """
+        分块读取文件并计算每个分组的得分，文件不会整体读入内存
+
+        Args:
+            path (str): 文件路径
+            encoding (str, optional): 文件编码
+
+        Returns:
+            Dict[str, float]: 按分组定义顺序排列的得分
+        """
+        with open(path, "r", encoding=encoding) as f:
+            return self.scan(iter(lambda: f.read(READ_CHUNK_SIZE), ""))
+
+
+def load_requirement_type_keywords(path: str = None) -> Dict[str, Dict[str, float]]:
+    """
+    读取需求类型关键词配置
+
+    Args:
+        path (str, optional): JSON文件路径，格式为{需求类型: {关键词: 权重}}或{需求类型: [关键词, ...]}，
+            为空时使用REQUIREMENT_TYPE_KEYWORDS_FILE，仍为空时使用config中的REQUIREMENT_TYPE_KEYWORDS
+
+    Returns:
+        Dict[str, Dict[str, float]]: 需求类型到关键词权重的映射
+    """
+    path = path or settings.REQUIREMENT_TYPE_KEYWORDS_FILE
+    if not path:
+        return REQUIREMENT_TYPE_KEYWORDS
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_requirement_type_matcher: Optional[KeywordMatcher] = None
+
+
+def requirement_type_matcher() -> KeywordMatcher:
+    """
+    获取共享的需求类型关键词匹配器，第一次调用时编译，之后的调用直接复用
+
+    Returns:
+        KeywordMatcher: 需求类型匹配器
+    """
+    global _requirement_type_matcher
+    if _requirement_type_matcher is None:
+        _requirement_type_matcher = KeywordMatcher(load_requirement_type_keywords())
+    return _requirement_type_matcher
@@ -0,0 +1,27 @@
+"""
+文本工具模块
+提供令牌数估算等与具体模型无关的文本处理函数
+"""
+
+import re
+
+# 中日韩统一表意文字及全角标点，每个字符大约对应一个令牌
+_CJK_PATTERN = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的令牌数
+    中文字符按每字一个令牌计算，其余字符按每4个字符一个令牌计算
+
+    Args:
+        text (str): 待估算的文本
+
+    Returns:
+        int: 估算的令牌数
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
@@ -0,0 +1,11 @@
+"""
+测试公共配置
+"""
+
+import os
+import sys
+
+# 将项目根目录添加到Python路径，与benchmarks中的脚本一致
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
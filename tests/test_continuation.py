@@ -0,0 +1,119 @@
+"""
+截断响应续写测试
+"""
+
+import asyncio
+import json
+
+from src.core.llm_engine import LLMEngine, ModelResponse
+from src.core import test_generator
+
+
+def case(title: str) -> dict:
+    return {"module": "登录模块", "title": title, "priority": "中",
+            "steps": [{"step_number": 1, "description": "操作", "expected_result": "结果"}]}
+
+
+def cut_after(text: str, marker: str) -> str:
+    """在marker之后截断，模拟达到num_predict上限"""
+    return text[:text.index(marker) + len(marker)]
+
+
+class FakeEngine(LLMEngine):
+    """按顺序返回预设的续写响应，并记录每次续写请求的提示词和Schema"""
+
+    def __init__(self, fragments):
+        super().__init__(use_cache=False)
+        self.fragments = list(fragments)
+        self.calls = []
+
+    async def _execute_with_failover(self, prompt, system_prompt, models=None, api_base=None,
+                                     max_tokens=None, schema=None):
+        self.calls.append((prompt, schema))
+        return self.fragments.pop(0)
+
+
+def continue_truncated(engine: LLMEngine, response: str, schema: dict = None) -> dict:
+    return json.loads(asyncio.run(engine._continue_truncated("原始提示词", "系统提示词", response, schema=schema)))
+
+
+def test_is_truncated():
+    complete = json.dumps({"test_cases": [case("a")]})
+    truncated = cut_after(complete, '"title"')
+    assert LLMEngine._is_truncated(ModelResponse.create(truncated, "length"))
+    assert LLMEngine._is_truncated(truncated)
+    # Ollama报告正常结束时不续写
+    assert not LLMEngine._is_truncated(ModelResponse.create(truncated, "stop"))
+    assert not LLMEngine._is_truncated(complete)
+
+
+def test_is_truncated_before_test_cases():
+    response = '{"analysis": {"test_points": ["登录", "注'
+    assert not LLMEngine._is_truncated(response)
+    assert LLMEngine._is_truncated(response, {"properties": {"analysis": {}, "test_cases": {}}})
+
+
+def test_continue_stitches_cases_and_drops_repeats():
+    response = cut_after(json.dumps({"test_cases": [case("a"), case("b"), case("c")]}, ensure_ascii=False), '"c"')
+    engine = FakeEngine([
+        ModelResponse.create(json.dumps({"test_cases": [case("b"), case("c"), case("d")]}), "stop"),
+    ])
+    result = continue_truncated(engine, response)
+    assert [tc["title"] for tc in result["test_cases"]] == ["a", "b", "c", "d"]
+    assert engine.continuation_requests == 1
+    prompt, _ = engine.calls[0]
+    assert "第2个测试用例之后被截断" in prompt and "- a\n- b" in prompt
+
+
+def test_continue_keeps_other_top_level_keys():
+    analysis = {"test_points": ["登录"], "business_rules": [], "edge_cases": []}
+    response = cut_after(json.dumps({"analysis": analysis, "test_cases": [case("a"), case("b")]},
+                                    ensure_ascii=False), '"b"')
+    engine = FakeEngine([ModelResponse.create(json.dumps({"test_cases": [case("b")]}), "stop")])
+    result = continue_truncated(engine, response)
+    assert result["analysis"] == analysis
+    assert [tc["title"] for tc in result["test_cases"]] == ["a", "b"]
+
+
+def test_continue_when_cut_before_test_cases():
+    response = '{"analysis": {"test_points": ["登录"], "business_rules": ["密码错误三次锁'
+    engine = FakeEngine([ModelResponse.create(json.dumps({"test_cases": [case("a")]}), "stop")])
+    result = continue_truncated(engine, response)
+    assert result["analysis"] == {"test_points": ["登录"]}
+    assert [tc["title"] for tc in result["test_cases"]] == ["a"]
+    prompt, _ = engine.calls[0]
+    assert "在输出测试用例之前被截断" in prompt
+
+
+def test_continue_stops_after_max_rounds():
+    response = cut_after(json.dumps({"test_cases": [case("a"), case("b")]}), '"b"')
+    fragments = [ModelResponse.create(cut_after(json.dumps({"test_cases": [case(f"n{i}"), case("x")]}), '"x"'),
+                                      "length")
+                 for i in range(10)]
+    engine = FakeEngine(fragments)
+    result = continue_truncated(engine, response)
+    assert engine.continuation_requests == engine.continuation_max_rounds
+    assert len(result["test_cases"]) == 1 + engine.continuation_max_rounds
+
+
+def test_continue_keeps_cases_when_request_fails():
+    class FailingEngine(FakeEngine):
+        async def _execute_with_failover(self, *args, **kwargs):
+            raise RuntimeError("connection reset")
+
+    response = cut_after(json.dumps({"test_cases": [case("a"), case("b")]}), '"b"')
+    result = continue_truncated(FailingEngine([]), response)
+    assert [tc["title"] for tc in result["test_cases"]] == ["a"]
+
+
+def test_continue_uses_cases_only_schema():
+    schema = test_generator.test_case_response_schema(include_analysis=True)
+    response = cut_after(json.dumps({"analysis": {"test_points": ["登录"]}, "test_cases": [case("a"), case("b")]},
+                                    ensure_ascii=False), '"b"')
+    engine = FakeEngine([ModelResponse.create(json.dumps({"test_cases": [case("b")]}), "stop")])
+    continue_truncated(engine, response, schema)
+    _, continuation_schema = engine.calls[0]
+    assert list(continuation_schema["properties"]) == ["test_cases"]
+    assert continuation_schema["required"] == ["test_cases"]
+    # 原始Schema保持不变
+    assert schema["required"] == ["analysis", "test_cases"]
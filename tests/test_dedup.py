@@ -0,0 +1,91 @@
+"""
+近似重复检测测试
+"""
+
+import pytest
+
+from src.core import test_generator
+from src.utils.dedup import NearDuplicateIndex, case_text, deduplicate, normalize_text
+
+BASE = "在收银台同时配置满减和折扣两个互斥活动后扫描商品结算，系统只按优先级应用其中一个活动并在小票上展示优惠明细"
+
+
+def make_case(title: str, priority: str = "中", preconditions=None, steps: int = 1) -> test_generator.TestCase:
+    return test_generator.TestCase(
+        id="20240101-001",
+        module="营销活动",
+        title=title,
+        priority=priority,
+        preconditions=preconditions or [],
+        steps=[test_generator.TestStep(step_number=number, description=f"执行第{number}步",
+                                       expected_result="结果正确")
+               for number in range(1, steps + 1)]
+    )
+
+
+def shingles(text: str, size: int = 3) -> set:
+    return {text[index:index + size] for index in range(len(text) - size + 1)}
+
+
+def jaccard(first: str, second: str) -> float:
+    first, second = shingles(normalize_text(first)), shingles(normalize_text(second))
+    return len(first & second) / len(first | second)
+
+
+def test_normalize_text():
+    assert normalize_text("Login, 登录 _成功！") == normalize_text("login登录成功")
+
+
+def test_case_text_ignores_id_and_priority():
+    first = make_case("登录成功", "高")
+    second = make_case("登录成功", "低").copy(update={"id": "x"})
+    assert case_text(first) == case_text(second)
+
+
+def test_same_steps_in_other_module_are_kept():
+    cases = [make_case("退出登录"), make_case("退出登录").copy(update={"module": "会员中心"})]
+    kept, removed = deduplicate(cases, strategy="drop")
+    assert kept == cases and removed == 0
+
+
+def test_threshold():
+    near = BASE.replace("小票", "票据")
+    far = BASE[:len(BASE) // 3] + "，会员积分按实付金额累计并在次日到账，退货时扣回对应积分"
+    assert jaccard(BASE, near) > 0.85
+    assert jaccard(BASE, far) < 0.5
+    texts = [normalize_text(text) for text in (BASE, near, far, BASE.replace("，", "; "))]
+
+    assert NearDuplicateIndex(threshold=0.8).add(texts) == [-1, 0, -1, 0]
+    # 阈值为1时只有归一化后完全相同的文本才算重复
+    assert NearDuplicateIndex(threshold=1.0).add(texts) == [-1, -1, -1, 0]
+
+
+def test_add_in_batches():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.add([normalize_text(BASE)]) == [-1]
+    assert index.add(["", normalize_text(BASE + "。")]) == [-1, 0]
+    assert index.size == 3
+
+
+def test_deduplicate_drop_keeps_first_in_order():
+    cases = [make_case(BASE), make_case("登录成功"), make_case(BASE.replace("小票", "票据")), make_case("退出登录")]
+    kept, removed = deduplicate(cases, strategy="drop")
+    assert [case.title for case in kept] == [BASE, "登录成功", "退出登录"]
+    assert removed == 1
+
+
+def test_deduplicate_merge():
+    representative = make_case(BASE, "低", ["已配置活动"])
+    duplicate = make_case(BASE.replace("小票", "票据"), "高", ["已配置活动", "收银台已登录"], steps=3)
+    kept, removed = deduplicate([representative, duplicate], strategy="merge")
+    assert kept == [representative] and removed == 1
+    assert representative.preconditions == ["已配置活动", "收银台已登录"]
+    assert representative.priority == "高"
+    assert len(representative.steps) == 3
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        deduplicate([make_case("a"), make_case("b")], strategy="keep")
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=80, bands=7)
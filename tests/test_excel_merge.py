@@ -0,0 +1,133 @@
+"""
+Excel合并导出测试
+"""
+
+import datetime
+import re
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+from src.core import test_generator
+from src.exporters import excel_exporter
+from src.exporters.excel_exporter import (
+    ExcelExporter, HASH_HEADER, PRIORITY_COLORS, PRIORITY_COLUMN, STATUS_HEADER
+)
+
+
+def make_case(number: int, priority: str = "中", title: str = None) -> test_generator.TestCase:
+    return test_generator.TestCase(
+        id=f"20240101-{number:03d}",
+        module="登录模块",
+        title=title or f"登录场景{number}",
+        priority=priority,
+        preconditions=["已注册账号"],
+        steps=[test_generator.TestStep(step_number=1, description=f"执行场景{number}",
+                                       expected_result=f"场景{number}结果正确")]
+    )
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    # 导出器写入OUTPUT_DIR，测试改为写入临时目录
+    monkeypatch.setattr(excel_exporter, "OUTPUT_DIR", str(tmp_path))
+    return ExcelExporter()
+
+
+def read_rows(path: str):
+    """按表头读取所有数据行"""
+    sheet = load_workbook(path).active
+    header = [cell.value for cell in sheet[1]]
+    return sheet, [dict(zip(header, (cell.value for cell in row))) for row in sheet.iter_rows(min_row=2)]
+
+
+def test_merge_into_missing_workbook_exports(exporter, tmp_path):
+    path = exporter.export_merge([make_case(1)], "cases")
+    _, rows = read_rows(path)
+    assert [row["用例标题"] for row in rows] == ["登录场景1"]
+
+
+def test_merge_without_changes_keeps_file(exporter):
+    cases = [make_case(number) for number in range(1, 4)]
+    exporter.export_stream(cases, "cases")
+    # 第一次合并补写变更状态和内容哈希列
+    path = exporter.export_merge(cases, "cases")
+    with open(path, "rb") as f:
+        before = f.read()
+    # 用例编号中的日期变化不影响内容匹配
+    redated = [case.copy(update={"id": case.id.replace("20240101", "20240102")}) for case in cases]
+    exporter.export_merge(redated, "cases")
+    with open(path, "rb") as f:
+        assert f.read() == before
+
+
+def test_merge_marks_updated_added_and_removed(exporter):
+    exporter.export_stream([make_case(number) for number in range(1, 4)], "cases")
+    today = datetime.date.today().isoformat()
+    path = exporter.export_merge([make_case(1), make_case(2, title="登录场景2（修订）"), make_case(4)], "cases")
+    sheet, rows = read_rows(path)
+    assert [(row["用例标题"], row[STATUS_HEADER]) for row in rows] == [
+        ("登录场景1", None),
+        ("登录场景2（修订）", f"更新 {today}"),
+        ("登录场景3", f"已删除 {today}"),
+        ("登录场景4", f"新增 {today}"),
+    ]
+    assert all(row[HASH_HEADER] for row in rows)
+    hash_column = [cell.value for cell in sheet[1]].index(HASH_HEADER) + 1
+    assert sheet.column_dimensions[sheet.cell(1, hash_column).column_letter].hidden
+
+
+def test_merge_keeps_reviewer_edits(exporter):
+    path = exporter.export_merge([make_case(1), make_case(2)], "cases")
+    exporter.export_merge([make_case(1), make_case(2)], "cases")
+    workbook = load_workbook(path)
+    workbook.active["C3"] = "评审人员修改的标题"
+    workbook.save(path)
+
+    exporter.export_merge([make_case(1), make_case(2, title="登录场景2（修订）")], "cases")
+    _, rows = read_rows(path)
+    assert rows[1]["用例标题"] == "评审人员修改的标题"
+    assert rows[1][STATUS_HEADER].startswith("冲突")
+
+
+def test_merge_styles_priorities_new_to_the_workbook(exporter):
+    # 工作簿中只用过高优先级的样式，合并追加的中、低优先级行也要带上对应的填充色和边框
+    exporter.export_stream([make_case(1, "高"), make_case(2, "高")], "cases")
+    path = exporter.export_merge([make_case(1, "高"), make_case(2, "高"), make_case(3, "中"), make_case(4, "低")],
+                                 "cases")
+    sheet = load_workbook(path).active
+    for row in range(2, sheet.max_row + 1):
+        cell = sheet.cell(row, PRIORITY_COLUMN + 1)
+        assert cell.fill.fgColor.rgb.endswith(PRIORITY_COLORS[cell.value]), cell.coordinate
+        assert cell.border.left.style == "thin", cell.coordinate
+
+
+def replace_cells(path: str, cells: dict):
+    """直接把工作表XML中的单元格改写为内联字符串，可以包含富文本"""
+    with zipfile.ZipFile(path) as archive:
+        parts = {name: archive.read(name) for name in archive.namelist()}
+    sheet_part = "xl/worksheets/sheet1.xml"
+    xml = parts[sheet_part].decode("utf-8")
+    for reference, content in cells.items():
+        xml, count = re.subn(rf'<c r="{reference}"( s="\d+")? t="\w+">.*?</c>',
+                             rf'<c r="{reference}"\1 t="inlineStr"><is>{content}</is></c>', xml)
+        assert count == 1
+    parts[sheet_part] = xml.encode("utf-8")
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in parts.items():
+            archive.writestr(name, data)
+
+
+def test_merge_reads_rich_text_and_inline_strings(exporter):
+    path = exporter.export_merge([make_case(1), make_case(2)], "cases")
+    exporter.export_merge([make_case(1), make_case(2)], "cases")
+    # 评审人员把第3行的标题改成了富文本
+    replace_cells(path, {"C3": "<r><rPr><b/></rPr><t>加粗</t></r><r><t>的标题</t></r>"})
+
+    exporter.export_merge([make_case(1), make_case(2, title="登录场景2（修订）")], "cases")
+    _, rows = read_rows(path)
+    assert [(row["用例标题"], row[STATUS_HEADER]) for row in rows] == [
+        ("登录场景1", None),
+        ("加粗的标题", f"冲突 {datetime.date.today().isoformat()}"),
+    ]
@@ -0,0 +1,92 @@
+"""
+JSON提取与修复测试
+"""
+
+import json
+
+from src.utils.json_repair import (
+    extract_json_object, extract_test_case_dicts, is_truncated_json, repair_json, strip_think_blocks
+)
+
+
+def case(title: str) -> dict:
+    return {"title": title, "priority": "中", "steps": [{"description": "操作", "expected_result": "结果"}]}
+
+
+def test_repair_trailing_commas_and_bare_words():
+    assert json.loads(repair_json("{a: 1, b: [x, 'y',],}")) == {"a": 1, "b": ["x", "y"]}
+
+
+def test_repair_drops_incomplete_tail():
+    assert json.loads(repair_json('{"a": [1, 2], "b": "unfinished')) == {"a": [1, 2]}
+    assert json.loads(repair_json('{"a": 1, "b":')) == {"a": 1}
+    assert json.loads(repair_json('{"a": 1, "b"')) == {"a": 1}
+
+
+def test_repair_drops_container_opened_at_the_cut():
+    assert json.loads(repair_json('{"a": [{"t": 1}, {')) == {"a": [{"t": 1}]}
+    assert json.loads(repair_json('{"a": [{"t": 1}, [')) == {"a": [{"t": 1}]}
+
+
+def test_strip_think_blocks():
+    assert strip_think_blocks('<think>{"x": 1}</think>{"y": 2}').strip() == '{"y": 2}'
+
+
+def test_is_truncated_json():
+    assert is_truncated_json('说明文字 {"test_cases": [{"title": "a"}')
+    assert not is_truncated_json('{"test_cases": []}')
+    assert not is_truncated_json("没有JSON")
+
+
+def test_extract_json_object_skips_prose_and_repairs():
+    assert extract_json_object('分析如下：\n{"analysis": {"test_points": ["登录",]}}\n以上') == \
+        {"analysis": {"test_points": ["登录"]}}
+    assert extract_json_object('{"analysis": {"test_points": ["登录", "注') == {"analysis": {"test_points": ["登录"]}}
+    assert extract_json_object("[1, 2]") is None
+
+
+def test_extract_parsed():
+    response = "```json\n" + json.dumps({"test_cases": [case("a"), case("b")]}, ensure_ascii=False) + "\n```"
+    cases, method = extract_test_case_dicts(response)
+    assert [tc["title"] for tc in cases] == ["a", "b"]
+    assert method == "parsed"
+
+
+def test_extract_structured():
+    cases, method = extract_test_case_dicts(json.dumps({"test_cases": [case("a")]}), structured=True)
+    assert [tc["title"] for tc in cases] == ["a"]
+    assert method == "structured"
+
+
+def test_extract_truncated_keeps_complete_cases():
+    text = json.dumps({"test_cases": [case("a"), case("b"), case("c")]}, ensure_ascii=False)
+    cut = text[:text.index('"c"') + 2]
+    cases, method = extract_test_case_dicts(cut)
+    assert [tc["title"] for tc in cases] == ["a", "b"]
+    assert method in ("repaired", "salvaged")
+
+
+def test_extract_failed():
+    assert extract_test_case_dicts("模型没有输出JSON") == ([], "failed")
+
+
+def test_extract_top_level_array():
+    assert extract_test_case_dicts('[{"title":"a","steps":[]}]') == ([{"title": "a", "steps": []}], "parsed")
+    cases, method = extract_test_case_dicts('用例如下：\n```json\n[\n  {"title": "a"},\n  {"title": "b"},\n]\n```')
+    assert [tc["title"] for tc in cases] == ["a", "b"]
+    assert method == "repaired"
+
+
+def test_extract_truncated_top_level_array():
+    text = '[{"title": "a"}, {"title": "b"}, {"title": "c'
+    assert is_truncated_json(text)
+    cases, method = extract_test_case_dicts(text)
+    assert [tc["title"] for tc in cases] == ["a", "b"]
+    assert method in ("repaired", "salvaged")
+
+
+def test_bracket_before_object_is_not_a_root():
+    response = '参考需求[1]：\n' + json.dumps({"test_cases": [case("a")]}, ensure_ascii=False)
+    cases, method = extract_test_case_dicts(response)
+    assert [tc["title"] for tc in cases] == ["a"]
+    assert method == "parsed"
@@ -0,0 +1,74 @@
+"""
+关键词匹配测试
+得分必须与逐个关键词调用str.count（不重叠计数）的结果一致
+"""
+
+import json
+import random
+
+import pytest
+
+from src.utils.keyword_matcher import KeywordMatcher, load_requirement_type_keywords
+
+
+def count_scores(groups: dict, text: str) -> dict:
+    """逐个关键词用str.count计分，作为对照"""
+    text = text.lower()
+    return {
+        name: sum(weight * text.count(keyword.lower()) for keyword, weight in keywords.items() if keyword)
+        for name, keywords in groups.items()
+    }
+
+
+def split_randomly(rng: random.Random, text: str) -> list:
+    cuts = sorted(rng.sample(range(len(text) + 1), min(3, len(text) + 1)))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_overlapping_keywords():
+    groups = {"security": {"密码": 2, "授权": 1, "密码授权": 3}, "repeat": ["aa", "aba"]}
+    matcher = KeywordMatcher(groups)
+    for text in ["密码授权与密码", "aaaaa", "ababa", "AAbAA", "", "无关文本"]:
+        assert matcher.scores(text) == count_scores(
+            {name: keywords if isinstance(keywords, dict) else dict.fromkeys(keywords, 1)
+             for name, keywords in groups.items()}, text), text
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_str_count(seed):
+    rng = random.Random(seed)
+    alphabet = "abAB密码授"
+    groups = {
+        f"group{index}": {
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))): rng.randint(1, 3)
+            for _ in range(rng.randint(1, 5))
+        }
+        for index in range(3)
+    }
+    matcher = KeywordMatcher(groups)
+    for _ in range(20):
+        text = "".join(rng.choice(alphabet + " ") for _ in range(rng.randint(0, 60)))
+        expected = count_scores(groups, text)
+        assert matcher.scores(text) == expected, (groups, text)
+        # 分块扫描时跨越分块边界的关键词同样计数
+        assert matcher.scan(split_randomly(rng, text)) == expected, (groups, text)
+
+
+def test_empty_groups():
+    assert KeywordMatcher({"a": [], "b": {"": 1}}).scores("任意文本") == {"a": 0, "b": 0}
+
+
+def test_scan_file(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.utils.keyword_matcher.READ_CHUNK_SIZE", 7)
+    text = "用户登录时校验密码，密码错误三次后锁定。" * 5
+    path = tmp_path / "requirements.txt"
+    path.write_text(text, encoding="utf-8")
+    groups = {"security": {"密码": 2, "锁定": 1}, "ui": ["登录"]}
+    matcher = KeywordMatcher(groups)
+    assert matcher.scan_file(str(path)) == matcher.scores(text) == {"security": 25, "ui": 5}
+
+
+def test_load_requirement_type_keywords(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"api": ["接口", "请求"]}, ensure_ascii=False), encoding="utf-8")
+    assert load_requirement_type_keywords(str(path)) == {"api": ["接口", "请求"]}
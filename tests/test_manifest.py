@@ -0,0 +1,54 @@
+"""
+生成清单测试
+"""
+
+from src.core.chunker import RequirementSection
+from src.core.manifest import (
+    GenerationManifest, ManifestSection, content_hash, diff_sections, section_keys
+)
+
+
+def section(index: int, title: str, text: str) -> RequirementSection:
+    return RequirementSection(index=index, title=title, text=text, tokens=len(text))
+
+
+def manifest_of(sections) -> GenerationManifest:
+    return GenerationManifest(sections=[
+        ManifestSection(key=key, title=item.title, content_hash=content_hash(item.text),
+                        test_cases=[{"title": f"{key}用例"}])
+        for key, item in zip(section_keys(sections), sections)
+    ])
+
+
+def test_section_keys_number_repeated_titles():
+    sections = [section(0, "概述", "a"), section(1, "规则", "b"), section(2, "规则", "c"), section(3, "规则", "d")]
+    assert section_keys(sections) == ["概述", "规则", "规则 #2", "规则 #3"]
+
+
+def test_diff_without_manifest():
+    sections = [section(0, "登录", "登录说明")]
+    assert diff_sections(None, sections) == (["登录"], {}, [])
+
+
+def test_diff_changed_inserted_and_removed():
+    old = [section(0, "登录", "登录说明"), section(1, "支付", "支付说明"), section(2, "退款", "退款说明")]
+    new = [section(0, "注册", "注册说明"), section(1, "登录", "登录说明"), section(2, "支付", "支付说明（修订）")]
+    keys, unchanged, removed = diff_sections(manifest_of(old), new)
+    assert keys == ["注册", "登录", "支付"]
+    # 插入新章节后位置变化的章节仍按标题复用
+    assert list(unchanged) == ["登录"]
+    assert unchanged["登录"].test_cases == [{"title": "登录用例"}]
+    assert removed == ["退款"]
+
+
+def test_manifest_save_and_load(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = manifest_of([section(0, "登录", "登录说明")])
+    manifest.next_id = 7
+    manifest.save(path)
+    assert GenerationManifest.load(path) == manifest
+    assert GenerationManifest.load(str(tmp_path / "missing.json")) is None
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    assert GenerationManifest.load(path) is None
@@ -0,0 +1,98 @@
+"""
+提示词压缩测试
+"""
+
+from src.core.prompt_compactor import (
+    compact_requirements, drop_sections, normalize_lines, rebuild_tables, remove_boilerplate
+)
+
+LANGUAGE_MENU = ["Plain text", "Bash", "C#", "JavaScript", "Python", "SQL", "YAML", "自动换行"]
+
+FIELD_RULES = [
+    "用户名为必填项，长度为4到20个字符",
+    "用户名只能包含字母、数字和下划线",
+    "手机号为必填项，必须为11位数字",
+    "邮箱为选填项，填写时需符合邮箱格式",
+    "所有字段校验失败时在输入框下方显示错误提示",
+]
+
+
+def test_normalize_lines():
+    assert normalize_lines("  第一行　　内容 \n\n​\n\t第二行\t\t内容") == ["第一行 内容", "第二行 内容"]
+
+
+def test_drop_sections():
+    lines = ["1 概述", "1.1 文档修订记录", "V1.0 初稿", "V1.1 修订", "1.2 背景", "背景说明", "2 功能需求", "需求说明"]
+    kept, dropped = drop_sections(lines)
+    assert kept == ["1 概述", "1.2 背景", "背景说明", "2 功能需求", "需求说明"]
+    assert dropped == ["1.1 文档修订记录"]
+
+
+def test_drop_table_of_contents():
+    lines = ["目录", "1 概述......1", "2 功能需求......3", "1 概述", "概述内容", "2 功能需求", "需求说明"]
+    kept, dropped = drop_sections(lines)
+    assert kept == ["1 概述", "概述内容", "2 功能需求", "需求说明"]
+    assert dropped == ["目录"]
+
+
+def test_remove_language_menu():
+    lines = []
+    for number in range(1, 4):
+        lines += [f"3.{number} 接口{number}", f"接口{number}的请求示例如下"] + LANGUAGE_MENU + [f"curl -X POST /api/v{number}"]
+    kept, removed = remove_boilerplate(lines)
+    assert removed == 3 * len(LANGUAGE_MENU)
+    assert kept == [line for number in range(1, 4)
+                    for line in (f"3.{number} 接口{number}", f"接口{number}的请求示例如下", f"curl -X POST /api/v{number}")]
+
+
+def test_repeated_prose_is_kept():
+    # 多个章节共用同样的字段规则，重复的正文必须原样保留
+    lines = []
+    for number in range(1, 4):
+        lines += [f"3.{number} 表单{number}"] + FIELD_RULES
+    assert remove_boilerplate(lines) == (lines, 0)
+    assert remove_boilerplate(lines[:1 + 2 * len(FIELD_RULES)]) == (lines[:1 + 2 * len(FIELD_RULES)], 0)
+
+
+def test_rare_layout_lines_are_kept():
+    lines = ["示例"] + LANGUAGE_MENU + ["说明"] + LANGUAGE_MENU
+    assert remove_boilerplate(lines) == (lines, 0)
+
+
+def test_step_list_is_not_a_table():
+    steps = ["用户输入用户名", "用户输入密码", "点击登录按钮", "系统校验账号密码", "跳转到首页", "显示欢迎信息",
+             "点击退出登录", "返回登录页"]
+    for count in range(6, len(steps) + 1):
+        assert rebuild_tables(steps[:count]) == (steps[:count], 0)
+
+
+def test_rebuild_matrix_table():
+    cells = ["当前活动\\已应用", "单品", "条件", "整单",
+             "单品", "×", "△", "√",
+             "条件", "△", "×", "√",
+             "整单", "√", "√", "×"]
+    lines, tables = rebuild_tables(["叠加规则如下："] + cells + ["以上规则适用于所有门店。"])
+    assert tables == 1
+    assert lines == ["叠加规则如下：", "当前活动\\已应用|单品|条件|整单", "单品|×|△|√", "条件|△|×|√", "整单|√|√|×",
+                     "以上规则适用于所有门店。"]
+
+
+def test_rebuild_table_by_cell_lengths():
+    cells = ["维度", "类型示例", "优先级规则",
+             "单品", "特价、折扣、买N件特价", "同商品仅生效1个活动",
+             "条件", "满X元减Y、任选满Z件", "条件满足度高的活动优先",
+             "整单", "全场满减、阶梯折扣", "整单活动最后计算"]
+    lines, tables = rebuild_tables(cells)
+    assert tables == 1
+    assert lines == ["|".join(cells[index:index + 3]) for index in range(0, len(cells), 3)]
+
+
+def test_compact_keeps_content_in_order():
+    text = "\n\n".join(["1 概述", "1.1 修订记录", "V1.0 初稿", "2 登录"] + FIELD_RULES + LANGUAGE_MENU
+                       + ["3 注册"] + FIELD_RULES + LANGUAGE_MENU + ["4 找回密码"] + FIELD_RULES + LANGUAGE_MENU)
+    result = compact_requirements(text)
+    assert result.text.split("\n") == (["1 概述", "2 登录"] + FIELD_RULES + ["3 注册"] + FIELD_RULES
+                                       + ["4 找回密码"] + FIELD_RULES)
+    assert result.dropped_sections == ["1.1 修订记录"]
+    assert result.boilerplate_lines == 3 * len(LANGUAGE_MENU)
+    assert result.tokens_after < result.tokens_before
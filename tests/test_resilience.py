@@ -0,0 +1,98 @@
+"""
+熔断器与错误分类测试
+"""
+
+import pytest
+
+from src.core import resilience
+from src.core.resilience import CircuitBreaker, LLMRequestError
+
+
+class Clock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def open_breaker(clock: Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now += 9
+    assert not breaker.allow()
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = open_breaker(clock)
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # 探测请求有结果之前，其他并发请求都被拒绝
+    assert [breaker.allow() for _ in range(5)] == [False] * 5
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert all(breaker.allow() for _ in range(5))
+
+
+def test_failed_probe_reopens(clock):
+    breaker = open_breaker(clock)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+
+
+def test_released_probe_allows_another(clock):
+    breaker = open_breaker(clock)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_lost_probe_expires(clock):
+    breaker = open_breaker(clock)
+    clock.now += 10
+    assert breaker.allow()
+    clock.now += 9
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("status, text, retryable, unavailable", [
+    (404, "not found", False, True),
+    (400, "model 'x' not found", False, True),
+    (429, "rate limited", True, True),
+    (503, "overloaded", True, True),
+    (500, "internal error", True, False),
+    (401, "unauthorized", False, False),
+])
+def test_error_classification(status, text, retryable, unavailable):
+    error = LLMRequestError.from_response(status, text)
+    assert (error.retryable, error.model_unavailable) == (retryable, unavailable)
@@ -0,0 +1,76 @@
+"""
+LLM响应缓存测试
+使用替换了_send的引擎，不连接模型服务
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.core.llm_engine import LLMEngine
+from src.core.resilience import LLMRequestError
+from src.core.response_cache import ResponseCache
+
+USABLE = json.dumps({"test_cases": [{"title": "登录成功", "steps": []}]}, ensure_ascii=False)
+
+
+class FakeEngine(LLMEngine):
+    """按模型返回预设响应，unavailable中的模型返回404（模型不存在）"""
+
+    def __init__(self, cache: ResponseCache, responses: dict, unavailable=()):
+        super().__init__(use_cache=True, cache=cache)
+        self.use_remote_api = False
+        self.model = "primary"
+        self.fallback_models = ["fallback"]
+        self.hedge_enabled = False
+        self.continuation_enabled = False
+        self.responses = responses
+        self.unavailable = set(unavailable)
+        self.sent = []
+
+    async def _send(self, model, api_base, prompt, system_prompt, max_tokens=None, schema=None):
+        self.sent.append(model)
+        if model in self.unavailable:
+            raise LLMRequestError.from_response(404, f"model '{model}' not found")
+        return self.responses[model]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path), 1 << 20, 0)
+    yield cache
+    cache.close()
+
+
+def generate(engine: LLMEngine, validator=None) -> str:
+    return asyncio.run(engine.generate_response("提示词", "系统提示词", validator=validator))
+
+
+def is_usable(response: str) -> bool:
+    return '"test_cases"' in response
+
+
+def test_primary_response_is_cached(cache):
+    first = FakeEngine(cache, {"primary": USABLE})
+    assert generate(first, is_usable) == USABLE
+    second = FakeEngine(cache, {"primary": "不应再次请求"})
+    assert generate(second, is_usable) == USABLE
+    assert second.sent == []
+
+
+def test_unusable_response_is_not_cached(cache):
+    first = FakeEngine(cache, {"primary": "抱歉，我无法生成测试用例"})
+    generate(first, is_usable)
+    second = FakeEngine(cache, {"primary": USABLE})
+    assert generate(second, is_usable) == USABLE
+    assert second.sent == ["primary"]
+
+
+def test_fallback_response_is_not_cached(cache):
+    first = FakeEngine(cache, {"fallback": USABLE}, unavailable={"primary"})
+    assert generate(first, is_usable) == USABLE
+    assert first.sent == ["primary", "fallback"]
+    second = FakeEngine(cache, {"primary": USABLE.replace("登录成功", "首选模型")})
+    assert "首选模型" in generate(second, is_usable)
+    assert second.sent == ["primary"]
@@ -0,0 +1,131 @@
+"""
+流式请求测试
+使用伪造的HTTP会话，不连接模型服务
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.core.llm_engine import LLMEngine
+from src.core.resilience import CircuitOpenError, LLMRequestError
+
+
+class FakeContent:
+    """按行产出NDJSON，遇到异常对象时抛出"""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def __aiter__(self):
+        for line in self.lines:
+            if isinstance(line, BaseException):
+                raise line
+            yield (json.dumps(line, ensure_ascii=False) + "\n").encode()
+
+
+class FakeResponse:
+    def __init__(self, status: int, lines=(), text: str = ""):
+        self.status = status
+        self.content = FakeContent(list(lines))
+        self._text = text
+
+    async def text(self) -> str:
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """按模型依次返回预设响应，记录每次请求的模型和超时设置"""
+
+    def __init__(self, responses: dict):
+        self.responses = {model: list(items) for model, items in responses.items()}
+        self.requests = []
+
+    def post(self, url, json=None, timeout=None):
+        self.requests.append((json["model"], timeout))
+        return self.responses[json["model"]].pop(0)
+
+
+def chunk(text: str, done: bool = False) -> dict:
+    return {"message": {"content": text}, "done": done}
+
+
+def make_engine(responses: dict) -> LLMEngine:
+    engine = LLMEngine(use_cache=False)
+    engine.use_remote_api = False
+    engine.model = "primary"
+    engine.fallback_models = ["fallback"]
+    engine.max_retries = 1
+    engine.session = FakeSession(responses)
+
+    async def get_session():
+        return engine.session
+    engine._get_session = get_session
+    return engine
+
+
+def stream(engine: LLMEngine) -> list:
+    async def collect():
+        return [text async for text in engine.stream_response("提示词", "系统提示词")]
+    return asyncio.run(collect())
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("src.core.llm_engine.RETRY_DELAY", 0)
+
+
+def test_stream_read_timeout_is_bounded():
+    engine = make_engine({"primary": [FakeResponse(200, [chunk("a"), chunk("b", done=True)])]})
+    assert stream(engine) == ["a", "b"]
+    timeout = engine.session.requests[0][1]
+    assert timeout.total is None
+    assert timeout.sock_read == engine.request_timeout
+
+
+def test_retry_before_first_chunk():
+    engine = make_engine({"primary": [FakeResponse(500, text="busy"),
+                                      FakeResponse(200, [chunk("ok", done=True)])]})
+    assert stream(engine) == ["ok"]
+    assert [model for model, _ in engine.session.requests] == ["primary", "primary"]
+    assert engine.request_metrics[-1].attempts == 2
+
+
+def test_missing_model_fails_over():
+    engine = make_engine({"primary": [FakeResponse(404, text="model 'primary' not found")],
+                          "fallback": [FakeResponse(200, [chunk("ok", done=True)])]})
+    assert stream(engine) == ["ok"]
+    assert engine.request_metrics[-1].served_model == "fallback"
+
+
+def test_error_after_first_chunk_is_not_retried():
+    engine = make_engine({"primary": [FakeResponse(200, [chunk("a"), asyncio.TimeoutError()])]})
+    with pytest.raises(LLMRequestError, match="timed out"):
+        stream(engine)
+    assert len(engine.session.requests) == 1
+
+
+def test_model_error_in_stream():
+    engine = make_engine({"primary": [FakeResponse(200, [{"error": "out of memory"}])] * 2,
+                          "fallback": [FakeResponse(401, text="unauthorized")]})
+    with pytest.raises(LLMRequestError) as error:
+        stream(engine)
+    assert error.value.status == 401
+    assert [model for model, _ in engine.session.requests] == ["primary", "primary", "fallback"]
+
+
+def test_open_circuit_rejects_stream():
+    engine = make_engine({})
+    breaker = engine._breaker(engine.api_base)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        stream(engine)
+    assert engine.session.requests == []
@@ -0,0 +1,96 @@
+"""
+表格导出测试
+"""
+
+import os
+import sys
+import types
+
+import pytest
+
+from src.core import test_generator
+from src.exporters import tabular_exporter
+from src.exporters.tabular_exporter import (
+    CsvExporter, JsonlExporter, ParquetExporter, TabularExporter, read_test_cases
+)
+
+
+def make_case(number: int) -> test_generator.TestCase:
+    return test_generator.TestCase(
+        id=f"20240101-{number:03d}",
+        module="登录模块",
+        title=f"登录场景{number}",
+        priority="中",
+        preconditions=["已注册账号"],
+        steps=[test_generator.TestStep(step_number=1, description=f"执行场景{number}",
+                                       expected_result=f"场景{number}结果正确")]
+    )
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    # 导出器写入OUTPUT_DIR，测试改为写入临时目录
+    monkeypatch.setattr(tabular_exporter, "OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def failing_cases(count: int):
+    for number in range(1, count + 1):
+        yield make_case(number)
+    raise RuntimeError("generation failed")
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        TabularExporter()
+
+
+@pytest.mark.parametrize("exporter_class", [JsonlExporter, CsvExporter])
+def test_failed_append_keeps_previous_export(exporter_class):
+    exporter = exporter_class(chunk_size=2)
+    path = exporter.export([make_case(1), make_case(2)], "cases")
+    with pytest.raises(RuntimeError):
+        # 失败前已经写出了一块
+        exporter.export(failing_cases(3), "cases", append=True)
+    assert [tc.title for tc in read_test_cases(path)] == ["登录场景1", "登录场景2"]
+
+
+def test_failed_open_closes_opened_files(monkeypatch, output_dir):
+    opened = []
+    real_open = open
+
+    def open_once(path, *args, **kwargs):
+        if opened:
+            raise OSError("disk full")
+        opened.append(real_open(path, *args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr("builtins.open", open_once)
+    with pytest.raises(OSError):
+        JsonlExporter().export([make_case(1)], "cases")
+    assert opened[0].closed
+
+
+def test_failed_parquet_open_removes_part_file(monkeypatch, output_dir):
+    closed = []
+
+    class ParquetWriter:
+        def __init__(self, path, schema):
+            if "steps" in path:
+                raise OSError("disk full")
+            self.path = path
+            open(path, "wb").close()
+
+        def close(self):
+            closed.append(self.path)
+
+    # 只替换ParquetExporter._open用到的pyarrow接口
+    pyarrow = types.SimpleNamespace(schema=list, string=str, int32=int, list_=list, Table=object)
+    pyarrow.parquet = types.SimpleNamespace(ParquetWriter=ParquetWriter)
+    monkeypatch.setitem(sys.modules, "pyarrow", pyarrow)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", pyarrow.parquet)
+
+    with pytest.raises(OSError):
+        ParquetExporter().export([make_case(1)], "cases")
+    assert len(closed) == 1
+    assert not os.path.exists(closed[0])
@@ -0,0 +1,104 @@
+"""
+测试用例生成器测试
+使用按提示词返回固定响应的模拟引擎，不连接模型服务
+"""
+
+import asyncio
+import json
+
+from src.config import settings
+from src.core import test_generator
+from src.core.journal import JobJournal
+
+MODULES = ("登录模块", "支付模块")
+REQUIREMENTS = """# 登录模块
+用户使用手机号和密码登录，密码错误三次后锁定账号十分钟。
+
+# 支付模块
+订单支持余额和银行卡两种支付方式，余额不足时提示切换支付方式。
+"""
+
+
+def case(module: str, title: str) -> dict:
+    return {"module": module, "title": title, "priority": "高",
+            "preconditions": ["已注册账号"],
+            "steps": [{"step_number": 1, "description": f"执行{title}", "expected_result": f"{title}符合预期"}]}
+
+
+class FakeEngine:
+    """
+    为提示词中出现的每个模块生成两个用例，同时输出分析结果
+    delays指定各模块的响应延迟(秒)，用于让章节乱序完成；shared为每个响应末尾追加的相同用例
+    """
+
+    def __init__(self, delays: dict = None, shared: dict = None):
+        self.delays = delays or {}
+        self.shared = shared
+        self.requests = []
+
+    async def generate_response(self, prompt, system_prompt, validator=None, schema=None, **kwargs):
+        self.requests.append(schema)
+        modules = [module for module in MODULES if module in prompt]
+        await asyncio.sleep(max(self.delays.get(module, 0) for module in modules))
+        test_cases = [case(module, f"{module}{scenario}") for module in modules for scenario in ("正常流程", "异常流程")]
+        if self.shared:
+            test_cases.append(self.shared)
+        return json.dumps({
+            "analysis": {"test_points": modules, "business_rules": [], "edge_cases": []},
+            "test_cases": test_cases
+        }, ensure_ascii=False)
+
+
+def make_generator(engine, **kwargs) -> test_generator.TestGenerator:
+    options = {"mode": "single", "compaction": False, "fanout": "off", "pipeline": "fast",
+               "structured_output": True}
+    options.update(kwargs)
+    return test_generator.TestGenerator(engine, **options)
+
+
+def test_fast_pipeline_single_request():
+    engine = FakeEngine()
+    test_cases = asyncio.run(make_generator(engine).generate_test_cases(REQUIREMENTS))
+    assert [tc.title for tc in test_cases] == ["登录模块正常流程", "登录模块异常流程",
+                                               "支付模块正常流程", "支付模块异常流程"]
+    assert len(engine.requests) == 1
+    assert list(engine.requests[0]["properties"]) == ["analysis", "test_cases"]
+
+
+def test_fast_pipeline_journals_analysis(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    try:
+        generator = make_generator(FakeEngine(), journal=journal)
+        asyncio.run(generator.generate_test_cases(REQUIREMENTS))
+        analysis = journal.get(generator.document_key, JobJournal.DOCUMENT, JobJournal.ANALYZED)
+        assert json.loads(analysis)["analysis"]["test_points"] == ["登录模块", "支付模块"]
+        assert journal.get(generator.document_key, JobJournal.DOCUMENT, JobJournal.GENERATED) is not None
+
+        # 重新运行时从日志恢复，不再请求模型
+        engine = FakeEngine()
+        test_cases = asyncio.run(make_generator(engine, journal=journal).generate_test_cases(REQUIREMENTS))
+        assert len(test_cases) == 4
+        assert engine.requests == []
+    finally:
+        journal.close()
+
+
+def test_chunked_renumbers_in_section_order(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+    # 登录模块章节最后完成，各章节解析时分配的ID是交错的
+    engine = FakeEngine(delays={"登录模块": 0.05}, shared=case("通用", "退出登录"))
+    generator = make_generator(engine, mode="chunked", chunk_max_tokens=40)
+    test_cases = asyncio.run(generator.generate_test_cases(REQUIREMENTS))
+    assert len(engine.requests) == 2
+    # 跨章节重复的用例只保留第一个
+    assert [tc.title for tc in test_cases] == ["登录模块正常流程", "登录模块异常流程", "退出登录",
+                                               "支付模块正常流程", "支付模块异常流程"]
+    assert [tc.id for tc in test_cases] == [f"{generator.date_prefix}-{number:03d}" for number in range(1, 6)]
+
+
+def test_duplicates_kept_without_dedup(monkeypatch):
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", False)
+    engine = FakeEngine(shared=case("通用", "退出登录"))
+    generator = make_generator(engine, mode="chunked", chunk_max_tokens=40)
+    test_cases = asyncio.run(generator.generate_test_cases(REQUIREMENTS))
+    assert [tc.title for tc in test_cases].count("退出登录") == 2